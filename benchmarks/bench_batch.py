@@ -0,0 +1,129 @@
+"""
+Time to fetch the recent 8-Ks of a portfolio, one company after another, all
+companies gathered at once, and as one pipeline, against a stand-in downloader
+that paces requests at a fixed rate and adds latency to each.
+
+    python -m benchmarks.bench_batch --companies 200 --rate 100 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import cast, override
+
+from src.sec_api.batch import iter_filings_async
+from src.sec_api.company import Company
+from src.sec_api.scheduler import FetchScheduler
+from src.sec_api.typings import DownloadResponse, Filing, IDownloader
+
+from .payloads import make_filing_html, make_submissions_json
+
+QUERY = {"form": "8-K", "start_date": "2025-06-01"}
+
+
+class PacedDownloader(IDownloader):
+    """Starts at most `rate` requests per second, each taking `latency`"""
+
+    requests: int
+    _rate: float
+    _latency: float
+    _next_start: float
+    _submissions: dict[str, str]
+    _document: str
+
+    def __init__(self, rate: float, latency: float, companies: int):
+        rng = random.Random(0)
+        self.requests = 0
+        self._rate = rate
+        self._latency = latency
+        self._next_start = 0.0
+        self._submissions = {
+            f"CIK{cik:010d}.json": make_submissions_json(rng, cik, recent=200)
+            for cik in range(1, companies + 1)
+        }
+        self._document = make_filing_html(rng, 50_000)
+
+    @override
+    async def get_url_async(self, url: str) -> DownloadResponse:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._next_start)
+        self._next_start = start + 1 / self._rate
+        await asyncio.sleep(start - now + self._latency)
+        self.requests += 1
+
+        name = url.rsplit("/", 1)[1]
+        return {
+            "url": url,
+            "status_code": 200,
+            # A new string per response, as a real download would give
+            "content": self._submissions.get(name) or f"{self._document}{url}",
+            "content_type": "",
+            "last_modified": "",
+        }
+
+
+async def sequential_async(companies: list[Company], _scheduler: FetchScheduler):
+    for company in companies:
+        _ = await company.get_primary_documents_async(**QUERY)  # pyright: ignore[reportArgumentType]
+
+
+async def gathered_async(companies: list[Company], _scheduler: FetchScheduler):
+    _ = await asyncio.gather(
+        *(company.get_primary_documents_async(**QUERY) for company in companies)  # pyright: ignore[reportArgumentType]
+    )
+
+
+async def pipelined_async(companies: list[Company], scheduler: FetchScheduler):
+    async def list_filings(company: Company) -> list[Filing]:
+        return await company.get_filing_details_async(**QUERY)  # pyright: ignore[reportArgumentType]
+
+    async for result in iter_filings_async(companies, list_filings, scheduler):
+        if "error" in result:
+            raise result["error"]
+
+
+async def main_async(companies: int, rate: float, latency: float):
+    runs: list[tuple[str, Callable[[list[Company], FetchScheduler], Awaitable[None]]]]
+    runs = [
+        ("sequential", sequential_async),
+        ("gathered", gathered_async),
+        ("pipelined", pipelined_async),
+    ]
+    tracemalloc.start()
+    for label, run in runs:
+        downloader = PacedDownloader(rate, latency, companies)
+        scheduler = FetchScheduler()
+        portfolio = [
+            Company(cik, downloader, scheduler) for cik in range(1, companies + 1)
+        ]
+
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        await run(portfolio, scheduler)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+
+        print(
+            f"{label:<11} requests={downloader.requests} elapsed={elapsed:6.2f}s "
+            + f"rate bound={downloader.requests / rate:6.2f}s "
+            + f"peak={(peak - baseline) / 2**20:6.1f}MiB"
+        )
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--companies", type=int, default=200)
+    _ = parser.add_argument("--rate", type=float, default=100)
+    _ = parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(
+        main_async(
+            cast(int, args.companies), cast(float, args.rate), cast(float, args.latency)
+        )
+    )
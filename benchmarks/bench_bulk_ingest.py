@@ -0,0 +1,80 @@
+"""
+Ingest time and memory of FilingsStore on a synthetic bulk submissions.zip.
+Most companies have a handful of filings, a few have 1000 recent ones plus
+pages of older ones, as in SEC's archive.
+
+    python -m benchmarks.bench_bulk_ingest --companies 20000 --workers 4
+"""
+
+import argparse
+import asyncio
+import random
+import resource
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import cast
+
+from src.sec_api.filings_store import FilingsStore
+
+from .payloads import make_submissions_json, make_submissions_page_json
+
+
+def make_archive(path: Path, companies: int, seed: int = 0) -> int:
+    rng = random.Random(seed)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for cik in range(1, companies + 1):
+            if rng.random() < 0.02:
+                recent, files = 1000, rng.randint(1, 5)
+            else:
+                recent, files = int(rng.paretovariate(1.2)) * 5, 0
+            zf.writestr(
+                f"CIK{cik:010d}.json",
+                make_submissions_json(rng, cik, recent=min(recent, 1000), files=files),
+            )
+            for page in range(1, files + 1):
+                zf.writestr(
+                    f"CIK{cik:010d}-submissions-{page:03d}.json",
+                    make_submissions_page_json(rng, cik),
+                )
+    return path.stat().st_size
+
+
+def max_rss_mib(who: int) -> float:
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+async def main_async(companies: int, workers: int | None):
+    with tempfile.TemporaryDirectory() as directory:
+        archive = Path(directory, "submissions.zip")
+        start = time.perf_counter()
+        size = make_archive(archive, companies)
+        print(
+            f"archive    companies={companies} size={size / 2**20:.1f}MiB "
+            + f"built in {time.perf_counter() - start:.1f}s "
+            + f"rss={max_rss_mib(resource.RUSAGE_SELF):.0f}MiB"
+        )
+
+        store = FilingsStore(str(Path(directory, "filings.sqlite")))
+        stats = await store.ingest_archive_async(archive, workers)
+        await store.aclose()
+
+        print(
+            f"ingest     filings={stats['filings']} seconds={stats['seconds']:.1f} "
+            + f"companies/s={stats['companies'] / stats['seconds']:.0f} "
+            + f"filings/s={stats['filings'] / stats['seconds']:.0f}"
+        )
+        print(
+            f"{'':<10} peak rss: main={max_rss_mib(resource.RUSAGE_SELF):.0f}MiB "
+            + f"largest worker={max_rss_mib(resource.RUSAGE_CHILDREN):.0f}MiB "
+            + f"database={Path(directory, 'filings.sqlite').stat().st_size / 2**20:.0f}MiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--companies", type=int, default=20_000)
+    _ = parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main_async(cast(int, args.companies), cast(int | None, args.workers)))
@@ -0,0 +1,119 @@
+"""
+Size and throughput of cache entry formats over a synthetic corpus of filing
+documents, submissions JSONs and the ticker file, plus migration of a legacy
+cache directory.
+
+    python -m benchmarks.bench_cache_format --documents 40
+"""
+
+import argparse
+import importlib.util
+import json
+import random
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import cast
+
+from src.sec_api.cache_format import (
+    Compression,
+    decode_cache_entry,
+    encode_cache_entry,
+    migrate_cache_directory,
+    read_cache_header,
+)
+from src.sec_api.typings import DownloadResponse
+
+from .payloads import (
+    make_company_tickers_exchange_json,
+    make_filing_html,
+    make_submissions_json,
+)
+
+
+def make_corpus(documents: int) -> list[DownloadResponse]:
+    rng = random.Random(0)
+    contents = [make_company_tickers_exchange_json(rng)]
+    contents += [
+        make_filing_html(rng, int(rng.lognormvariate(12.5, 1.0)))
+        for _ in range(documents)
+    ]
+    contents += [make_submissions_json(rng, cik) for cik in range(documents // 4)]
+
+    return [
+        {
+            "url": f"https://www.sec.gov/Archives/{i}",
+            "status_code": 200,
+            "content": content,
+            "content_type": "text/html",
+            "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+            "fetched_at": 1704067200.0,
+        }
+        for i, content in enumerate(contents)
+    ]
+
+
+def timed[T](fn: Callable[[], T]) -> tuple[T, float]:
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(documents: int):
+    corpus = make_corpus(documents)
+    raw = sum(len(response["content"].encode()) for response in corpus)
+    print(f"corpus: {len(corpus)} entries, {raw / 1e6:.1f} MB of content\n")
+
+    encoders: dict[str, Callable[[DownloadResponse], bytes]] = {
+        "json indent=2": lambda r: json.dumps(r, indent=2).encode(),
+        "json": lambda r: json.dumps(r).encode(),
+    }
+    compressions: list[Compression] = ["identity", "gzip"]
+    if importlib.util.find_spec("zstandard") is not None:
+        compressions.append("zstd")
+    for compression in compressions:
+        encoders[compression] = lambda r, compression=compression: encode_cache_entry(
+            r, compression
+        )
+
+    print(
+        f"{'format':<14}{'size MB':>9}{'ratio':>7}{'write MB/s':>12}"
+        + f"{'read MB/s':>11}{'header µs':>11}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for name, encode in encoders.items():
+            encoded, write_time = timed(lambda: [encode(r) for r in corpus])  # noqa: B023
+            size = sum(map(len, encoded))
+
+            def read_all():
+                for data in encoded:  # noqa: B023
+                    entry = decode_cache_entry(data)
+                    assert entry is not None
+                    _ = entry.content
+
+            _, read_time = timed(read_all)
+
+            paths = [Path(directory, f"{name}-{i}") for i in range(len(encoded))]
+            for path, data in zip(paths, encoded, strict=True):
+                _ = path.write_bytes(data)
+            _, header_time = timed(lambda: [read_cache_header(p) for p in paths])  # noqa: B023
+
+            print(
+                f"{name:<14}{size / 1e6:>9.1f}{size / raw:>7.2f}"
+                + f"{raw / 1e6 / write_time:>12.1f}{raw / 1e6 / read_time:>11.1f}"
+                + f"{header_time / len(paths) * 1e6:>11.1f}"
+            )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i, response in enumerate(corpus):
+            _ = Path(directory, str(i)).write_text(json.dumps(response, indent=2))
+        migrated, migrate_time = timed(lambda: migrate_cache_directory(directory))
+        print(f"\nmigrated {migrated} legacy entries in {migrate_time:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--documents", type=int, default=40)
+    args = parser.parse_args()
+    main(cast(int, args.documents))
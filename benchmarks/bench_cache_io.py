@@ -0,0 +1,89 @@
+"""
+Event loop lag while LocalCacheDownloader serves concurrent cached reads,
+with blocking file I/O on the loop (the old behaviour) versus the I/O pool.
+
+    python -m benchmarks.bench_cache_io --reads 200 --size 1000000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import cast, override
+
+from src.sec_api.cache_format import decode_cache_entry
+from src.sec_api.downloader_local import LocalCacheDownloader, get_response
+from src.sec_api.typings import DownloadResponse
+
+
+class BlockingLocalCacheDownloader(LocalCacheDownloader):
+    @override
+    async def read_from_cache_async(self, url: str) -> DownloadResponse | None:
+        fname = self._get_cache_path(url)
+        if not fname.exists():
+            return None
+        with open(fname, "rb") as file:  # noqa: ASYNC230
+            entry = decode_cache_entry(file.read())
+        return None if entry is None else get_response(entry)
+
+
+async def measure_lag_async(downloader: LocalCacheDownloader, urls: list[str]):
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+    async def reads():
+        try:
+            _ = await asyncio.gather(*map(downloader.read_from_cache_async, urls))
+        finally:
+            done.set()
+
+    start = time.perf_counter()
+    _ = await asyncio.gather(ticker(), reads())
+    elapsed = time.perf_counter() - start
+
+    lags.sort()
+    return elapsed, lags[len(lags) // 2], lags[int(len(lags) * 0.99)], lags[-1]
+
+
+async def main_async(reads: int, size: int):
+    with tempfile.TemporaryDirectory() as directory:
+        urls = [f"https://www.sec.gov/Archives/doc-{i}.htm" for i in range(reads)]
+        async with LocalCacheDownloader(
+            user_agent="benchmark", cache_directory=directory
+        ) as writer:
+            for url in urls:
+                await writer.write_to_cache_async(
+                    url,
+                    {
+                        "url": url,
+                        "status_code": 200,
+                        "content": "x" * size,
+                        "content_type": "text/html",
+                        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                    },
+                )
+
+        for label, cls in (
+            ("blocking", BlockingLocalCacheDownloader),
+            ("io pool", LocalCacheDownloader),
+        ):
+            async with cls(user_agent="benchmark", cache_directory=directory) as d:
+                elapsed, p50, p99, worst = await measure_lag_async(d, urls)
+            print(
+                f"{label:<10} total={elapsed * 1000:8.1f}ms "
+                + f"lag p50={p50:7.2f}ms p99={p99:7.2f}ms max={worst:7.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--reads", type=int, default=200)
+    _ = parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(main_async(cast(int, args.reads), cast(int, args.size)))
@@ -0,0 +1,239 @@
+"""
+End-to-end scenarios through `Edgar` and `Company` on each downloader, served
+by the stand-in server with SEC-like payload sizes, latency, Last-Modified
+revalidation and occasional 429s. Prints one line per scenario and writes
+them as JSON, optionally against the JSON of an earlier run.
+
+    python -m benchmarks.bench_end_to_end --companies 10 --output results.json
+    python -m benchmarks.bench_end_to_end --baseline results.json
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import re
+import tempfile
+import zlib
+from collections.abc import Awaitable, Callable
+from functools import cache
+from pathlib import Path
+from typing import cast
+
+from main import Edgar
+from src.sec_api.cik import CentralIndexKey
+from src.sec_api.company import Company
+from src.sec_api.downloader_base import BaseDownloader
+from src.sec_api.downloader_local import LocalCacheDownloader
+from src.sec_api.downloader_sqlite import SqliteCacheDownloader
+from src.sec_api.freshness import PatternFreshnessPolicy
+
+from .harness import (
+    RecordingDownloader,
+    ScenarioResult,
+    TimedLimiter,
+    compare_results,
+    measure_async,
+    print_result,
+    write_results,
+)
+from .payloads import (
+    make_company_tickers_exchange_json,
+    make_filing_html,
+    make_submissions_json,
+)
+from .server import StandInServer
+
+# `main` logs every limiter acquisition at DEBUG
+logging.getLogger().setLevel(logging.WARNING)
+
+TICKERS = 10_000
+
+SUBMISSIONS = re.compile(r"^/submissions/CIK(\d{10})\.json$")
+DOCUMENT = re.compile(r"^/Archives/edgar/data/\d+/\d{18}/[^/]+$")
+
+
+@cache
+def payload(path: str) -> bytes | None:
+    """Same bytes for a path every time, so caches can revalidate"""
+    if path == "/files/company_tickers_exchange.json":
+        return make_company_tickers_exchange_json(random.Random(0), TICKERS).encode()
+    if match := SUBMISSIONS.match(path):
+        cik = int(match[1])
+        return make_submissions_json(random.Random(cik), cik).encode()
+    if DOCUMENT.match(path):
+        rng = random.Random(zlib.crc32(path.encode()))
+        return make_filing_html(rng, int(rng.lognormvariate(11.5, 0.8))).encode()
+    return None
+
+
+def make_downloader(
+    kind: str, directory: str, limiter: TimedLimiter, rate: int, revalidate: bool
+) -> BaseDownloader:
+    # Revalidating downloaders treat every cached copy as expired
+    freshness_policy = PatternFreshnessPolicy(rules=[]) if revalidate else None
+    if kind == "local":
+        return LocalCacheDownloader(
+            user_agent="benchmark",
+            cache_directory=f"{directory}/local",
+            rate_per_second=rate,
+            limiter=limiter,
+            freshness_policy=freshness_policy,
+        )
+    return SqliteCacheDownloader(
+        user_agent="benchmark",
+        database=f"{directory}/sqlite/cache.sqlite",
+        rate_per_second=rate,
+        limiter=limiter,
+        freshness_policy=freshness_policy,
+    )
+
+
+async def get_companies_async(edgar: Edgar, tickers: list[str]) -> list[Company]:
+    companies = await edgar.get_companies_async(tickers)
+    return [company for company in companies.values() if company is not None]
+
+
+async def run_scenarios_async(
+    kind: str,
+    server: StandInServer,
+    limiter: TimedLimiter,
+    recorder: RecordingDownloader,
+    tickers: list[str],
+    revalidate: bool,
+) -> list[ScenarioResult]:
+    """The scenarios of one downloader, through `recorder`"""
+    results: list[ScenarioResult] = []
+
+    async def measure(name: str, run: Callable[[], Awaitable[object]]):
+        result = await measure_async(
+            name, kind, run, server=server, recorder=recorder, limiter=limiter
+        )
+        print_result(result)
+        results.append(result)
+
+    def new_edgar() -> Edgar:
+        # New companies each time, so only the downloader remembers
+        return Edgar(downloader=recorder, indexer=CentralIndexKey(recorder))
+
+    async def list_filings(edgar: Edgar):
+        return await asyncio.gather(
+            *(
+                company.get_filing_details_async(form="10-K")
+                for company in await get_companies_async(edgar, tickers)
+            )
+        )
+
+    if revalidate:
+        await measure("submissions, revalidated", lambda: list_filings(new_edgar()))
+        return results
+
+    await measure("tickers, cold", lambda: get_companies_async(new_edgar(), tickers))
+    await measure("submissions, cold", lambda: list_filings(new_edgar()))
+    await measure("submissions, cached", lambda: list_filings(new_edgar()))
+
+    async def get_documents(edgar: Edgar):
+        return await asyncio.gather(
+            *(
+                company.get_primary_documents_async(form="10-Q", year=2025)
+                for company in await get_companies_async(edgar, tickers)
+            )
+        )
+
+    await measure("documents, cold", lambda: get_documents(new_edgar()))
+    await measure("documents, cached", lambda: get_documents(new_edgar()))
+
+    async def batch(edgar: Edgar):
+        companies_ = await get_companies_async(edgar, tickers)
+        return [
+            result
+            async for result in edgar.iter_filings_async(
+                companies_, form="8-K", year=2025
+            )
+        ]
+
+    await measure("batch, cold", lambda: batch(new_edgar()))
+    return results
+
+
+async def run_kind_async(
+    kind: str, server: StandInServer, directory: str, companies: int, rate: int
+) -> list[ScenarioResult]:
+    tickers = [f"T{i:04d}" for i in range(0, TICKERS, TICKERS // companies)]
+    results: list[ScenarioResult] = []
+
+    for revalidate in (False, True):
+        limiter = TimedLimiter(rate)
+        async with make_downloader(
+            kind, directory, limiter, rate, revalidate
+        ) as downloader:
+            recorder = RecordingDownloader(downloader, server.url)
+            results.extend(
+                await run_scenarios_async(
+                    kind, server, limiter, recorder, tickers, revalidate
+                )
+            )
+
+    return results
+
+
+async def main_async(
+    companies: int,
+    rate: int,
+    latency: float,
+    jitter: float,
+    throttle: float,
+    output: str | None,
+    baseline: str | None,
+):
+    results: list[ScenarioResult] = []
+    with (
+        StandInServer(
+            payload=payload,
+            latency=latency,
+            jitter=jitter,
+            throttle_probability=throttle,
+        ) as server,
+        tempfile.TemporaryDirectory() as directory,
+    ):
+        for kind in ("local", "sqlite"):
+            Path(directory, kind).mkdir()
+            results.extend(
+                await run_kind_async(kind, server, directory, companies, rate)
+            )
+
+    if output is not None:
+        parameters: dict[str, object] = {
+            "companies": companies,
+            "rate": rate,
+            "latency": latency,
+            "jitter": jitter,
+            "throttle": throttle,
+        }
+        write_results(output, parameters, results)
+    if baseline is not None:
+        print(f"\nagainst {baseline}:")
+        compare_results(baseline, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--companies", type=int, default=10)
+    _ = parser.add_argument("--rate", type=int, default=50)
+    _ = parser.add_argument("--latency", type=float, default=0.02)
+    _ = parser.add_argument("--jitter", type=float, default=0.03)
+    _ = parser.add_argument("--throttle", type=float, default=0.01)
+    _ = parser.add_argument("--output", default=None)
+    _ = parser.add_argument("--baseline", default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main_async(
+            cast(int, args.companies),
+            cast(int, args.rate),
+            cast(float, args.latency),
+            cast(float, args.jitter),
+            cast(float, args.throttle),
+            cast(str | None, args.output),
+            cast(str | None, args.baseline),
+        )
+    )
@@ -0,0 +1,108 @@
+"""
+Throughput of text extraction from filing documents: one at a time on the
+event loop, in the extractor's process pool fed from a download stream, and
+again with every result already cached for the same content.
+
+    python -m benchmarks.bench_extraction --documents 64 --size 500000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections.abc import AsyncGenerator
+from typing import cast
+
+from src.sec_api.extraction import DocumentExtractor, extract_document, get_sha256
+from src.sec_api.scheduler import ScheduledResult
+from src.sec_api.typings import DownloadResponse
+
+from .payloads import make_filing_html
+
+
+def make_responses(documents: int, size: int) -> list[DownloadResponse]:
+    rng = random.Random(0)
+    return [
+        {
+            "url": f"https://www.sec.gov/Archives/edgar/data/{i}/doc.htm",
+            "status_code": 200,
+            "content": make_filing_html(rng, size),
+            "content_type": "text/html",
+            "last_modified": "",
+        }
+        for i in range(documents)
+    ]
+
+
+async def stream(
+    responses: list[DownloadResponse],
+) -> AsyncGenerator[ScheduledResult[int, DownloadResponse]]:
+    for i, response in enumerate(responses):
+        yield ScheduledResult[int, DownloadResponse](item=i, value=response)
+
+
+async def measure_stalls(stalls: list[float], interval: float = 0.005):
+    """Records how late each tick of the event loop comes"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+
+
+def report(label: str, elapsed: float, documents: int, size: int, stalls: list[float]):
+    print(
+        f"{label:<16}{elapsed:>8.2f} s {documents / elapsed:>8.1f} docs/s "
+        + f"{size / elapsed / 1e6:>7.1f} MB/s  "
+        + f"worst loop stall {max(stalls, default=0) * 1e3:>6.1f} ms"
+    )
+
+
+async def main_async(documents: int, size: int, workers: int | None):
+    responses = make_responses(documents, size)
+    total = sum(len(response["content"]) for response in responses)
+    print(f"{documents} documents, {total / 1e6:.1f} MB, {os.cpu_count()} CPUs\n")
+
+    stalls: list[float] = []
+    ticker = asyncio.create_task(measure_stalls(stalls))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    for response in responses:
+        _ = extract_document(
+            response["url"],
+            response["content"],
+            "text/html",
+            get_sha256(response["content"]),
+        )
+        await asyncio.sleep(0)
+    report("inline", time.perf_counter() - started, documents, total, stalls)
+
+    with tempfile.TemporaryDirectory() as directory:
+        extractor = DocumentExtractor(directory, workers=workers)
+        try:
+            for label in ("process pool", "cached"):
+                stalls.clear()
+                started = time.perf_counter()
+                async for result in extractor.iter_extracted_async(stream(responses)):
+                    if "error" in result:
+                        raise result["error"]
+                report(label, time.perf_counter() - started, documents, total, stalls)
+        finally:
+            await extractor.aclose()
+            _ = ticker.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--documents", type=int, default=64)
+    _ = parser.add_argument("--size", type=int, default=500_000)
+    _ = parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main_async(
+            cast(int, args.documents),
+            cast(int, args.size),
+            cast(int | None, args.workers),
+        )
+    )
@@ -0,0 +1,111 @@
+"""
+Memory and filter latency of FilingsTable versus the list of Filing dicts it
+replaced, across many companies' submissions. Indexes are built by the first
+"select only" query of each table.
+
+    python -m benchmarks.bench_filings_table --companies 2000
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from collections.abc import Callable, Sized
+from typing import cast
+
+from src.sec_api.filings_table import FilingsTable
+from src.sec_api.typings import Filing, SubmissionsJSON_Filings_Recent
+from src.sec_api.utils import transform_columns_to_filings
+
+from .payloads import make_recent_filings
+
+QUERIES: list[tuple[str | None, str | None, str | None]] = [
+    ("10-K", None, None),
+    (None, "2024-01-01", "2024-12-31"),
+    ("4", "2023-01-01", "2023-06-30"),
+    # Small ranges, answered from the sorted date index
+    (None, "2023-03-01", "2023-03-31"),
+    ("10-K", "2023-03-01", "2023-03-31"),
+]
+
+
+def filter_filings(
+    filings: list[Filing], form: str | None, start: str | None, end: str | None
+) -> list[Filing]:
+    def filter_fn(f: Filing):
+        report_date = f["reportDate"]
+        return (
+            (start is None or start <= report_date)
+            and (end is None or end >= report_date)
+            and (form is None or form == f["form"])
+        )
+
+    return list(filter(filter_fn, filings))
+
+
+type Query[T] = Callable[[T, str | None, str | None, str | None], Sized]
+
+
+def measure_memory[T](
+    label: str,
+    build: Callable[[str, SubmissionsJSON_Filings_Recent], T],
+    columns: list[SubmissionsJSON_Filings_Recent],
+) -> list[T]:
+    _ = gc.collect()
+    tracemalloc.start()
+    built = [build(f"{i:010d}", c) for i, c in enumerate(columns)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} memory={current / 2**20:8.1f}MiB (on top of the parsed JSON)")
+    return built
+
+
+def measure_filters[T](label: str, query: Query[T], items: list[T]):
+    for form, start, end in QUERIES:
+        started = time.perf_counter()
+        matches = sum(len(query(item, form, start, end)) for item in items)
+        elapsed = (time.perf_counter() - started) / len(items) * 1e6
+        print(
+            f"{label:<14} form={form!s:<5} range={start}..{end} "
+            + f"{elapsed:8.1f}us/company matches={matches}"
+        )
+
+
+def main(companies: int):
+    rng = random.Random(0)
+    # Round trip through JSON, so strings are laid out as after parsing
+    columns: list[SubmissionsJSON_Filings_Recent] = [
+        cast(
+            SubmissionsJSON_Filings_Recent,
+            json.loads(json.dumps(make_recent_filings(rng, cik, 1000))),
+        )
+        for cik in range(companies)
+    ]
+
+    dicts = measure_memory("list of dicts", transform_columns_to_filings, columns)
+    tables = measure_memory("FilingsTable", FilingsTable, columns)
+
+    measure_filters("list of dicts", filter_filings, dicts)
+    measure_filters(
+        "select only",
+        lambda table, form, start, end: table.select(
+            form=form, start_date=start, end_date=end
+        ),
+        tables,
+    )
+    measure_filters(
+        "FilingsTable",
+        lambda table, form, start, end: table.filter(
+            form=form, start_date=start, end_date=end
+        ),
+        tables,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--companies", type=int, default=2000)
+    args = parser.parse_args()
+    main(cast(int, args.companies))
@@ -0,0 +1,88 @@
+"""
+Parse and ingest rate of quarterly full-index files, and the latency of
+cross-company queries against the local table, compared with scanning every
+filer's submissions for the same answer.
+
+    python -m benchmarks.bench_full_index --quarters 2 --filings 400000
+"""
+
+import argparse
+import asyncio
+import gzip
+import io
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import cast
+
+from src.sec_api.full_index import FullIndexStore, parse_master_index
+
+from .payloads import make_master_index
+
+
+async def main(quarters: int, filings: int):
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths: list[tuple[Path, int]] = []
+        for quarter in range(1, quarters + 1):
+            data = make_master_index(rng, 2024, quarter, filings)
+            path = Path(directory, f"master-{quarter}.gz")
+            _ = path.write_bytes(gzip.compress(data, compresslevel=6))
+            paths.append((path, quarter))
+            print(
+                f"QTR{quarter}: {filings} filings, {len(data) / 1e6:.1f} MB, "
+                + f"{path.stat().st_size / 1e6:.1f} MB gzipped"
+            )
+
+        started = time.perf_counter()
+        parsed = sum(1 for _ in parse_master_index(io.BytesIO(data), 2024, quarters))  # pyright: ignore[reportPossiblyUnboundVariable, reportArgumentType]
+        elapsed = time.perf_counter() - started
+        print(f"\nparse only: {parsed / elapsed:,.0f} lines/s")
+
+        store = FullIndexStore(str(Path(directory, "full_index.sqlite")))
+        for path, quarter in paths:
+            started = time.perf_counter()
+            count = await store.ingest_file_async(path, 2024, quarter)  # pyright: ignore[reportArgumentType]
+            elapsed = time.perf_counter() - started
+            print(
+                f"ingest QTR{quarter}: {elapsed:.2f}s, {count / elapsed:,.0f} filings/s"
+            )
+
+        print()
+        for label, query in [
+            (
+                "10-Q in QTR1",
+                {"form": "10-Q", "start_date": "2024-01-01", "end_date": "2024-03-31"},
+            ),
+            (
+                "8-K on one day",
+                {"form": "8-K", "start_date": "2024-02-14", "end_date": "2024-02-14"},
+            ),
+            ("all on one day", {"start_date": "2024-02-14", "end_date": "2024-02-14"}),
+            ("latest 100", {"limit": 100}),
+        ]:
+            started = time.perf_counter()
+            for _ in range(5):
+                entries = await store.query_async(**query)  # pyright: ignore[reportArgumentType]
+            elapsed = (time.perf_counter() - started) / 5
+            print(f"{label:<16}{elapsed * 1e3:>9.1f} ms  {len(entries):>7} entries")  # pyright: ignore[reportPossiblyUnboundVariable]
+
+        await store.aclose()
+
+    # The same question through the submissions API is one rate limited
+    # request per filer, at 10 requests per second
+    companies = filings // 20
+    print(
+        f"\nper-company scan: {companies} submissions requests, "
+        + f"at least {companies / 10 / 60:.0f} min at 10 req/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--quarters", type=int, default=2)
+    _ = parser.add_argument("--filings", type=int, default=400_000)
+    args = parser.parse_args()
+    asyncio.run(main(cast(int, args.quarters), cast(int, args.filings)))
@@ -0,0 +1,72 @@
+"""
+Per-request latency of BaseDownloader with a client per URL (the old
+behaviour) versus the persistent pooled client.
+
+    python -m benchmarks.bench_http_client --requests 200 --latency 0.002
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import cast
+
+import httpx
+
+from src.sec_api.downloader_base import AsyncAsyncLimiterTransport, BaseDownloader
+
+from .server import StandInServer
+
+
+class PerRequestClientDownloader(BaseDownloader):
+    async def get_once_async(self, url: str):
+        transport = AsyncAsyncLimiterTransport(
+            limiter=self._limiter, retries=3, proxy=self._proxy
+        )
+        async with httpx.AsyncClient(transport=transport) as client:
+            response = await client.get(url, headers={"User-Agent": self._user_agent})
+        return response.raise_for_status().text
+
+
+async def measure_async(
+    label: str, fetch: Callable[[str], Awaitable[object]], urls: list[str]
+):
+    latencies: list[float] = []
+    for url in urls:
+        start = time.perf_counter()
+        _ = await fetch(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    print(
+        f"{label:<20} mean={statistics.fmean(latencies):7.3f}ms "
+        + f"p50={latencies[len(latencies) // 2]:7.3f}ms "
+        + f"p99={latencies[int(len(latencies) * 0.99) - 1]:7.3f}ms"
+    )
+
+
+async def main_async(requests: int, latency: float):
+    with StandInServer(latency=latency) as server:
+        urls = [f"{server.url}/Archives/doc-{i}.htm" for i in range(requests)]
+        before = PerRequestClientDownloader(
+            user_agent="benchmark", rate_per_second=10_000, proxy=None
+        )
+        connections = server.connections
+        await measure_async("client per request", before.get_once_async, urls)
+        print(f"{'':<20} connections={server.connections - connections}")
+
+        async with BaseDownloader(
+            user_agent="benchmark", rate_per_second=10_000, proxy=None
+        ) as after:
+            connections = server.connections
+            await measure_async("pooled client", after.get_url_async, urls)
+            print(f"{'':<20} connections={server.connections - connections}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--requests", type=int, default=200)
+    _ = parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(cast(int, args.requests), cast(float, args.latency)))
@@ -0,0 +1,126 @@
+"""
+Decoding throughput of the JSON backends over real-size payloads: the ticker
+file, large submissions JSONs, a submissions page, cache entry headers and
+legacy cached `DownloadResponse`s. `json.loads` is listed as an unvalidated
+baseline, and the ticker file is also decoded the way `CentralIndexKey` used to,
+building a new `TypeAdapter` on every refresh.
+
+    python -m benchmarks.bench_json_decoding --repeat 20
+"""
+
+import argparse
+import json
+import random
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import cast
+
+from pydantic import TypeAdapter
+
+from src.sec_api.cache_format import CacheHeader, encode_cache_entry
+from src.sec_api.cik import CompanyTickersExchangeJson
+from src.sec_api.json_decoder import JsonBackend, JsonDecoder, msgspec
+from src.sec_api.typings import (
+    DownloadResponse,
+    SubmissionsJSON,
+    SubmissionsJSON_Filings_Recent,
+)
+
+from .payloads import (
+    make_company_tickers_exchange_json,
+    make_filing_html,
+    make_submissions_json,
+    make_submissions_page_json,
+)
+
+
+def make_payloads() -> list[tuple[str, type, list[bytes]]]:
+    rng = random.Random(0)
+    responses: list[DownloadResponse] = [
+        {
+            "url": f"https://www.sec.gov/Archives/{i}",
+            "status_code": 200,
+            "content": make_filing_html(rng, 200_000),
+            "content_type": "text/html",
+            "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+            "fetched_at": 1704067200.0,
+        }
+        for i in range(20)
+    ]
+    headers = [
+        entry[8 : 8 + int.from_bytes(entry[4:8])]
+        for entry in (encode_cache_entry(r, "identity") for r in responses)
+    ]
+
+    return [
+        (
+            "tickers",
+            CompanyTickersExchangeJson,
+            [make_company_tickers_exchange_json(rng).encode()],
+        ),
+        (
+            "submissions",
+            SubmissionsJSON,
+            [make_submissions_json(rng, cik, 1000, 20).encode() for cik in range(5)],
+        ),
+        (
+            "page",
+            SubmissionsJSON_Filings_Recent,
+            [make_submissions_page_json(rng, cik).encode() for cik in range(5)],
+        ),
+        ("cache header", CacheHeader, headers),
+        (
+            "legacy entry",
+            DownloadResponse,
+            [json.dumps(r).encode() for r in responses],
+        ),
+    ]
+
+
+def measure(
+    label: str, decode: Callable[[bytes], object], items: list[bytes], repeat: int
+):
+    size = sum(map(len, items)) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for data in items:
+            _ = decode(data)
+    elapsed = time.perf_counter() - started
+    per_item = elapsed / (len(items) * repeat) * 1e6
+    print(f"  {label:<22}{size / 1e6 / elapsed:>9.1f} MB/s{per_item:>12.1f} µs/item")
+
+
+def validate_per_call(type_: type, data: bytes) -> object:
+    # What decoding cost before adapters were built once per type
+    return TypeAdapter(type_).validate_json(data)
+
+
+def main(repeat: int):
+    backends: list[JsonBackend] = ["pydantic"]
+    if msgspec is None:
+        print("msgspec is not installed, only pydantic is measured\n")
+    else:
+        backends.append("msgspec")
+
+    for name, type_, items in make_payloads():
+        print(
+            f"{name}: {len(items)} x {sum(map(len, items)) / len(items) / 1e3:.0f} kB"
+        )
+        measure("json.loads", json.loads, items, repeat)
+        if name == "tickers":
+            measure(
+                "TypeAdapter per call",
+                partial(validate_per_call, type_),
+                items,
+                repeat,
+            )
+        for backend in backends:
+            measure(backend, JsonDecoder(type_, backend), items, repeat)  # pyright: ignore[reportUnknownArgumentType]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(cast(int, args.repeat))
@@ -0,0 +1,96 @@
+"""
+Cost of metrics on the cheapest download path, a memory cache hit, and on
+cached reads from disk: no metrics, a registry without sinks, a no-op
+callback, and Prometheus aggregation.
+
+    python -m benchmarks.bench_metrics --calls 100000
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from typing import cast
+
+from src.sec_api.downloader_local import LocalCacheDownloader
+from src.sec_api.memory_cache import MemoryCache
+from src.sec_api.metrics import CallbackSink, Metrics, PrometheusSink
+from src.sec_api.typings import DownloadResponse
+
+URL = "https://data.sec.gov/submissions/CIK0000000123.json"
+
+# The cheapest parser, so the timings are mostly the download path
+parse_json: Callable[[str], object] = json.loads
+
+
+def make_response(url: str) -> DownloadResponse:
+    return {
+        "url": url,
+        "status_code": 200,
+        "content": json.dumps({"name": "x" * 1000}),
+        "content_type": "application/json",
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "fetched_at": time.time(),
+    }
+
+
+def get_variants() -> list[tuple[str, Metrics | None]]:
+    return [
+        ("none", None),
+        ("no sinks", Metrics()),
+        ("callback", Metrics(CallbackSink(lambda _: None))),
+        ("prometheus", Metrics(PrometheusSink())),
+    ]
+
+
+async def measure_memory_async(calls: int):
+    for label, metrics in get_variants():
+        with tempfile.TemporaryDirectory() as directory:
+            async with LocalCacheDownloader(
+                user_agent="benchmark",
+                cache_directory=directory,
+                memory_cache=MemoryCache(metrics=metrics),
+                metrics=metrics,
+            ) as downloader:
+                await downloader.write_to_cache_async(URL, make_response(URL))
+                _ = await downloader.get_parsed_async(URL, parse_json)
+
+                start = time.perf_counter()
+                for _ in range(calls):
+                    _ = await downloader.get_parsed_async(URL, parse_json)
+                elapsed = time.perf_counter() - start
+
+        print(f"memory hit   {label:<11} {elapsed / calls * 1e6:7.2f} us/call")
+
+
+async def measure_disk_async(calls: int):
+    urls = [f"https://data.sec.gov/submissions/CIK{i:010d}.json" for i in range(calls)]
+    for label, metrics in get_variants():
+        with tempfile.TemporaryDirectory() as directory:
+            async with LocalCacheDownloader(
+                user_agent="benchmark", cache_directory=directory, metrics=metrics
+            ) as downloader:
+                for url in urls:
+                    await downloader.write_to_cache_async(url, make_response(url))
+
+                start = time.perf_counter()
+                for url in urls:
+                    _ = await downloader.get_parsed_async(url, parse_json)
+                elapsed = time.perf_counter() - start
+
+        print(f"disk hit     {label:<11} {elapsed / calls * 1e6:7.2f} us/call")
+
+
+async def main_async(calls: int):
+    await measure_memory_async(calls)
+    # Each disk hit is a file read in the I/O pool, so far fewer of them
+    await measure_disk_async(calls // 100)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(main_async(cast(int, args.calls)))
@@ -0,0 +1,69 @@
+"""
+Throughput of a batch against a server that answers 429 above its allowed
+rate, with a fixed rate limiter set too high versus the adaptive controller.
+
+    python -m benchmarks.bench_rate_control --requests 300 --rate 30 --allowed 20
+"""
+
+import argparse
+import asyncio
+import time
+from typing import cast
+
+from src.sec_api.downloader_base import BaseDownloader
+
+from .server import StandInServer
+
+
+async def measure_async(
+    label: str, server: StandInServer, downloader: BaseDownloader, urls: list[str]
+):
+    requests, throttled = server.requests, server.throttled
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(downloader.get_url_async(url) for url in urls), return_exceptions=True
+    )
+    elapsed = time.perf_counter() - start
+
+    ok = sum(not isinstance(result, BaseException) for result in results)
+    controller = downloader.rate_controller
+    print(
+        f"{label:<10} ok={ok}/{len(urls)} elapsed={elapsed:6.2f}s "
+        + f"throughput={ok / elapsed:6.2f}/s "
+        + f"requests={server.requests - requests} "
+        + f"429s={server.throttled - throttled}"
+        + ("" if controller is None else f" final_rate={controller.rate:.2f}/s")
+    )
+
+
+async def main_async(requests: int, rate: int, allowed: float, retry_after: int | None):
+    with StandInServer(max_rate=allowed, retry_after=retry_after) as server:
+        for label, adaptive in (("fixed", False), ("adaptive", True)):
+            urls = [f"{server.url}/{label}/doc-{i}.htm" for i in range(requests)]
+            async with BaseDownloader(
+                user_agent="benchmark",
+                rate_per_second=rate,
+                proxy=None,
+                adaptive=adaptive,
+            ) as downloader:
+                await measure_async(label, server, downloader, urls)
+            # Let the server's window drain between runs
+            await asyncio.sleep(1.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--requests", type=int, default=300)
+    _ = parser.add_argument("--rate", type=int, default=30)
+    _ = parser.add_argument("--allowed", type=float, default=20)
+    _ = parser.add_argument("--retry-after", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main_async(
+            cast(int, args.requests),
+            cast(int, args.rate),
+            cast(float, args.allowed),
+            cast(int | None, args.retry_after),
+        )
+    )
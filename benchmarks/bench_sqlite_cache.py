@@ -0,0 +1,115 @@
+"""
+Lookup latency and disk use of SqliteCacheDownloader versus the file per URL
+layout of LocalCacheDownloader.
+
+    python -m benchmarks.bench_sqlite_cache --entries 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import cast
+
+from src.sec_api.downloader_local import LocalCacheDownloader
+from src.sec_api.downloader_sqlite import SqliteCacheDownloader
+from src.sec_api.typings import DownloadResponse
+
+from .payloads import make_words
+
+BATCH_SIZE = 5_000
+
+
+def make_response(rng: random.Random, url: str) -> DownloadResponse:
+    return {
+        "url": url,
+        "status_code": 200,
+        "content": make_words(rng, rng.randint(50, 400)),
+        "content_type": "text/html",
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "fetched_at": 1704067200.0,
+    }
+
+
+def disk_usage(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_blocks * 512
+    return sum(
+        os.stat(os.path.join(root, name)).st_blocks * 512
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+async def measure_lookups_async(
+    label: str,
+    read: Callable[[str], Awaitable[DownloadResponse | None]],
+    urls: list[str],
+    usage: int,
+    fill_time: float,
+):
+    latencies: list[float] = []
+    for url in random.Random(1).sample(urls, min(len(urls), 2_000)):
+        start = time.perf_counter()
+        assert await read(url) is not None
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+    latencies.sort()
+    print(
+        f"{label:<14}fill={fill_time:7.1f}s disk={usage / 1e6:9.1f}MB "
+        + f"lookup p50={latencies[len(latencies) // 2]:7.0f}µs "
+        + f"p99={latencies[int(len(latencies) * 0.99)]:7.0f}µs"
+    )
+
+
+async def main_async(entries: int):
+    rng = random.Random(0)
+    urls = [
+        f"https://www.sec.gov/Archives/edgar/data/{i % 5000}/{i:018d}/doc.htm"
+        for i in range(entries)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory, "cache.sqlite")
+        async with SqliteCacheDownloader(
+            user_agent="benchmark", database=str(database)
+        ) as downloader:
+            start = time.perf_counter()
+            for i in range(0, entries, BATCH_SIZE):
+                await downloader.put_many_async(
+                    (url, make_response(rng, url)) for url in urls[i : i + BATCH_SIZE]
+                )
+            fill_time = time.perf_counter() - start
+            usage = disk_usage(database)
+            await measure_lookups_async(
+                "sqlite", downloader.read_from_cache_async, urls, usage, fill_time
+            )
+
+    with tempfile.TemporaryDirectory() as directory:
+        async with LocalCacheDownloader(
+            user_agent="benchmark", cache_directory=directory
+        ) as downloader:
+            start = time.perf_counter()
+            for i in range(0, entries, BATCH_SIZE):
+                _ = await asyncio.gather(
+                    *(
+                        downloader.write_to_cache_async(url, make_response(rng, url))
+                        for url in urls[i : i + BATCH_SIZE]
+                    )
+                )
+            fill_time = time.perf_counter() - start
+            usage = disk_usage(Path(directory))
+            await measure_lookups_async(
+                "file per URL", downloader.read_from_cache_async, urls, usage, fill_time
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(main_async(cast(int, args.entries)))
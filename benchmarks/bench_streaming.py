@@ -0,0 +1,66 @@
+"""
+Peak Python memory while downloading one large document as text versus
+streaming it to disk, for growing document sizes.
+
+    python -m benchmarks.bench_streaming --sizes 8 32 128
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from typing import cast
+
+from src.sec_api.downloader_base import BaseDownloader
+
+from .server import StandInServer
+
+
+async def measure_async(label: str, size: int, fetch: Callable[[], Awaitable[object]]):
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    _ = await fetch()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+
+    print(
+        f"{label:<10} size={size:4d}MiB elapsed={elapsed:6.2f}s "
+        + f"peak={(peak - baseline) / 2**20:8.1f}MiB"
+    )
+
+
+async def measure_size_async(size: int):
+    body = b"<html>" + b"x" * (size * 2**20) + b"</html>"
+
+    with (
+        StandInServer(payload=lambda _: body) as server,
+        tempfile.TemporaryDirectory() as directory,
+    ):
+        url = f"{server.url}/Archives/doc.htm"
+        async with BaseDownloader(
+            user_agent="benchmark", rate_per_second=10_000, proxy=None
+        ) as downloader:
+            tracemalloc.start()
+            await measure_async("text", size, lambda: downloader.get_url_async(url))
+            await measure_async(
+                "streamed",
+                size,
+                lambda: downloader.download_to_file_async(url, f"{directory}/doc"),
+            )
+            tracemalloc.stop()
+
+
+async def main_async(sizes: list[int]):
+    # One call per size, so the closures above capture that size's payload
+    for size in sizes:
+        await measure_size_async(size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--sizes", type=int, nargs="+", default=[8, 32, 128])
+    args = parser.parse_args()
+    asyncio.run(main_async(cast(list[int], args.sizes)))
@@ -0,0 +1,120 @@
+"""
+Build throughput of the full-text index over a download cache of filing
+documents, and the latency of searches on it: a rare phrase, a common word,
+and the same filtered by company, form and date.
+
+    python -m benchmarks.bench_text_index --documents 100000 --size 3000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import cast
+
+from src.sec_api.cache_format import encode_cache_entry
+from src.sec_api.constants import DATA_SEC_URL, SEC_URL
+from src.sec_api.text_index import TextIndex
+from src.sec_api.typings import DownloadResponse, SubmissionsJSON
+
+from .payloads import make_filing_html, make_submissions_json
+
+FILINGS_PER_COMPANY = 50
+
+
+def write_cached(cache: Path, url: str, content: str, content_type: str) -> int:
+    response: DownloadResponse = {
+        "url": url,
+        "status_code": 200,
+        "content": content,
+        "content_type": content_type,
+        "last_modified": "",
+    }
+    path = cache / url.split("/", 3)[3]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _ = path.write_bytes(encode_cache_entry(response, "gzip"))
+    return len(content)
+
+
+def make_cache(cache: Path, documents: int, size: int) -> int:
+    """Cached submissions and documents, a few with a rare phrase in them"""
+    rng = random.Random(0)
+    total = 0
+    for cik in range(1, documents // FILINGS_PER_COMPANY + 1):
+        submissions = make_submissions_json(rng, cik, FILINGS_PER_COMPANY)
+        url = f"{DATA_SEC_URL}/submissions/CIK{cik:010d}.json"
+        _ = write_cached(cache, url, submissions, "application/json")
+        recent = cast(SubmissionsJSON, json.loads(submissions))["filings"]["recent"]
+        for accession_number, document in zip(
+            recent["accessionNumber"], recent["primaryDocument"]
+        ):
+            html = make_filing_html(rng, size)
+            if rng.random() < 0.001:
+                html += "<p>There is substantial doubt about our ability.</p>"
+            url = (
+                f"{SEC_URL}/Archives/edgar/data/{cik}/"
+                + f"{accession_number.replace('-', '')}/{document}"
+            )
+            total += write_cached(cache, url, html, "text/html")
+    return total
+
+
+async def time_search(index: TextIndex, label: str, query: str, **filters: object):
+    timings: list[float] = []
+    found = 0
+    for _ in range(5):
+        started = time.perf_counter()
+        found = len(await index.search_async(query, **filters))  # pyright: ignore[reportArgumentType]
+        timings.append(time.perf_counter() - started)
+    print(f"{label:<32}{statistics.median(timings) * 1e3:>9.1f} ms  {found} filings")
+
+
+async def main_async(documents: int, size: int, workers: int | None):
+    with tempfile.TemporaryDirectory() as directory:
+        cache = Path(directory, "cache")
+        total = make_cache(cache, documents, size)
+        print(f"cache: {documents:,} documents, {total / 1e6:.0f} MB of HTML")
+
+        index = TextIndex(f"{directory}/text_index.sqlite")
+        stats = await index.index_cache_directory_async(str(cache), workers)
+        database = sum(
+            path.stat().st_size for path in Path(directory).glob("text_index.sqlite*")
+        )
+        print(
+            f"build: {stats['seconds']:.1f} s, "
+            + f"{stats['documents'] / stats['seconds']:,.0f} docs/s, "
+            + f"{total / stats['seconds'] / 1e6:.1f} MB/s, "
+            + f"index {database / 1e6:.0f} MB\n"
+        )
+
+        await time_search(index, "rare phrase", '"substantial doubt"')
+        await time_search(index, "common word, top 100", "liquidity")
+        await time_search(index, "common word, one company", "liquidity", cik=7)
+        await time_search(
+            index,
+            "common word, 8-K in a quarter",
+            "liquidity",
+            form="8-K",
+            start_date="2025-04-01",
+            end_date="2025-06-30",
+        )
+        await index.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--documents", type=int, default=100_000)
+    _ = parser.add_argument("--size", type=int, default=3_000)
+    _ = parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main_async(
+            cast(int, args.documents),
+            cast(int, args.size),
+            cast(int | None, args.workers),
+        )
+    )
@@ -0,0 +1,154 @@
+"""
+Start up and lookup latency of the persisted TickerIndex versus parsing the
+ticker file into dicts on every refresh, plus an incremental update against a
+full rebuild.
+
+    python -m benchmarks.bench_ticker_index --companies 10000
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from typing import Final, cast
+
+from src.sec_api.cache_format import CacheMetadata
+from src.sec_api.cik import (
+    CompanyTickersExchangeDecoder,
+    structure_company_exchange_json,
+    to_company_ticker_exchange,
+)
+from src.sec_api.ticker_index import CompanyTickerExchange, TickerIndex
+
+from .payloads import make_company_tickers_exchange_json
+
+SYLLABLES: Final = [
+    "ab",
+    "ac",
+    "al",
+    "am",
+    "an",
+    "ar",
+    "at",
+    "be",
+    "bio",
+    "co",
+    "de",
+    "di",
+    "ex",
+    "fi",
+    "ge",
+    "in",
+    "la",
+    "lo",
+    "ma",
+    "me",
+    "mi",
+    "ne",
+    "no",
+    "on",
+    "or",
+    "pa",
+    "pro",
+    "ra",
+    "re",
+    "ri",
+    "sa",
+    "se",
+    "so",
+    "ta",
+    "te",
+    "tec",
+    "tri",
+    "un",
+    "ve",
+    "vi",
+]
+SUFFIXES: Final = ["Inc", "Corp", "Holdings Inc", "Group Ltd", "Trust", "Bancorp", "Co"]
+
+
+def make_name(rng: random.Random) -> str:
+    """A company name more varied than the payloads' word list"""
+    words = [
+        "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).title()
+        for _ in range(rng.randint(1, 3))
+    ]
+    return " ".join([*words, rng.choice(SUFFIXES)])
+
+
+METADATA: CacheMetadata = {
+    "url": "https://www.sec.gov/files/company_tickers_exchange.json",
+    "status_code": 200,
+    "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+    "content_type": "application/json",
+    "fetched_at": 1704067200.0,
+}
+
+
+def timed(label: str, fn: Callable[[], object], repeat: int = 1, unit: str = "ms"):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        _ = fn()
+    elapsed = (time.perf_counter() - started) / repeat
+    value = elapsed * 1e3 if unit == "ms" else elapsed * 1e6
+    print(f"{label:<34}{value:>10.2f} {unit}")
+
+
+def main(companies: int):
+    rng = random.Random(0)
+    content = make_company_tickers_exchange_json(rng, companies)
+    rows = [
+        to_company_ticker_exchange(row)
+        for row in CompanyTickersExchangeDecoder(content)["data"]
+    ]
+    for row in rows:
+        row["name"] = make_name(rng)
+    index = TickerIndex(rows, METADATA)
+    encoded = index.encode()
+    print(
+        f"ticker file {len(content) / 1e3:.0f} kB, index {len(encoded) / 1e3:.0f} kB\n"
+    )
+
+    timed(
+        "parse + dicts (before)",
+        lambda: structure_company_exchange_json(CompanyTickersExchangeDecoder(content)),
+        repeat=10,
+    )
+    timed("parse + build index", lambda: TickerIndex(rows, METADATA), repeat=10)
+    timed("load persisted index", lambda: TickerIndex.decode(encoded), repeat=10)
+
+    listed: list[CompanyTickerExchange] = [
+        {
+            "cik": 900_000 + i,
+            "name": f"New Listing {i} Corp",
+            "ticker": f"NEW{i}",
+            "exchange": None,
+        }
+        for i in range(len(rows) // 100)
+    ]
+    changed = rows[: len(rows) * 99 // 100] + listed
+    updated = TickerIndex(rows, METADATA)
+    started = time.perf_counter()
+    added, removed = updated.update(changed, METADATA)
+    print(
+        f"{'incremental update (1% changed)':<34}"
+        + f"{(time.perf_counter() - started) * 1e3:>10.2f} ms (+{added} -{removed})"
+    )
+    print()
+
+    tickers = [row["ticker"] for row in rng.sample(rows, 1000)]
+    names = [row["name"] for row in rng.sample(rows, 100)]
+    timed("exact ticker", lambda: [index.get_by_ticker(t) for t in tickers], 10)
+    timed("prefix (3 chars)", lambda: [index.find_prefix(n[:3]) for n in names], 10)
+    # Drop a letter from each name, as a typo would
+    typos = [n[:4] + n[5:] for n in names]
+    timed("fuzzy (typo)", lambda: [index.find_fuzzy(n) for n in typos], 1)
+    timed("search (typo)", lambda: [index.search(n) for n in typos], 1)
+    print("(lookup rows: per batch of 1000 exact, 100 prefix or fuzzy queries)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--companies", type=int, default=10_000)
+    args = parser.parse_args()
+    main(cast(int, args.companies))
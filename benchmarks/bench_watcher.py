@@ -0,0 +1,91 @@
+"""
+Cost of a poll of the daily index for new filings of a watched portfolio:
+catching up on several days, a poll with nothing new, and one new day, in
+requests and time, against re-pulling each watched company's submissions.
+
+    python -m benchmarks.bench_watcher --filings 6000 --watched 500
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import tempfile
+import time
+from datetime import date
+from typing import cast
+
+from src.sec_api import watcher
+from src.sec_api.downloader_local import LocalCacheDownloader
+from src.sec_api.freshness import PatternFreshnessPolicy
+from src.sec_api.watcher import FilingsWatcher
+
+from .payloads import make_master_index
+from .server import StandInServer
+
+DAYS = [date(2024, 2, day) for day in (12, 13, 14, 15, 16)]
+
+
+async def main_async(filings: int, watched: int):
+    rng = random.Random(0)
+    indexes = {
+        f"{day:%Y%m%d}": make_master_index(rng, 2024, 1, filings) for day in DAYS
+    }
+    ciks = {
+        int(line.split(b"|", 1)[0])
+        for index in indexes.values()
+        for line in index.splitlines()[11:]
+    }
+    watched_ciks = rng.sample(sorted(ciks), min(watched, len(ciks)))
+    published = {"through": "20240214"}
+
+    def payload(path: str) -> bytes | None:
+        match = re.search(r"master\.(\d{8})\.idx$", path)
+        if match is None or match[1] > published["through"]:
+            return None
+        return indexes[match[1]]
+
+    watcher.get_today = lambda: DAYS[-1]
+    with (
+        StandInServer(payload=payload) as server,
+        tempfile.TemporaryDirectory() as directory,
+    ):
+        async with LocalCacheDownloader(
+            user_agent="benchmark",
+            cache_directory=directory,
+            rate_per_second=10_000,
+            # Every poll revalidates, as polls come after the index's lifetime
+            freshness_policy=PatternFreshnessPolicy(rules=[]),
+        ) as downloader:
+            filings_watcher = FilingsWatcher(
+                downloader,
+                watched_ciks,
+                state_path=f"{directory}/watcher.json",
+                since=DAYS[0].isoformat(),
+                base_url=f"{server.url}/daily-index",
+            )
+
+            for label in ("catch up 3 days", "nothing new", "one new day"):
+                if label == "one new day":
+                    published["through"] = "20240215"
+                requests = server.requests
+                started = time.perf_counter()
+                entries = await filings_watcher.poll_async()
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{label:<16} requests={server.requests - requests} "
+                    + f"elapsed={elapsed * 1e3:7.1f} ms new={len(entries)}"
+                )
+
+    print(
+        f"\nsubmissions crawl: {len(watched_ciks)} requests per poll, "
+        + f"at least {len(watched_ciks) / 10:.0f} s at 10 req/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--filings", type=int, default=6000)
+    _ = parser.add_argument("--watched", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main_async(cast(int, args.filings), cast(int, args.watched)))
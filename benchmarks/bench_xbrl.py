@@ -0,0 +1,99 @@
+"""
+Ingest rate of a bulk `companyfacts.zip` into the columnar facts store, and
+the latency of a cross-sectional query (one concept of every filer in one
+quarter) against scanning the parsed JSON of each company.
+
+    python -m benchmarks.bench_xbrl --companies 1000 --concepts 100
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import cast
+
+from src.sec_api.facts_store import FactsStore
+from src.sec_api.xbrl import CompanyFactsJSON
+
+from .payloads import make_company_facts_json
+
+
+def scan_archive(archive: Path) -> list[float]:
+    """The query the way it runs without a store: parse every company"""
+    values: list[float] = []
+    with zipfile.ZipFile(archive) as zf:
+        for name in zf.namelist():
+            data = cast(CompanyFactsJSON, json.loads(zf.read(name)))
+            for fact in data["facts"]["us-gaap"]["Revenues"]["units"]["USD"]:
+                if fact.get("frame") == "CY2024Q1":
+                    values.append(fact["val"])
+    return values
+
+
+async def main_async(companies: int, concepts: int, workers: int | None):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        archive = Path(directory, "companyfacts.zip")
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            for cik in range(1, companies + 1):
+                zf.writestr(
+                    f"CIK{cik:010d}.json", make_company_facts_json(rng, cik, concepts)
+                )
+        print(f"archive: {companies} companies, {archive.stat().st_size / 1e6:.1f} MB")
+
+        store = FactsStore(str(Path(directory, "companyfacts")))
+        stats = await store.ingest_archive_async(archive, workers)
+        size = sum(p.stat().st_size for p in Path(directory, "companyfacts").iterdir())
+        print(
+            f"ingest: {stats['facts']:,} facts in {stats['seconds']:.1f}s, "
+            + f"{stats['facts'] / stats['seconds']:,.0f} facts/s, "
+            + f"{stats['segments']} segments, {size / 1e6:.1f} MB\n"
+        )
+
+        started = time.perf_counter()
+        values = scan_archive(archive)
+        elapsed = time.perf_counter() - started
+        print(f"{'scan parsed JSON':<22}{elapsed * 1e3:>10.1f} ms  {len(values)} facts")
+
+        for label in ("query (first, maps)", "query"):
+            started = time.perf_counter()
+            frame = await store.get_frame_async(
+                "us-gaap", "Revenues", "USD", "CY2024Q1"
+            )
+            elapsed = time.perf_counter() - started
+            print(f"{label:<22}{elapsed * 1e3:>10.1f} ms  {len(frame)} facts")
+
+        started = time.perf_counter()
+        rows = 0
+        for _ in range(10):
+            tag = f"Concept{rng.randint(1, concepts - 1):04d}"
+            rows += len(await store.query_async(f"us-gaap:{tag}"))
+        elapsed = (time.perf_counter() - started) / 10
+        print(
+            f"{'concept, all periods':<22}{elapsed * 1e3:>10.1f} ms  {rows // 10} facts"
+        )
+        await store.aclose()
+
+    print(
+        f"\nfrom the companyfacts API: {companies} requests, "
+        + f"at least {companies / 10:.0f} s at 10 req/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    _ = parser.add_argument("--companies", type=int, default=1000)
+    _ = parser.add_argument("--concepts", type=int, default=100)
+    _ = parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(
+        main_async(
+            cast(int, args.companies),
+            cast(int, args.concepts),
+            cast(int | None, args.workers),
+        )
+    )
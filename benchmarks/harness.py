@@ -0,0 +1,212 @@
+"""
+Measurement for end-to-end benchmarks against the stand-in server: a limiter
+that times its waits, a downloader wrapper that times each call and sends
+SEC URLs to the server, and scenario results written out as JSON so runs can
+be compared over time
+"""
+
+import json
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TypedDict, cast, override
+
+from pyrate_limiter import BucketAsyncWrapper, Duration, InMemoryBucket, Limiter, Rate
+
+from src.sec_api.constants import DATA_SEC_URL, SEC_URL
+from src.sec_api.typings import DownloadResponse, IDownloader
+
+from .server import StandInServer
+
+
+class TimedLimiter(Limiter):
+    """The downloaders' default in-memory limiter, adding up time spent waiting"""
+
+    waited: float
+    acquired: int
+
+    def __init__(self, rate_per_second: int):
+        super().__init__(
+            BucketAsyncWrapper(
+                InMemoryBucket([Rate(rate_per_second, Duration.SECOND)])
+            ),
+            raise_when_fail=False,
+            max_delay=Duration.MINUTE,
+            retry_until_max_delay=True,
+        )
+        self.waited = 0.0
+        self.acquired = 0
+
+    @override
+    async def try_acquire_async(self, name: str, weight: int = 1) -> bool:
+        started = time.perf_counter()
+        try:
+            return await super().try_acquire_async(name, weight)
+        finally:
+            self.waited += time.perf_counter() - started
+            self.acquired += 1
+
+
+class RecordingDownloader(IDownloader):
+    """Times every call to `downloader`, with SEC hosts swapped for `base_url`"""
+
+    latencies: list[float]
+    _downloader: IDownloader
+    _base_url: str
+
+    def __init__(self, downloader: IDownloader, base_url: str):
+        self.latencies = []
+        self._downloader = downloader
+        self._base_url = base_url
+
+    @override
+    async def get_url_async(self, url: str) -> DownloadResponse:
+        started = time.perf_counter()
+        try:
+            return await self._downloader.get_url_async(self._rewrite(url))
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    @override
+    async def get_parsed_async[T](self, url: str, parser: Callable[[str], T]) -> T:
+        started = time.perf_counter()
+        try:
+            return await self._downloader.get_parsed_async(self._rewrite(url), parser)
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+    def _rewrite(self, url: str) -> str:
+        for host in (SEC_URL, DATA_SEC_URL):
+            if url.startswith(host):
+                return self._base_url + url[len(host) :]
+        return url
+
+
+class ScenarioResult(TypedDict):
+    scenario: str
+    downloader: str
+    calls: int
+    seconds: float
+    calls_per_second: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    limiter_wait_seconds: float
+    # Requests reaching the server, retries of throttled ones included
+    requests: int
+    not_modified: int
+    throttled: int
+    # Calls answered without the server sending the content
+    cache_hit_ratio: float
+    peak_memory_mib: float
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile, 0 for no values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def measure_async(
+    scenario: str,
+    downloader: str,
+    run: Callable[[], Awaitable[object]],
+    *,
+    server: StandInServer,
+    recorder: RecordingDownloader,
+    limiter: TimedLimiter,
+) -> ScenarioResult:
+    recorder.latencies.clear()
+    limiter.waited = 0.0
+    requests, ok = server.requests, server.ok
+    not_modified, throttled = server.not_modified, server.throttled
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        _ = await run()
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    calls = len(recorder.latencies)
+    downloaded = min(calls, server.ok - ok)
+    return {
+        "scenario": scenario,
+        "downloader": downloader,
+        "calls": calls,
+        "seconds": round(seconds, 4),
+        "calls_per_second": round(calls / seconds, 2),
+        "latency_p50_ms": round(percentile(recorder.latencies, 50) * 1e3, 3),
+        "latency_p99_ms": round(percentile(recorder.latencies, 99) * 1e3, 3),
+        "limiter_wait_seconds": round(limiter.waited, 4),
+        "requests": server.requests - requests,
+        "not_modified": server.not_modified - not_modified,
+        "throttled": server.throttled - throttled,
+        "cache_hit_ratio": round(1 - downloaded / calls, 4) if calls else 0.0,
+        "peak_memory_mib": round(peak / 2**20, 2),
+    }
+
+
+def print_result(result: ScenarioResult):
+    print(
+        f"{result['scenario']:<26}{result['downloader']:<8}"
+        + f"{result['calls']:>6} calls {result['seconds']:>7.2f} s "
+        + f"p50={result['latency_p50_ms']:>7.1f} ms "
+        + f"p99={result['latency_p99_ms']:>7.1f} ms "
+        + f"limiter={result['limiter_wait_seconds']:>6.2f} s "
+        + f"hits={result['cache_hit_ratio']:>5.0%} "
+        + f"304={result['not_modified']:<4} 429={result['throttled']:<3} "
+        + f"peak={result['peak_memory_mib']:>6.1f} MiB"
+    )
+
+
+def get_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(
+    path: str, parameters: dict[str, object], results: list[ScenarioResult]
+):
+    report = {
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "revision": get_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+    _ = Path(path).write_text(json.dumps(report, indent=2) + "\n")
+
+
+def compare_results(path: str, results: list[ScenarioResult]):
+    """Prints how each scenario moved against an earlier run's JSON"""
+    earlier = cast(list[ScenarioResult], json.loads(Path(path).read_text())["results"])
+    baseline = {
+        (result["scenario"], result["downloader"]): result for result in earlier
+    }
+    for result in results:
+        before = baseline.get((result["scenario"], result["downloader"]))
+        if before is None:
+            continue
+        changes = "  ".join(
+            f"{key}={(result[key] - before[key]) / before[key]:+.0%}"
+            for key in ("seconds", "latency_p99_ms", "peak_memory_mib")
+            if before[key]
+        )
+        print(f"{result['scenario']:<26}{result['downloader']:<8}{changes}")
@@ -0,0 +1,231 @@
+"""
+Deterministic synthetic SEC payloads with realistic shapes and sizes
+"""
+
+import json
+import random
+from datetime import date, timedelta
+from typing import Final
+
+FORMS: Final = ["10-K", "10-Q", "8-K", "4", "3", "424B2", "S-8", "SC 13G/A", "DEF 14A"]
+# Form 4s dominate most filers' histories
+FORM_WEIGHTS: Final = [2, 6, 12, 60, 3, 8, 2, 4, 3]
+
+WORDS: Final = [
+    "revenue",
+    "income",
+    "net",
+    "operating",
+    "segment",
+    "risk",
+    "factors",
+    "liquidity",
+    "capital",
+    "management",
+    "discussion",
+    "analysis",
+    "results",
+    "quarter",
+    "fiscal",
+    "year",
+    "ended",
+    "company",
+    "financial",
+    "statements",
+    "consolidated",
+    "assets",
+    "liabilities",
+    "equity",
+    "cash",
+    "flows",
+    "market",
+    "interest",
+    "rate",
+    "exposure",
+    "tax",
+    "provision",
+    "goodwill",
+    "impairment",
+    "lease",
+]
+
+
+def make_words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(WORDS, k=count))
+
+
+def make_filing_html(rng: random.Random, size: int) -> str:
+    """An HTML document of roughly `size` bytes, with items, tables and iXBRL"""
+    parts = ["<html><head><style>td{padding:2px}</style></head><body>"]
+    item = 0
+    while sum(map(len, parts)) < size:
+        if rng.random() < 0.05:
+            item += 1
+            parts.append(f"<h2>Item {item}. {make_words(rng, 4).title()}</h2>")
+        if rng.random() < 0.3:
+            rows = "".join(
+                f"<tr><td>{make_words(rng, 3)}</td><td>"
+                + '<ix:nonFraction name="us-gaap:Revenues" unitRef="usd">'
+                + f"{rng.randint(1_000, 9_999_999):,}</ix:nonFraction></td></tr>"
+                for _ in range(rng.randint(3, 12))
+            )
+            parts.append(f'<table border="1">{rows}</table>')
+        parts.append(f"<p>{make_words(rng, rng.randint(40, 160))}</p>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def make_recent_filings(
+    rng: random.Random, cik: int, count: int
+) -> dict[str, list[object]]:
+    columns: dict[str, list[object]] = {
+        "accessionNumber": [],
+        "filingDate": [],
+        "reportDate": [],
+        "acceptanceDateTime": [],
+        "act": [],
+        "form": [],
+        "fileNumber": [],
+        "filmNumber": [],
+        "items": [],
+        "core_type": [],
+        "size": [],
+        "isXBRL": [],
+        "isInlineXBRL": [],
+        "primaryDocument": [],
+        "primaryDocDescription": [],
+    }
+
+    filed = date(2025, 6, 30)
+    for i in range(count):
+        filed -= timedelta(days=rng.randint(0, 3))
+        report = filed - timedelta(days=rng.randint(0, 45))
+        form = rng.choices(FORMS, FORM_WEIGHTS)[0]
+        columns["accessionNumber"].append(f"{cik:010d}-{filed.year % 100:02d}-{i:06d}")
+        columns["filingDate"].append(filed.isoformat())
+        columns["reportDate"].append(report.isoformat())
+        columns["acceptanceDateTime"].append(
+            f"{filed.isoformat()}T16:{i % 60:02d}:00.000Z"
+        )
+        columns["act"].append("34")
+        columns["form"].append(form)
+        columns["fileNumber"].append(f"001-{cik % 100000:05d}")
+        columns["filmNumber"].append(str(20_000_000 + i))
+        columns["items"].append("2.02,9.01" if form == "8-K" else "")
+        columns["core_type"].append(form)
+        columns["size"].append(rng.randint(5_000, 5_000_000))
+        columns["isXBRL"].append(int(form in ("10-K", "10-Q")))
+        columns["isInlineXBRL"].append(int(form in ("10-K", "10-Q")))
+        columns["primaryDocument"].append(f"doc{i}.htm")
+        columns["primaryDocDescription"].append(form)
+
+    return columns
+
+
+def make_submissions_json(
+    rng: random.Random, cik: int, recent: int = 1000, files: int = 0
+) -> str:
+    """`submissions/CIK##########.json`, SEC caps `recent` at 1000 filings"""
+    return json.dumps(
+        {
+            "cik": str(cik),
+            "name": make_words(rng, 3).upper(),
+            "tickers": [],
+            "filings": {
+                "recent": make_recent_filings(rng, cik, recent),
+                "files": [
+                    {
+                        "name": f"CIK{cik:010d}-submissions-{page:03d}.json",
+                        "filingCount": 1000,
+                        "filingFrom": f"{2000 + page}-01-01",
+                        "filingTo": f"{2000 + page}-12-31",
+                    }
+                    for page in range(1, files + 1)
+                ],
+            },
+        }
+    )
+
+
+def make_company_tickers_exchange_json(rng: random.Random, count: int = 10_000) -> str:
+    """`company_tickers_exchange.json`, which lists ~10k companies"""
+    exchanges = ["Nasdaq", "NYSE", "OTC", "CBOE", None]
+    data = [
+        [
+            100_000 + i,
+            f"{make_words(rng, 2).title()} Inc",
+            f"T{i:04d}",
+            rng.choice(exchanges),
+        ]
+        for i in range(count)
+    ]
+    return json.dumps({"fields": ["cik", "name", "ticker", "exchange"], "data": data})
+
+
+def make_submissions_page_json(rng: random.Random, cik: int, count: int = 1000) -> str:
+    """`submissions/CIK##########-submissions-###.json`, columns only"""
+    return json.dumps(make_recent_filings(rng, cik, count))
+
+
+def make_master_index(
+    rng: random.Random, year: int, quarter: int, count: int = 400_000
+) -> bytes:
+    """`full-index/YYYY/QTRn/master.idx`, which lists ~300-400k filings"""
+    header = (
+        "Description:           Master Index of EDGAR Dissemination Feed\n"
+        + f"Last Data Received:    {year}-{quarter * 3:02d}-28\n"
+        + "Comments:              webmaster@sec.gov\n"
+        + "Anonymous FTP:         ftp://ftp.sec.gov/edgar/\n\n\n\n\n"
+        + "CIK|Company Name|Form Type|Date Filed|Filename\n"
+        + "-" * 80
+        + "\n"
+    )
+    start = date(year, quarter * 3 - 2, 1)
+    ciks = [rng.randint(1_000, 2_000_000) for _ in range(count // 20)]
+    names = {cik: f"{make_words(rng, 2).upper()} INC" for cik in ciks}
+    lines: list[str] = []
+    for i in range(count):
+        cik = rng.choice(ciks)
+        form = rng.choices(FORMS, FORM_WEIGHTS)[0]
+        filed = start + timedelta(days=rng.randint(0, 89))
+        accession = f"{rng.randint(1, 1_999_999):010d}-{year % 100:02d}-{i:06d}"
+        lines.append(
+            f"{cik}|{names[cik]}|{form}|{filed.isoformat()}|"
+            + f"edgar/data/{cik}/{accession}.txt\n"
+        )
+    return (header + "".join(lines)).encode("latin-1")
+
+
+def make_company_facts_json(
+    rng: random.Random, cik: int, concepts: int = 100, years: int = 4
+) -> str:
+    """`api/xbrl/companyfacts/CIK##########.json`, quarterly facts per concept"""
+    facts: dict[str, dict[str, object]] = {}
+    for c in range(concepts):
+        values: list[dict[str, object]] = []
+        for year in range(2025 - years, 2025):
+            for quarter in range(1, 5):
+                end = date(year, quarter * 3, 28)
+                filed = end + timedelta(days=rng.randint(25, 45))
+                values.append(
+                    {
+                        "start": date(year, quarter * 3 - 2, 1).isoformat(),
+                        "end": end.isoformat(),
+                        "val": rng.randint(-1_000_000, 50_000_000_000),
+                        "accn": f"{cik:010d}-{filed.year % 100:02d}-{quarter:06d}",
+                        "fy": year,
+                        "fp": f"Q{quarter}",
+                        "form": "10-Q",
+                        "filed": filed.isoformat(),
+                        "frame": f"CY{year}Q{quarter}",
+                    }
+                )
+        tag = "Revenues" if c == 0 else f"Concept{c:04d}"
+        facts[tag] = {"label": tag, "description": None, "units": {"USD": values}}
+    return json.dumps(
+        {
+            "cik": cik,
+            "entityName": f"{make_words(rng, 2).upper()} INC",
+            "facts": {"us-gaap": facts},
+        }
+    )
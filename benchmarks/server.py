@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Final, Self, override
+
+type PayloadFactory = Callable[[str], bytes | None]
+
+
+CONTENT_TYPES: Final = {
+    ".json": "application/json",
+    ".htm": "text/html",
+    ".html": "text/html",
+    ".idx": "text/plain",
+    ".txt": "text/plain",
+}
+
+
+def default_payload(path: str) -> bytes:
+    return f"<html><body>{path}</body></html>".encode()
+
+
+def get_content_type(path: str) -> str:
+    path = path.split("?", 1)[0]
+    suffix = path[path.rfind(".") :] if "." in path.rsplit("/", 1)[-1] else ""
+    return CONTENT_TYPES.get(suffix, "application/octet-stream")
+
+
+class StandInServer:
+    """Local HTTP/1.1 server that stands in for www.sec.gov / data.sec.gov"""
+
+    payload: PayloadFactory
+    latency: float
+    jitter: float
+    max_rate: float | None
+    retry_after: int | None
+    throttle_probability: float
+    last_modified: str
+    requests: int
+    connections: int
+    throttled: int
+    ok: int
+    not_modified: int
+    bytes_sent: int
+    _random: random.Random
+    _served_at: deque[float]
+    _lock: threading.Lock
+    _httpd: ThreadingHTTPServer
+    _thread: threading.Thread
+
+    def __init__(
+        self,
+        *,
+        payload: PayloadFactory = default_payload,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        max_rate: float | None = None,
+        retry_after: int | None = None,
+        throttle_probability: float = 0.0,
+        seed: int = 0,
+    ):
+        self.payload = payload
+        # Each response takes `latency` plus up to `jitter` seconds
+        self.latency = latency
+        self.jitter = jitter
+        # Answer 429 to requests over `max_rate` per second, like SEC does,
+        # and to a random `throttle_probability` share of the others
+        self.max_rate = max_rate
+        self.retry_after = retry_after
+        self.throttle_probability = throttle_probability
+        self.last_modified = formatdate(time.time() - 3600, usegmt=True)
+        self.requests = 0
+        self.connections = 0
+        self.throttled = 0
+        self.ok = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self._random = random.Random(seed)
+        self._served_at = deque()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _count(self, *, connection: bool = False):
+        with self._lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+
+    def _count_response(self, status: int, size: int):
+        with self._lock:
+            self.ok += status == 200
+            self.not_modified += status == 304
+            self.bytes_sent += size
+
+    def _get_delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def _is_throttled(self) -> bool:
+        if self.throttle_probability:
+            with self._lock:
+                if self._random.random() < self.throttle_probability:
+                    self.throttled += 1
+                    return True
+
+        if self.max_rate is None:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            while self._served_at and self._served_at[0] <= now - 1.0:
+                _ = self._served_at.popleft()
+
+            if len(self._served_at) >= self.max_rate:
+                self.throttled += 1
+                return True
+
+            self._served_at.append(now)
+            return False
+
+    def _make_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version: str = "HTTP/1.1"
+            disable_nagle_algorithm = True  # pyright: ignore[reportUnannotatedClassAttribute]
+
+            @override
+            def setup(self):
+                super().setup()
+                server._count(connection=True)
+
+            def do_GET(self):
+                server._count()
+
+                delay = server._get_delay()
+                if delay:
+                    time.sleep(delay)
+
+                body = server.payload(self.path)
+                if server._is_throttled():
+                    self._send(429, b"", retry_after=server.retry_after)
+                elif body is None:
+                    self._send(404, b"")
+                elif self.headers.get("If-Modified-Since") == server.last_modified:
+                    self._send(304, b"")
+                else:
+                    self._send(200, body)
+
+            def _send(self, status: int, body: bytes, retry_after: int | None = None):
+                server._count_response(status, len(body))
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 200:
+                    self.send_header("Content-Type", get_content_type(self.path))
+                if retry_after is not None:
+                    self.send_header("Retry-After", str(retry_after))
+                self.send_header("Last-Modified", server.last_modified)
+                self.end_headers()
+                _ = self.wfile.write(body)
+
+            @override
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        return Handler
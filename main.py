@@ -1,13 +1,26 @@
 import asyncio
 import logging
 import os
+import weakref
+from collections.abc import AsyncGenerator, Iterable
+from datetime import UTC, datetime
+from functools import partial
 
 from dotenv import load_dotenv
 
+from src.sec_api.batch import BatchResult, iter_filings_async
 from src.sec_api.cik import CentralIndexKey
 from src.sec_api.company import Company
+from src.sec_api.downloader_base import BaseDownloader
 from src.sec_api.downloader_local import LocalCacheDownloader
-from src.sec_api.typings import IDownloader
+from src.sec_api.facts_store import FactsStore
+from src.sec_api.filings_store import FilingsStore
+from src.sec_api.full_index import FullIndexStore, IndexEntry, get_quarters
+from src.sec_api.scheduler import FetchScheduler, Priority
+from src.sec_api.text_index import TextIndex
+from src.sec_api.typings import DateField, Filing, Form, IDownloader, Quarter
+from src.sec_api.utils import get_end_date, get_start_date
+from src.sec_api.xbrl import FactsTable, XbrlClient
 
 _ = load_dotenv()
 
@@ -21,10 +34,36 @@ logging.basicConfig(
 class Edgar:
     _downloader: IDownloader
     _indexer: CentralIndexKey
-
-    def __init__(self, *, downloader: IDownloader):
+    _scheduler: FetchScheduler
+    _store: FilingsStore | None
+    _full_index: FullIndexStore | None
+    _facts: FactsStore | None
+    _text_index: TextIndex | None
+    _xbrl: XbrlClient
+    _companies: weakref.WeakValueDictionary[int, Company]
+
+    def __init__(
+        self,
+        *,
+        downloader: IDownloader,
+        indexer: CentralIndexKey | None = None,
+        scheduler: FetchScheduler | None = None,
+        store: FilingsStore | None = None,
+        full_index: FullIndexStore | None = None,
+        facts: FactsStore | None = None,
+        text_index: TextIndex | None = None,
+    ):
         self._downloader = downloader
-        self._indexer = CentralIndexKey(downloader)
+        self._indexer = indexer or CentralIndexKey(downloader)
+        self._scheduler = scheduler or FetchScheduler()
+        self._store = store
+        self._full_index = full_index
+        # Facts ingested from the bulk archive, read instead of the frames API
+        self._facts = facts
+        self._text_index = text_index
+        self._xbrl = XbrlClient(downloader)
+        # Companies in use, so their submissions are loaded and parsed once
+        self._companies = weakref.WeakValueDictionary()
 
     async def get_company_async(
         self, *, cik: int | None = None, ticker: str | None = None
@@ -35,7 +74,154 @@ class Edgar:
         if cik is None:
             return None
 
-        return Company(cik=cik, downloader=self._downloader)
+        return self._get_company(cik)
+
+    async def get_companies_async(
+        self, tickers: Iterable[str]
+    ) -> dict[str, Company | None]:
+        """Companies by ticker, all resolved against one load of the index"""
+        index = await self._indexer.get_index_async()
+        companies: dict[str, Company | None] = {}
+        for ticker in tickers:
+            co = index.get_by_ticker(ticker)
+            companies[ticker] = None if co is None else self._get_company(co["cik"])
+        return companies
+
+    async def iter_filings_async(
+        self,
+        companies: Iterable[Company],
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        form: Form | None = None,
+        year: int | None = None,
+        quarter: Quarter | None = None,
+        force: bool | None = None,
+        date_field: DateField = "reportDate",
+        documents: bool = True,
+        priority: Priority = Priority.BACKGROUND,
+    ) -> AsyncGenerator[BatchResult]:
+        """
+        Yields the matching filings of every company, with their primary
+        documents unless `documents` is false, as they arrive. Submissions and
+        documents of all the companies are fetched as one pipeline under the
+        shared scheduler, so a batch is paced by the rate limit alone.
+        """
+        list_filings = partial(
+            Company.get_filing_details_async,
+            start_date=start_date,
+            end_date=end_date,
+            form=form,
+            year=year,
+            quarter=quarter,
+            force=force,
+            date_field=date_field,
+            priority=priority,
+        )
+        results = iter_filings_async(
+            companies,
+            list_filings,
+            self._scheduler,
+            documents=documents,
+            priority=priority,
+        )
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+    async def search_companies_async(self, query: str, limit: int = 10):
+        return await self._indexer.search_async(query, limit)
+
+    async def get_index_entries_async(
+        self,
+        *,
+        form: Form | None = None,
+        cik: int | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        year: int | None = None,
+        quarter: Quarter | None = None,
+        limit: int | None = None,
+    ) -> list[IndexEntry]:
+        """
+        Filings of every company filed between `start_date` and `end_date`
+        (inclusive), newest first, from EDGAR's quarterly full index. Only
+        the index files of the quarters in range are downloaded, once.
+        """
+        if self._full_index is None:
+            raise ValueError("Edgar needs a full_index store for index queries")
+        if not isinstance(self._downloader, BaseDownloader):
+            raise TypeError("Index queries need a downloader with a document store")
+
+        yyyy = None if year is None else str(year).rjust(4, "0")
+        start_date = get_start_date(start_date, yyyy, quarter)
+        end_date = get_end_date(end_date, yyyy, quarter)
+        if start_date is None:
+            raise ValueError("Index queries need a start_date or a year")
+        end_date = end_date or datetime.now(UTC).date().isoformat()
+
+        _ = await self._full_index.update_quarters_async(
+            self._downloader, get_quarters(start_date, end_date)
+        )
+        return await self._full_index.query_async(
+            form=form, cik=cik, start_date=start_date, end_date=end_date, limit=limit
+        )
+
+    async def search_documents_async(
+        self,
+        query: str,
+        *,
+        cik: int | None = None,
+        form: Form | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        year: int | None = None,
+        quarter: Quarter | None = None,
+        date_field: DateField = "filingDate",
+        limit: int = 100,
+    ) -> list[Filing]:
+        """Filings whose downloaded document matches the full-text `query`"""
+        if self._text_index is None:
+            raise ValueError("Edgar needs a text_index for document search")
+
+        yyyy = None if year is None else str(year).rjust(4, "0")
+        return await self._text_index.search_async(
+            query,
+            cik=cik,
+            form=form,
+            start_date=get_start_date(start_date, yyyy, quarter),
+            end_date=get_end_date(end_date, yyyy, quarter),
+            date_field=date_field,
+            limit=limit,
+        )
+
+    @property
+    def xbrl(self) -> XbrlClient:
+        return self._xbrl
+
+    async def get_frame_async(
+        self, taxonomy: str, tag: str, unit: str, period: str
+    ) -> FactsTable:
+        """
+        The concept's fact of every company for a calendar period, e.g.
+        `CY2024Q1`, from the local facts store when there is one
+        """
+        if self._facts is not None:
+            return await self._facts.get_frame_async(taxonomy, tag, unit, period)
+        return await self._xbrl.get_frame_async(taxonomy, tag, unit, period)
+
+    def _get_company(self, cik: int) -> Company:
+        company = self._companies.get(cik)
+        if company is None:
+            company = self._companies[cik] = Company(
+                cik=cik,
+                downloader=self._downloader,
+                scheduler=self._scheduler,
+                store=self._store,
+            )
+        return company
 
 
 async def main_async():
@@ -44,16 +230,21 @@ async def main_async():
     if user_agent is None:
         return print("missing user agent")
 
-    edgar = Edgar(downloader=LocalCacheDownloader(user_agent=user_agent))
+    async with LocalCacheDownloader(user_agent=user_agent) as downloader:
+        indexer = CentralIndexKey(downloader, index_path=".data/company_tickers.idx")
+        edgar = Edgar(downloader=downloader, indexer=indexer)
 
-    company = await edgar.get_company_async(ticker="ben")
+        try:
+            company = await edgar.get_company_async(ticker="ben")
 
-    if company is None:
-        return print("no company")
+            if company is None:
+                return print("no company")
 
-    documents = await company.get_primary_documents_async(
-        form="10-Q", year=2024, quarter=1
-    )
+            documents = await company.get_primary_documents_async(
+                form="10-Q", year=2024, quarter=1
+            )
+        finally:
+            await indexer.aclose()
 
     print(documents[0]["content"])
 
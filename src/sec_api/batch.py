@@ -0,0 +1,123 @@
+"""
+Filings of many companies, listed and downloaded as one pipeline
+
+Listing a company's filings and downloading their documents are queued on the
+same `FetchScheduler`, so submissions of the next companies are fetched while
+documents of the companies already listed download, and every request draws
+from one concurrency and rate budget.
+"""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable
+from functools import partial
+from typing import Final, NotRequired, TypedDict
+
+import httpx
+
+from .company import Company
+from .scheduler import FetchScheduler, Priority
+from .typings import DownloadResponse, Filing
+
+# What one company or filing can fail with without stopping the batch:
+# network and HTTP status errors, cache I/O, and payloads that do not parse
+FETCH_ERRORS: Final = (httpx.HTTPError, OSError, ValueError)
+
+
+class BatchResult(TypedDict):
+    """
+    One filing, with its primary document when documents are fetched, or the
+    error getting it. A company whose filings could not be listed gives one
+    result with `error` and no `filing`.
+    """
+
+    cik: str
+    filing: NotRequired[Filing]
+    document: NotRequired[DownloadResponse]
+    error: NotRequired[BaseException]
+
+
+type Listed = tuple[Company, list[Filing] | Exception]
+
+
+async def iter_filings_async(
+    companies: Iterable[Company],
+    list_filings: Callable[[Company], Awaitable[list[Filing]]],
+    scheduler: FetchScheduler,
+    *,
+    documents: bool = True,
+    priority: Priority = Priority.BACKGROUND,
+    window: int | None = None,
+) -> AsyncGenerator[BatchResult]:
+    """
+    Yields the filings `list_filings` gives for each company, with their
+    primary documents unless `documents` is false, in completion order.
+    At most `window` companies (default: the scheduler's concurrency cap) are
+    listed at once, and more are only listed while fewer than `window`
+    filings wait for their documents, so memory stays flat however many
+    companies there are.
+    """
+    window = window or scheduler.max_concurrency
+    iterator = iter(companies)
+    # Filings listed, waiting for a document download to start
+    backlog: deque[tuple[Company, Filing]] = deque()
+    pending: set[asyncio.Task[Listed | BatchResult]] = set()
+    listing = fetching = 0
+
+    async def list_one(company: Company) -> Listed:
+        try:
+            return company, await list_filings(company)
+        except FETCH_ERRORS as error:
+            return company, error
+
+    async def fetch_one(company: Company, filing: Filing) -> BatchResult:
+        result = BatchResult(cik=company.cik, filing=filing)
+        try:
+            result["document"] = await scheduler.run(
+                partial(company.get_primary_document_async, filing), priority
+            )
+        except FETCH_ERRORS as error:
+            result["error"] = error
+        return result
+
+    try:
+        while True:
+            # Documents of companies already listed go first
+            while backlog and fetching < window:
+                pending.add(asyncio.create_task(fetch_one(*backlog.popleft())))
+                fetching += 1
+            while listing < window and len(backlog) < window:
+                company = next(iterator, None)
+                if company is None:
+                    break
+                pending.add(asyncio.create_task(list_one(company)))
+                listing += 1
+
+            if not pending:
+                return
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                result = task.result()
+                if not isinstance(result, tuple):
+                    fetching -= 1
+                    yield result
+                    continue
+
+                listing -= 1
+                company, filings = result
+                if isinstance(filings, Exception):
+                    yield {"cik": company.cik, "error": filings}
+                elif documents:
+                    backlog.extend((company, filing) for filing in filings)
+                else:
+                    for filing in filings:
+                        yield {"cik": company.cik, "filing": filing}
+    finally:
+        # The consumer stopped early, do not leave fetches running
+        for task in pending:
+            _ = task.cancel()
+        if pending:
+            _ = await asyncio.gather(*pending, return_exceptions=True)
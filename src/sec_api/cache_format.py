@@ -0,0 +1,236 @@
+"""
+On-disk cache entry format
+
+    MAGIC (4 bytes) | header length (4 bytes, big endian) | header | body
+
+The header is a small JSON object (see `CacheHeader`), the body is the raw
+content bytes, compressed as recorded in the header. Deciding whether a cached
+copy is fresh only needs the header, so the body is decompressed lazily.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Final, Literal, NotRequired, TypedDict, cast
+
+from .fileio import read_bytes, write_bytes_atomic
+from .json_decoder import JsonDecoder
+from .typings import DownloadResponse
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+type Compression = Literal["gzip", "zstd", "identity"]
+
+MAGIC: Final = b"SEC\x01"
+
+_HEADER_LENGTH: Final = struct.Struct(">I")
+_PREAMBLE_SIZE: Final = len(MAGIC) + _HEADER_LENGTH.size
+
+# Enough to hold the preamble and any realistic header in a single read
+HEADER_READ_SIZE: Final = 4096
+
+# Under a cache directory but not cache entries: documents streamed to disk,
+# then the sidecars of documents and of extracted text, and unfinished writes
+DOCUMENTS_DIRECTORY: Final = "documents"
+NOT_ENTRY_SUFFIXES: Final = (".meta.json", ".text.json", ".tmp")
+
+
+class CacheMetadata(TypedDict):
+    url: str
+    status_code: int
+    last_modified: str
+    content_type: str | None
+    fetched_at: NotRequired[float]
+
+
+class CacheHeader(CacheMetadata):
+    compression: Compression
+    # Of the uncompressed body
+    sha256: str
+    size: int
+
+
+CacheHeaderDecoder = JsonDecoder(CacheHeader)
+LegacyEntryDecoder = JsonDecoder(DownloadResponse)
+
+
+def compress(data: bytes, compression: Compression) -> bytes:
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the `zstandard` package")
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def decompress(data: bytes | memoryview, compression: Compression) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the `zstandard` package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return bytes(data)
+
+
+class CacheEntry:
+    header: CacheHeader
+    _body: memoryview
+    _content: str | None = None
+
+    def __init__(self, header: CacheHeader, body: bytes | memoryview):
+        self.header = header
+        self._body = memoryview(body)
+
+    @property
+    def compressed_body(self) -> memoryview:
+        return self._body
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            data = decompress(self._body, self.header["compression"])
+            self._content = data.decode("utf-8")
+        return self._content
+
+    def to_response(self) -> DownloadResponse:
+        response: DownloadResponse = {
+            "url": self.header["url"],
+            "status_code": self.header["status_code"],
+            "content": self.content,
+            "content_type": self.header["content_type"],
+            "last_modified": self.header["last_modified"],
+        }
+        if "fetched_at" in self.header:
+            response["fetched_at"] = self.header["fetched_at"]
+        return response
+
+
+def make_header(
+    response: CacheMetadata, body: bytes, compression: Compression
+) -> CacheHeader:
+    header: CacheHeader = {
+        "url": response["url"],
+        "status_code": response["status_code"],
+        "last_modified": response["last_modified"],
+        "content_type": response["content_type"],
+        "compression": compression,
+        "sha256": hashlib.sha256(body).hexdigest(),
+        "size": len(body),
+    }
+    if "fetched_at" in response:
+        header["fetched_at"] = response["fetched_at"]
+    return header
+
+
+def encode_header(header: CacheHeader) -> bytes:
+    data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    return MAGIC + _HEADER_LENGTH.pack(len(data)) + data
+
+
+def encode_cache_entry(
+    response: DownloadResponse, compression: Compression = "gzip"
+) -> bytes:
+    body = response["content"].encode("utf-8")
+    header = make_header(response, body, compression)
+    return encode_header(header) + compress(body, compression)
+
+
+def is_legacy_entry(data: bytes | memoryview) -> bool:
+    # Entries written before this format are plain JSON `DownloadResponse`s
+    return bytes(data[: len(MAGIC)]) != MAGIC
+
+
+def decode_cache_header(data: bytes | memoryview) -> tuple[CacheHeader, int] | None:
+    """Header and offset of the body, or None if the header is incomplete"""
+    if len(data) < _PREAMBLE_SIZE or is_legacy_entry(data):
+        return None
+
+    length = cast(int, _HEADER_LENGTH.unpack_from(data, len(MAGIC))[0])
+    end = _PREAMBLE_SIZE + length
+    if len(data) < end:
+        return None
+
+    header = CacheHeaderDecoder(bytes(data[_PREAMBLE_SIZE:end]))
+    return header, end
+
+
+def decode_cache_entry(data: bytes) -> CacheEntry | None:
+    if is_legacy_entry(data):
+        try:
+            legacy = LegacyEntryDecoder(data)
+        except ValueError:
+            return None
+        body = legacy["content"].encode("utf-8")
+        return CacheEntry(make_header(legacy, body, "identity"), body)
+
+    try:
+        decoded = decode_cache_header(data)
+    except ValueError:
+        # Corrupt header, treat as not cached
+        return None
+    if decoded is None:
+        return None
+
+    header, offset = decoded
+    return CacheEntry(header, memoryview(data)[offset:])
+
+
+def read_cache_header(path: Path) -> CacheMetadata | None:
+    try:
+        with open(path, "rb") as file:
+            data = file.read(HEADER_READ_SIZE)
+            if is_legacy_entry(data):
+                data += file.read()
+                entry = decode_cache_entry(data)
+                return None if entry is None else entry.header
+            decoded = decode_cache_header(data)
+            if decoded is None:
+                # Unusually large header, fall back to reading all of it
+                decoded = decode_cache_header(data + file.read())
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        return None
+
+    return None if decoded is None else decoded[0]
+
+
+def migrate_cache_file(path: Path, compression: Compression = "gzip") -> bool:
+    """Rewrite a legacy JSON entry in the current format, if it is one"""
+    # Legacy entries are JSON objects, anything else is left unread
+    try:
+        with open(path, "rb") as file:
+            if not file.read(len(MAGIC)).lstrip().startswith(b"{"):
+                return False
+    except FileNotFoundError:
+        return False
+
+    data = read_bytes(path)
+    if data is None or not is_legacy_entry(data):
+        return False
+
+    entry = decode_cache_entry(data)
+    if entry is None:
+        return False
+
+    write_bytes_atomic(path, encode_cache_entry(entry.to_response(), compression))
+    return True
+
+
+def migrate_cache_directory(directory: str, compression: Compression = "gzip") -> int:
+    migrated = 0
+    for root, directories, files in os.walk(directory):
+        if root == directory and DOCUMENTS_DIRECTORY in directories:
+            directories.remove(DOCUMENTS_DIRECTORY)
+        for name in files:
+            if not name.endswith(NOT_ENTRY_SUFFIXES):
+                migrated += migrate_cache_file(Path(root, name), compression)
+    return migrated
@@ -1,9 +1,23 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
 from typing import Literal, TypedDict
 
-from pydantic import TypeAdapter
-
+from .cache_format import CacheMetadata
 from .constants import COMPANY_TICKERS_EXCHANGE_URL
-from .typings import IDownloader
+from .freshness import IFreshnessPolicy, PatternFreshnessPolicy, get_cache_state
+from .json_decoder import JsonDecoder
+from .singleflight import SingleFlight
+from .ticker_index import (
+    CompanyTickerExchange,
+    TickerIndex,
+    read_ticker_index,
+    write_ticker_index,
+)
+from .typings import DownloadResponse, IDownloader
+
+logger = logging.getLogger(__name__)
 
 
 class CompanyTickersExchangeJson(TypedDict):
@@ -13,19 +27,21 @@ class CompanyTickersExchangeJson(TypedDict):
     data: list[tuple[int, str, str, str | None]]
 
 
-class CompanyTickerExchange(TypedDict):
-    cik: int
-    name: str
-    ticker: str
-    exchange: str | None
-
-
 class StructuredCompanyTickerExchange(TypedDict):
     list: list[CompanyTickerExchange]
     by_cik: dict[int, CompanyTickerExchange]
     by_ticker: dict[str, CompanyTickerExchange]
 
 
+CompanyTickersExchangeDecoder = JsonDecoder(CompanyTickersExchangeJson)
+
+
+def to_company_ticker_exchange(
+    row: tuple[int, str, str, str | None],
+) -> CompanyTickerExchange:
+    return {"cik": row[0], "name": row[1], "ticker": row[2], "exchange": row[3]}
+
+
 def structure_company_exchange_json(raw_data: CompanyTickersExchangeJson):
     structured_data: StructuredCompanyTickerExchange = {
         "list": [],
@@ -34,12 +50,7 @@ def structure_company_exchange_json(raw_data: CompanyTickersExchangeJson):
     }
 
     for row in raw_data["data"]:
-        item: CompanyTickerExchange = {
-            "cik": row[0],
-            "name": row[1],
-            "ticker": row[2],
-            "exchange": row[3],
-        }
+        item = to_company_ticker_exchange(row)
 
         structured_data["list"].append(item)
         structured_data["by_cik"][row[0]] = item
@@ -49,46 +60,152 @@ def structure_company_exchange_json(raw_data: CompanyTickersExchangeJson):
 
 
 class CentralIndexKey:
-    _downloader: IDownloader
-    _last_modified: str | None = None
-    _structured_data: StructuredCompanyTickerExchange | None = None
+    """
+    Companies by ticker and CIK, from SEC's ticker file. Lookups are served
+    from a `TickerIndex` in memory, which is only checked against the ticker
+    file once it is older than the file's freshness lifetime. With
+    `index_path`, the index is persisted there and loaded at start up.
+    """
 
-    def __init__(self, downloader: IDownloader):
+    _downloader: IDownloader
+    _index_path: Path | None
+    _freshness_policy: IFreshnessPolicy
+    _index: TickerIndex | None = None
+    _loading: SingleFlight[str, TickerIndex]
+    _refreshing: asyncio.Task[TickerIndex] | None = None
+
+    def __init__(
+        self,
+        downloader: IDownloader,
+        *,
+        index_path: str | Path | None = None,
+        freshness_policy: IFreshnessPolicy | None = None,
+    ):
         self._downloader = downloader
+        self._index_path = None if index_path is None else Path(index_path)
+        self._freshness_policy = freshness_policy or PatternFreshnessPolicy()
+        self._loading = SingleFlight()
+
+    async def aclose(self) -> None:
+        # Let a background refresh finish, so the persisted index is written
+        if self._refreshing is not None:
+            _ = await asyncio.gather(self._refreshing, return_exceptions=True)
 
     async def get_by_ticker_async(self, ticker: str) -> CompanyTickerExchange | None:
-        structured_data = await self._get_structured_data()
-        if structured_data is None:
-            return None
-        return structured_data["by_ticker"].get(ticker.upper())
+        index = await self.get_index_async()
+        return index.get_by_ticker(ticker)
 
     async def get_cik_by_ticker_async(self, ticker: str) -> int | None:
         co = await self.get_by_ticker_async(ticker)
         return None if co is None else co["cik"]
 
     async def get_by_cik_async(self, cik: int) -> CompanyTickerExchange | None:
-        structured_data = await self._get_structured_data()
-        if structured_data is None:
-            return None
-        return structured_data["by_cik"].get(cik)
+        index = await self.get_index_async()
+        return index.get_by_cik(cik)
 
     async def get_all_async(self) -> list[CompanyTickerExchange] | None:
-        structured_data = await self._get_structured_data()
-        if structured_data is None:
-            return None
-        return structured_data["list"]
+        index = await self.get_index_async()
+        return list(index)
+
+    async def search_async(
+        self, query: str, limit: int = 10
+    ) -> list[CompanyTickerExchange]:
+        """Companies by ticker or name prefix, then by fuzzy name match"""
+        index = await self.get_index_async()
+        return index.search(query, limit)
+
+    async def get_index_async(self) -> TickerIndex:
+        index = self._index
+        if index is None:
+            # Concurrent lookups share one load and one download
+            return await self._loading.do(
+                COMPANY_TICKERS_EXCHANGE_URL, self._load_index_async
+            )
 
-    async def _get_structured_data(self) -> StructuredCompanyTickerExchange | None:
+        state = get_cache_state(self._get_directive(), index.metadata)
+        if state == "fresh":
+            return index
+        if state == "stale":
+            self._refresh_in_background()
+            return index
+        return await self._loading.do(
+            COMPANY_TICKERS_EXCHANGE_URL, self._refresh_index_async
+        )
+
+    async def _load_index_async(self) -> TickerIndex:
+        if self._index_path is not None and self._index is None:
+            self._index = await asyncio.to_thread(read_ticker_index, self._index_path)
+
+        index = self._index
+        if index is not None:
+            state = get_cache_state(self._get_directive(), index.metadata)
+            if state == "stale":
+                self._refresh_in_background()
+            if state != "expired":
+                return index
+
+        return await self._refresh_index_async()
+
+    async def _refresh_index_async(self) -> TickerIndex:
         response = await self._downloader.get_url_async(COMPANY_TICKERS_EXCHANGE_URL)
-
+        metadata = self._get_metadata(response)
+        index = self._index
         last_modified = response["last_modified"]
 
-        if last_modified == "" or last_modified != self._last_modified:
-            adapter = TypeAdapter(CompanyTickersExchangeJson)
-            company_tickers_exchange_json = adapter.validate_json(response["content"])
-            self._structured_data = structure_company_exchange_json(
-                company_tickers_exchange_json
-            )
-            self._last_modified = last_modified
-
-        return self._structured_data
+        if (
+            index is not None
+            and last_modified != ""
+            and last_modified == index.metadata["last_modified"]
+        ):
+            # Unchanged, only its freshness lifetime restarts
+            index.metadata = metadata
+            await self._write_index_async(index)
+            return index
+
+        raw_data = CompanyTickersExchangeDecoder(response["content"])
+        companies = map(to_company_ticker_exchange, raw_data["data"])
+
+        if index is None:
+            index = self._index = TickerIndex(companies, metadata)
+        else:
+            added, removed = index.update(companies, metadata)
+            logger.info("Ticker index updated, %d added, %d removed", added, removed)
+
+        await self._write_index_async(index)
+        return index
+
+    def _refresh_in_background(self):
+        if self._refreshing is not None:
+            return
+
+        task = asyncio.create_task(
+            self._loading.do(COMPANY_TICKERS_EXCHANGE_URL, self._refresh_index_async)
+        )
+        self._refreshing = task
+
+        def done(task: asyncio.Task[TickerIndex]):
+            self._refreshing = None
+            if not task.cancelled() and (error := task.exception()) is not None:
+                logger.warning("Refreshing the ticker index failed", exc_info=error)
+
+        task.add_done_callback(done)
+
+    async def _write_index_async(self, index: TickerIndex):
+        if self._index_path is not None:
+            await asyncio.to_thread(write_ticker_index, self._index_path, index)
+
+    def _get_directive(self):
+        return self._freshness_policy.get_directive(COMPANY_TICKERS_EXCHANGE_URL)
+
+    @staticmethod
+    def _get_metadata(response: DownloadResponse) -> CacheMetadata:
+        # As of when the downloader fetched or revalidated it, so a cached
+        # response does not restart the ticker file's freshness lifetime.
+        # Downloaders that do not say were confirmed just now.
+        return {
+            "url": response["url"],
+            "status_code": response["status_code"],
+            "last_modified": response["last_modified"],
+            "content_type": response["content_type"],
+            "fetched_at": response.get("fetched_at", time.time()),
+        }
@@ -1,28 +1,69 @@
 import asyncio
+from collections.abc import AsyncGenerator
+from functools import partial
 
-from pydantic import TypeAdapter
 from typing_extensions import Literal
 
 from .constants import DATA_SEC_URL
-from .typings import DownloadResponse, Filing, Form, IDownloader, SubmissionsJSON
+from .extraction import DocumentExtractor, ExtractedDocument
+from .filings_store import FilingsStore
+from .filings_table import FilingsTable
+from .json_decoder import JsonDecoder
+from .scheduler import FetchScheduler, Priority, ScheduledResult
+from .singleflight import SingleFlight
+from .typings import (
+    DateField,
+    DownloadResponse,
+    Filing,
+    Form,
+    IDownloader,
+    SubmissionsJSON,
+    SubmissionsJSON_Filings_File,
+    SubmissionsJSON_Filings_Recent,
+)
 from .utils import (
     get_end_date,
     get_primary_document,
     get_start_date,
-    transform_json_to_filings,
 )
 
-SubmissionsValidator = TypeAdapter(SubmissionsJSON)
+SubmissionsDecoder = JsonDecoder(SubmissionsJSON)
+SubmissionsPageDecoder = JsonDecoder(SubmissionsJSON_Filings_Recent)
+
+# Recent filings, and the pages holding older ones
+type Submissions = tuple[FilingsTable, list[SubmissionsJSON_Filings_File]]
 
 
 class Company:
     _cik: str
     _downloader: IDownloader
-    _filings: list[Filing] | None = None
+    _submissions: Submissions | None = None
+    _pages: dict[str, FilingsTable]
+    _scheduler: FetchScheduler
+    _store: FilingsStore | None
+    _loading: SingleFlight[bool, Submissions]
+    _loading_pages: SingleFlight[str, FilingsTable]
 
-    def __init__(self, cik: str | int, downloader: IDownloader):
+    def __init__(
+        self,
+        cik: str | int,
+        downloader: IDownloader,
+        scheduler: FetchScheduler | None = None,
+        store: FilingsStore | None = None,
+    ):
         self._downloader = downloader
         self._cik = str(cik).rjust(10, "0")
+        # Share one scheduler between companies to cap fetches across all of them
+        self._scheduler = scheduler or FetchScheduler()
+        # Filings ingested from the bulk archive, read before the network
+        self._store = store
+        self._pages = {}
+        self._loading = SingleFlight()
+        self._loading_pages = SingleFlight()
+
+    @property
+    def cik(self) -> str:
+        return self._cik
 
     async def get_filing_details_async(
         self,
@@ -33,24 +74,31 @@ class Company:
         year: int | None = None,
         quarter: Literal[1, 2, 3, 4] | None = None,
         force: bool | None = None,
+        date_field: DateField = "reportDate",
+        priority: Priority = Priority.INTERACTIVE,
     ) -> list[Filing]:
-        filings = await self._get_submissions_async(force)
+        """
+        Filings of the company, optionally by form and by `date_field` between
+        `start_date` and `end_date` (inclusive), newest first
+        """
+        recent, files = await self._get_submissions_async(force, priority)
         yyyy = None if year is None else str(year).rjust(4, "0")
         start_date = get_start_date(start_date, yyyy, quarter)
         end_date = get_end_date(end_date, yyyy, quarter)
 
-        if start_date is None and end_date is None and form is None:
-            return filings
+        # Older filings are only loaded when the date range reaches them
+        pages = await self._get_pages_async(files, start_date, priority)
 
-        def filter_fn(f: Filing):
-            report_date = f["reportDate"]
-            return (
-                (start_date is None or start_date <= report_date)
-                and (end_date is None or end_date >= report_date)
-                and (form is None or form == f["form"])
+        return [
+            filing
+            for table in (recent, *pages)
+            for filing in table.filter(
+                form=form,
+                start_date=start_date,
+                end_date=end_date,
+                date_field=date_field,
             )
-
-        return list(filter(filter_fn, filings))
+        ]
 
     async def get_primary_documents_async(
         self,
@@ -61,6 +109,8 @@ class Company:
         year: int | None = None,
         quarter: Literal[1, 2, 3, 4] | None = None,
         force: bool | None = None,
+        date_field: DateField = "reportDate",
+        priority: Priority = Priority.INTERACTIVE,
     ) -> list[DownloadResponse]:
         filings = await self.get_filing_details_async(
             start_date=start_date,
@@ -69,22 +119,175 @@ class Company:
             year=year,
             quarter=quarter,
             force=force,
+            date_field=date_field,
+            priority=priority,
+        )
+
+        # Keep the order of the filings, fail on the first failed download
+        documents: list[DownloadResponse | None] = [None] * len(filings)
+        results = self._scheduler.map_async(
+            lambda i: self.get_primary_document_async(filings[i]),
+            range(len(filings)),
+            priority,
         )
+        try:
+            async for result in results:
+                if "error" in result:
+                    raise result["error"]
+                if "value" in result:
+                    documents[result["item"]] = result["value"]
+        finally:
+            await results.aclose()
 
-        futures = map(self._get_primary_document_async, filings)
-        return await asyncio.gather(*futures)
+        return documents  # pyright: ignore[reportReturnType]
 
-    async def _get_submissions_async(self, force: bool | None = False) -> list[Filing]:
-        if force or self._filings is None:
-            data = await self._downloader.get_url_async(
-                url=f"{DATA_SEC_URL}/submissions/CIK{self._cik}.json"
+    async def iter_primary_documents_async(
+        self,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        form: Form | None = None,
+        year: int | None = None,
+        quarter: Literal[1, 2, 3, 4] | None = None,
+        force: bool | None = None,
+        date_field: DateField = "reportDate",
+        priority: Priority = Priority.BACKGROUND,
+    ) -> AsyncGenerator[ScheduledResult[Filing, DownloadResponse]]:
+        """
+        Yields each filing with its primary document, or the error fetching it,
+        as downloads finish. Only a few documents are held at a time.
+        """
+        filings = await self.get_filing_details_async(
+            start_date=start_date,
+            end_date=end_date,
+            form=form,
+            year=year,
+            quarter=quarter,
+            force=force,
+            date_field=date_field,
+            priority=priority,
+        )
+
+        results = self._scheduler.map_async(
+            self.get_primary_document_async, filings, priority
+        )
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+    async def iter_extracted_documents_async(
+        self,
+        extractor: DocumentExtractor,
+        *,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        form: Form | None = None,
+        year: int | None = None,
+        quarter: Literal[1, 2, 3, 4] | None = None,
+        force: bool | None = None,
+        date_field: DateField = "reportDate",
+        priority: Priority = Priority.BACKGROUND,
+    ) -> AsyncGenerator[ScheduledResult[Filing, ExtractedDocument]]:
+        """
+        Yields each filing with the text and sections of its primary document,
+        extracted in `extractor`'s worker processes while the next documents
+        download
+        """
+        documents = self.iter_primary_documents_async(
+            start_date=start_date,
+            end_date=end_date,
+            form=form,
+            year=year,
+            quarter=quarter,
+            force=force,
+            date_field=date_field,
+            priority=priority,
+        )
+        results = extractor.iter_extracted_async(documents)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+            await documents.aclose()
+
+    async def get_primary_document_async(self, filing: Filing) -> DownloadResponse:
+        return await self._downloader.get_url_async(get_primary_document(filing))
+
+    async def _get_submissions_async(
+        self, force: bool | None = False, priority: Priority = Priority.INTERACTIVE
+    ) -> Submissions:
+        if force or self._submissions is None:
+            self._submissions = await self._loading.do(
+                bool(force),
+                partial(self._load_submissions_async, bool(force), priority),
             )
-            self._filings = transform_json_to_filings(
-                self._cik, SubmissionsValidator.validate_json(data["content"])
+            if force:
+                self._pages.clear()
+
+        return self._submissions
+
+    async def _load_submissions_async(
+        self, force: bool, priority: Priority
+    ) -> Submissions:
+        if self._store is not None and not force:
+            table = await self._store.get_filings_async(self._cik)
+            # The bulk archive holds every page already
+            if table is not None:
+                return table, []
+
+        # Other Company instances for the same CIK share the download and the
+        # parsed JSON through the downloader
+        submissions = await self._scheduler.run(
+            partial(
+                self._downloader.get_parsed_async,
+                f"{DATA_SEC_URL}/submissions/CIK{self._cik}.json",
+                SubmissionsDecoder,
+            ),
+            priority,
+        )
+        return (
+            FilingsTable(self._cik, submissions["filings"]["recent"]),
+            submissions["filings"]["files"],
+        )
+
+    async def _get_pages_async(
+        self,
+        files: list[SubmissionsJSON_Filings_File],
+        start_date: str | None,
+        priority: Priority,
+    ) -> list[FilingsTable]:
+        # Filings are filed on or after their report date, and accepted on
+        # their filing date, so a page whose last filing predates `start_date`
+        # holds no match whatever the date field
+        names = [
+            file["name"]
+            for file in files
+            if start_date is None or file["filingTo"] >= start_date[:10]
+        ]
+
+        return await asyncio.gather(
+            *(
+                self._loading_pages.do(
+                    name, partial(self._get_page_async, name, priority)
+                )
+                for name in names
             )
+        )
 
-        return self._filings
+    async def _get_page_async(self, name: str, priority: Priority) -> FilingsTable:
+        page = self._pages.get(name)
+        if page is None:
+            columns = await self._scheduler.run(
+                partial(
+                    self._downloader.get_parsed_async,
+                    f"{DATA_SEC_URL}/submissions/{name}",
+                    SubmissionsPageDecoder,
+                ),
+                priority,
+            )
+            page = self._pages[name] = FilingsTable(self._cik, columns)
 
-    async def _get_primary_document_async(self, filing: Filing) -> DownloadResponse:
-        response = await self._downloader.get_url_async(get_primary_document(filing))
-        return response
+        return page
@@ -0,0 +1,23 @@
+from collections.abc import Iterator
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from .testing import Respond, Serve, start_server
+
+
+@pytest.fixture
+def serve() -> Iterator[Serve]:
+    """Local HTTP servers, shut down after the test"""
+    servers: list[ThreadingHTTPServer] = []
+
+    def start(respond: Respond) -> str:
+        httpd = start_server(respond)
+        servers.append(httpd)
+        host, port = httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    yield start
+    for httpd in servers:
+        httpd.shutdown()
+        httpd.server_close()
@@ -9,3 +9,17 @@ COMPANY_TICKERS_EXCHANGE_URL: Final = (
 )
 
 DATA_SEC_URL: Final = "https://data.sec.gov"
+
+FULL_INDEX_URL: Final = "https://www.sec.gov/Archives/edgar/full-index"
+
+DAILY_INDEX_URL: Final = "https://www.sec.gov/Archives/edgar/daily-index"
+
+SUBMISSIONS_ZIP_URL: Final = (
+    "https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip"
+)
+
+XBRL_API_URL: Final = "https://data.sec.gov/api/xbrl"
+
+COMPANYFACTS_ZIP_URL: Final = (
+    "https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip"
+)
@@ -0,0 +1,104 @@
+"""
+Documents downloaded straight to disk, byte for byte, for large filings and
+binary exhibits (PDF, images, zip) that should not go through `str`
+
+Each document is stored as-is next to a `<name>.meta.json` sidecar holding its
+`StoredDocument` metadata.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import suppress
+from io import BufferedWriter
+from pathlib import Path
+from typing import Final
+
+from .cache_format import CacheMetadata
+from .fileio import read_bytes, write_bytes_atomic
+from .json_decoder import JsonDecoder
+
+# Large enough that the thread hop per chunk is noise, small enough that
+# memory use does not depend on the document size
+CHUNK_SIZE: Final = 1024 * 1024
+
+METADATA_SUFFIX: Final = ".meta.json"
+
+
+class StoredDocument(CacheMetadata):
+    path: str
+    sha256: str
+    size: int
+
+
+StoredDocumentDecoder = JsonDecoder(StoredDocument)
+
+
+def get_metadata_path(path: Path) -> Path:
+    return path.with_name(path.name + METADATA_SUFFIX)
+
+
+def read_document_metadata(path: Path) -> StoredDocument | None:
+    data = read_bytes(get_metadata_path(path))
+    if data is None or not path.exists():
+        return None
+
+    try:
+        return StoredDocumentDecoder(data)
+    except ValueError:
+        return None
+
+
+def write_document_metadata(document: StoredDocument):
+    write_bytes_atomic(
+        get_metadata_path(Path(document["path"])), json.dumps(document).encode()
+    )
+
+
+class DocumentWriter:
+    """
+    Writes a document chunk by chunk to a temporary file next to `path`,
+    hashing as it goes, and renames it into place on `commit`
+    """
+
+    path: Path
+    size: int
+    _hash: "hashlib._Hash"  # pyright: ignore[reportPrivateUsage]
+    _temp_name: str
+    _file: BufferedWriter
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, self._temp_name = tempfile.mkstemp(
+            dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+        )
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.path = path
+        self.size = 0
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes):
+        _ = self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def commit(self, *, fsync: bool = False):
+        try:
+            if fsync:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._temp_name, self.path)
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        self._file.close()
+        with suppress(FileNotFoundError):
+            os.unlink(self._temp_name)
@@ -1,32 +1,142 @@
+import asyncio
 import logging
-from typing import override
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+from pathlib import Path
+from types import TracebackType
+from typing import Final, Self, cast, override
 
 import httpx
-from httpx import AsyncHTTPTransport, Headers, Request, Response
-from pyrate_limiter import Duration, Limiter, limiter_factory
+from httpx import AsyncHTTPTransport, Headers, Limits, Request, Response
+from pyrate_limiter import Limiter
 
+from .cache_format import CacheMetadata
 from .constants import STATUS_CODE_NOT_MODIFIED
+from .documents import (
+    CHUNK_SIZE,
+    DocumentWriter,
+    StoredDocument,
+    read_document_metadata,
+    write_document_metadata,
+)
+from .freshness import (
+    CacheState,
+    IFreshnessPolicy,
+    PatternFreshnessPolicy,
+    get_cache_state,
+    has_lifetime,
+)
+from .memory_cache import MemoryCache
+from .metrics import Metrics, get_enabled, get_parser_name
+from .rate_control import (
+    THROTTLE_STATUS_CODES,
+    THROTTLE_STATUS_CODES_EXTENSION,
+    AdaptiveRateController,
+    parse_retry_after,
+)
+from .rate_limit import DEFAULT_RATE_PER_SECOND, create_limiter
+from .singleflight import SingleFlight
 from .typings import DownloadResponse, IDownloader, ProxyType
 
 logger = logging.getLogger(__name__)
 
+# SEC content is served from two hosts (www.sec.gov and data.sec.gov), and the
+# fair access policy caps us at 10 req/s, so a handful of warm connections is
+# plenty. Keep them alive long enough to span gaps between rate limited slots.
+DEFAULT_POOL_LIMITS: Final = Limits(
+    max_connections=10,
+    max_keepalive_connections=10,
+    keepalive_expiry=30.0,
+)
+
 
 class AsyncAsyncLimiterTransport(AsyncHTTPTransport):
     limiter: Limiter
+    controller: AdaptiveRateController | None
+    metrics: Metrics | None
 
-    def __init__(self, limiter: Limiter, **kwargs):  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType]
+    def __init__(
+        self,
+        limiter: Limiter,
+        controller: AdaptiveRateController | None = None,
+        metrics: Metrics | None = None,
+        **kwargs,  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType]
+    ):
         super().__init__(**kwargs)  # pyright: ignore[reportUnknownArgumentType]
         self.limiter = limiter
+        self.controller = controller
+        self.metrics = get_enabled(metrics)
 
     @override
     async def handle_async_request(self, request: Request, **kwargs) -> Response:  # pyright: ignore[reportUnknownParameterType, reportMissingParameterType]
-        while not await self.limiter.try_acquire_async("httpx_ratelimiter"):
-            logger.debug("Lock acquisition timed out, retrying")
+        controller = self.controller
+        metrics = self.metrics
+        throttle_status_codes = cast(
+            frozenset[int],
+            request.extensions.get(
+                THROTTLE_STATUS_CODES_EXTENSION, THROTTLE_STATUS_CODES
+            ),
+        )
+        attempt = 0
+        waited = 0.0
 
-        logger.debug("Acquired lock")
-        response = await super().handle_async_request(request, **kwargs)
+        while True:
+            started = time.perf_counter() if metrics is not None else 0.0
+            if controller is not None:
+                await controller.wait_async()
 
-        return response
+            while not await self.limiter.try_acquire_async("httpx_ratelimiter"):
+                logger.debug("Lock acquisition timed out, retrying")
+
+            logger.debug("Acquired lock")
+            if metrics is None:
+                response = await super().handle_async_request(request, **kwargs)
+            else:
+                acquired = time.perf_counter()
+                metrics.observe("limiter_wait_seconds", acquired - started)
+                response = await super().handle_async_request(request, **kwargs)
+                status = str(response.status_code)
+                metrics.increment("http_requests_total", status=status)
+                metrics.observe(
+                    "http_request_seconds",
+                    time.perf_counter() - acquired,
+                    status=status,
+                )
+
+            if controller is None:
+                return response
+
+            if response.status_code not in throttle_status_codes:
+                controller.on_success()
+                return response
+
+            retry_after = parse_retry_after(
+                cast(str | None, response.headers.get("retry-after"))
+            )
+            controller.on_throttled(retry_after)
+
+            delay = controller.get_backoff(attempt, retry_after)
+            if (
+                attempt >= controller.max_retries
+                or waited + delay > controller.max_retry_wait
+            ):
+                # Out of retry budget, the caller gets the throttled response
+                return response
+
+            logger.info(
+                "%s %s throttled (%d), retrying in %.1fs",
+                request.method,
+                request.url,
+                response.status_code,
+                delay,
+            )
+            await response.aclose()
+            if metrics is not None:
+                metrics.observe("throttle_backoff_seconds", delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+            waited += delay
 
 
 def get_header(headers: Headers, key: str):
@@ -38,8 +148,20 @@ def get_header(headers: Headers, key: str):
 
 class BaseDownloader(IDownloader):
     _limiter: Limiter
+    _rate_controller: AdaptiveRateController | None
     _user_agent: str
     _proxy: ProxyType | None
+    _limits: Limits
+    _http2: bool
+    _client: httpx.AsyncClient | None = None
+    _closed: bool = False
+    _freshness_policy: IFreshnessPolicy
+    _revalidating: dict[str, asyncio.Task[DownloadResponse]]
+    _memory_cache: MemoryCache | None
+    _fetching: SingleFlight[str, DownloadResponse]
+    _parsing: SingleFlight[tuple[str, Callable[[str], object]], object]
+    _downloading: SingleFlight[str, StoredDocument]
+    _metrics: Metrics | None
 
     def __init__(
         self,
@@ -47,62 +169,406 @@ class BaseDownloader(IDownloader):
         user_agent: str,
         rate_per_second: int | None,
         proxy: ProxyType | None,
+        limits: Limits | None = None,
+        http2: bool = False,
+        freshness_policy: IFreshnessPolicy | None = None,
+        memory_cache: MemoryCache | None = None,
+        limiter: Limiter | None = None,
+        rate_controller: AdaptiveRateController | None = None,
+        adaptive: bool = True,
+        metrics: Metrics | None = None,
     ):
-        # https://github.com/vutran1710/PyrateLimiter/blob/master/examples/httpx_ratelimiter.py
-        self._limiter = limiter_factory.create_inmemory_limiter(
-            rate_per_duration=rate_per_second or 5,
-            duration=Duration.SECOND,
-            max_delay=Duration.MINUTE,
-            async_wrapper=True,
-        )
+        # Pass a limiter from `create_shared_limiter` to share one budget
+        # between downloaders (and processes), `rate_per_second` is then unused
+        self._limiter = limiter or create_limiter(rate_per_second)
+        # Slows down and retries when SEC throttles us; pass one controller to
+        # downloaders sharing a limiter, or `adaptive=False` to fail fast
+        if not adaptive:
+            self._rate_controller = None
+        else:
+            self._rate_controller = rate_controller or AdaptiveRateController(
+                ceiling=rate_per_second or DEFAULT_RATE_PER_SECOND
+            )
         # https://www.sec.gov/about/webmaster-frequently-asked-questions#developers
         self._user_agent = user_agent
         self._proxy = proxy
+        self._limits = limits or DEFAULT_POOL_LIMITS
+        # HTTP/2 requires the optional `h2` package (`httpx[http2]`)
+        self._http2 = http2
+        self._freshness_policy = freshness_policy or PatternFreshnessPolicy()
+        self._revalidating = {}
+        self._memory_cache = memory_cache
+        # Concurrent requests for the same URL share one fetch and cache write
+        self._fetching = SingleFlight()
+        self._parsing = SingleFlight()
+        self._downloading = SingleFlight()
+        # None unless there is a sink, so uninstrumented downloads time nothing
+        self._metrics = get_enabled(metrics)
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        # Let background revalidations finish, so their cache writes land
+        _ = await asyncio.gather(*self._revalidating.values(), return_exceptions=True)
+
+        self._closed = True
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    @property
+    def memory_cache(self) -> MemoryCache | None:
+        return self._memory_cache
+
+    @property
+    def rate_controller(self) -> AdaptiveRateController | None:
+        return self._rate_controller
+
+    @property
+    def metrics(self) -> Metrics | None:
+        return self._metrics
 
     @override
     async def get_url_async(self, url: str) -> DownloadResponse:
-        cached = await self.read_from_cache_async(url)
+        return await self._fetching.do(url, partial(self._get_url_async, url))
+
+    @override
+    async def get_parsed_async[T](self, url: str, parser: Callable[[str], T]) -> T:
+        parsed = await self._parsing.do(
+            (url, parser), partial(self._get_parsed_async, url, parser)
+        )
+        return parsed  # pyright: ignore[reportReturnType]
+
+    async def download_async(
+        self,
+        url: str,
+        *,
+        throttle_status_codes: frozenset[int] = THROTTLE_STATUS_CODES,
+    ) -> StoredDocument:
+        """
+        Streams the document at `url` byte for byte into the document store,
+        unless the stored copy is still fresh, and returns where it is.
+        Responses with `throttle_status_codes` are retried more slowly.
+        """
+        path = self.get_document_path(url)
+        if path is None:
+            raise ValueError(
+                f"{type(self).__name__} has no document store, "
+                + "use download_to_file_async"
+            )
+
+        return await self._downloading.do(
+            url, partial(self._download_async, url, path, throttle_status_codes)
+        )
+
+    async def download_to_file_async(
+        self, url: str, path: str | Path
+    ) -> StoredDocument:
+        """Streams the document at `url` byte for byte to `path`, uncached"""
+        document = await self._stream_to_file_async(url, Path(path), last_modified=None)
+        assert document is not None
+        return document
+
+    def get_document_path(self, url: str) -> Path | None:  # pyright: ignore[reportUnusedParameter]
+        """Where `download_async` stores `url`, None without a document store"""
+        return None
+
+    async def _get_url_async(self, url: str) -> DownloadResponse:
+        remembered = None if self._memory_cache is None else self._memory_cache.get(url)
+        metadata = (
+            remembered
+            if remembered is not None
+            else await self._timed_async(
+                "cache_read_seconds", self.read_cache_metadata_async(url)
+            )
+        )
+        state = (
+            None
+            if metadata is None
+            else get_cache_state(self._freshness_policy.get_directive(url), metadata)
+        )
+        if self._metrics is not None:
+            self._count_lookup(self._metrics, remembered is not None, state)
+
+        if metadata is not None and state != "expired":
+            cached = (
+                remembered
+                if remembered is not None
+                else await self._timed_async(
+                    "cache_read_seconds", self._read_stored_async(url)
+                )
+            )
+            if cached is not None:
+                if state == "stale":
+                    self._revalidate_in_background(url, metadata, remembered)
+                return cached
+
+        return await self._revalidate_async(url, metadata, remembered)
+
+    def _count_lookup(
+        self, metrics: Metrics, remembered: bool, state: CacheState | None
+    ):
+        if self._memory_cache is not None:
+            result = "hit" if remembered else "miss"
+            metrics.increment("cache_lookups_total", cache="memory", result=result)
+        if not remembered:
+            result = state or "miss"
+            metrics.increment("cache_lookups_total", cache="store", result=result)
+
+    async def _get_parsed_async[T](self, url: str, parser: Callable[[str], T]) -> T:
+        response = await self.get_url_async(url)
+
+        if self._memory_cache is None:
+            return self._parse(parser, response["content"])
+
+        parsed = self._memory_cache.get_parsed(url, response, parser)
+        if parsed is not None:
+            return parsed[0]
 
+        value = self._parse(parser, response["content"])
+        self._memory_cache.put_parsed(url, response, parser, value)
+        return value
+
+    def _parse[T](self, parser: Callable[[str], T], content: str) -> T:
+        if self._metrics is None:
+            return parser(content)
+
+        started = time.perf_counter()
+        value = parser(content)
+        self._metrics.observe(
+            "parse_seconds",
+            time.perf_counter() - started,
+            parser=get_parser_name(parser),
+        )
+        return value
+
+    async def _timed_async[T](self, name: str, awaitable: Awaitable[T]) -> T:
+        if self._metrics is None:
+            return await awaitable
+
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._metrics.observe(name, time.perf_counter() - started)
+
+    def _revalidate_in_background(
+        self, url: str, metadata: CacheMetadata, remembered: DownloadResponse | None
+    ):
+        if url in self._revalidating:
+            return
+
+        task = asyncio.create_task(self._revalidate_async(url, metadata, remembered))
+        self._revalidating[url] = task
+
+        def done(task: asyncio.Task[DownloadResponse]):
+            del self._revalidating[url]
+            if not task.cancelled() and (error := task.exception()) is not None:
+                logger.warning("Revalidating %s failed", url, exc_info=error)
+
+        task.add_done_callback(done)
+
+    async def _revalidate_async(
+        self,
+        url: str,
+        metadata: CacheMetadata | None,
+        remembered: DownloadResponse | None = None,
+    ) -> DownloadResponse:
+        """
+        Fetches `url` conditionally on the cached `metadata`. `remembered` is
+        what the memory cache held when it was looked up, if anything.
+        """
         response = await self._do_get_url_async(
             url=url,
-            last_modified=None if cached is None else cached["last_modified"],
+            last_modified=None if metadata is None else metadata["last_modified"],
         )
 
         # There will be no content in response in case of STATUS_CODE_NOT_MODIFIED
-        if cached is not None and response["status_code"] == STATUS_CODE_NOT_MODIFIED:
-            return cached
+        if metadata is not None and response["status_code"] == STATUS_CODE_NOT_MODIFIED:
+            if has_lifetime(self._freshness_policy.get_directive(url)):
+                # Restart the freshness lifetime of the cached copy
+                cached = self._remember(
+                    url,
+                    await self._timed_async(
+                        "cache_write_seconds",
+                        self.refresh_cache_async(url, time.time()),
+                    ),
+                )
+            elif remembered is not None:
+                cached = remembered
+            else:
+                cached = await self._timed_async(
+                    "cache_read_seconds", self._read_stored_async(url)
+                )
+
+            if cached is not None:
+                return cached
+
+            # The entry disappeared since its metadata was read
+            response = await self._do_get_url_async(url=url, last_modified=None)
 
         # Do not cache if server doesn't respond 'Last-Modified'
         # Otherwise everytime it will ignore cache, which will make cache irrelevant
         if response["last_modified"] == "":
             return response
 
-        await self.write_to_cache_async(url, response)
+        await self._timed_async(
+            "cache_write_seconds", self.write_to_cache_async(url, response)
+        )
+
+        return self._remember(url, response)
+
+    async def _read_stored_async(self, url: str) -> DownloadResponse | None:
+        # Callers have looked in the memory cache already, looking again
+        # would count a second miss
+        return self._remember(url, await self.read_from_cache_async(url))
 
+    def _remember[R: DownloadResponse | None](self, url: str, response: R) -> R:
+        if self._memory_cache is not None and response is not None:
+            self._memory_cache.put(url, response)
         return response
 
+    async def _download_async(
+        self, url: str, path: Path, throttle_status_codes: frozenset[int]
+    ) -> StoredDocument:
+        stored = await asyncio.to_thread(read_document_metadata, path)
+
+        if stored is not None:
+            state = get_cache_state(self._freshness_policy.get_directive(url), stored)
+            if state == "fresh":
+                return stored
+
+        document: StoredDocument | None = await self._stream_to_file_async(
+            url,
+            path,
+            last_modified=None if stored is None else stored["last_modified"],
+            throttle_status_codes=throttle_status_codes,
+        )
+
+        if document is None:
+            # Not modified: the stored copy starts a new freshness lifetime
+            assert stored is not None
+            document = {**stored, "fetched_at": time.time()}
+
+        # Without Last-Modified it could never be revalidated, as with the cache
+        if document["last_modified"] != "":
+            await asyncio.to_thread(write_document_metadata, document)
+
+        return document
+
+    async def _stream_to_file_async(
+        self,
+        url: str,
+        path: Path,
+        *,
+        last_modified: str | None,
+        throttle_status_codes: frozenset[int] = THROTTLE_STATUS_CODES,
+    ) -> StoredDocument | None:
+        """Streams to `path`, or returns None if not modified since `last_modified`"""
+        async with self._get_client().stream(
+            "GET",
+            url,
+            headers={"If-Modified-Since": last_modified or ""},
+            extensions={THROTTLE_STATUS_CODES_EXTENSION: throttle_status_codes},
+        ) as response:
+            if last_modified and response.status_code == STATUS_CODE_NOT_MODIFIED:
+                return None
+            _ = response.raise_for_status()
+
+            writer = await asyncio.to_thread(DocumentWriter, path)
+            try:
+                async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                    await asyncio.to_thread(writer.write, chunk)
+                await asyncio.to_thread(writer.commit)
+            except BaseException:
+                writer.abort()
+                raise
+
+            if self._metrics is not None:
+                self._metrics.increment(
+                    "http_response_bytes_total", response.num_bytes_downloaded
+                )
+
+            return {
+                "url": url,
+                "status_code": response.status_code,
+                "last_modified": response.headers.get("last-modified") or "",
+                "content_type": response.headers.get("content-type") or None,
+                "fetched_at": time.time(),
+                "path": str(path),
+                "sha256": writer.sha256,
+                "size": writer.size,
+            }
+
     async def read_from_cache_async(self, url: str) -> DownloadResponse | None:  # pyright: ignore[reportUnusedParameter]
         return None
 
+    async def read_cache_metadata_async(self, url: str) -> CacheMetadata | None:
+        # Caches that can read metadata without loading the content should
+        # override this, as it is all that is needed to check freshness
+        return await self.read_from_cache_async(url)
+
+    async def refresh_cache_async(
+        self, url: str, fetched_at: float
+    ) -> DownloadResponse | None:
+        cached = await self.read_from_cache_async(url)
+        if cached is None:
+            return None
+
+        refreshed: DownloadResponse = {**cached, "fetched_at": fetched_at}
+        await self.write_to_cache_async(url, refreshed)
+        return refreshed
+
     async def write_to_cache_async(self, url: str, response: DownloadResponse):  # pyright: ignore[reportUnusedParameter]
         return None
 
-    async def _do_get_url_async(
-        self, *, url: str, last_modified: str | None
-    ) -> DownloadResponse:
-        transport = AsyncAsyncLimiterTransport(
-            limiter=self._limiter, retries=3, proxy=self._proxy
-        )
-        async with httpx.AsyncClient(transport=transport) as client:
-            response = await client.get(
-                url,
+    def _get_client(self) -> httpx.AsyncClient:
+        # One long-lived client per downloader, so connections (and TLS
+        # sessions) are reused across requests instead of being set up per URL
+        if self._closed:
+            raise RuntimeError(f"{type(self).__name__} is closed")
+        if self._client is None:
+            transport = AsyncAsyncLimiterTransport(
+                limiter=self._limiter,
+                controller=self._rate_controller,
+                metrics=self._metrics,
+                retries=3,
+                proxy=self._proxy,
+                limits=self._limits,
+                http2=self._http2,
+            )
+            self._client = httpx.AsyncClient(
+                transport=transport,
                 headers={
                     "User-Agent": self._user_agent,
                     "Accept-Encoding": "gzip, deflate",
-                    "If-Modified-Since": last_modified or "",
                 },
             )
 
+        return self._client
+
+    async def _do_get_url_async(
+        self, *, url: str, last_modified: str | None
+    ) -> DownloadResponse:
+        response = await self._get_client().get(
+            url,
+            headers={"If-Modified-Since": last_modified or ""},
+        )
+
+        if self._metrics is not None:
+            self._metrics.increment(
+                "http_response_bytes_total", response.num_bytes_downloaded
+            )
+
         status_code = response.status_code
         response_last_modified = response.headers.get("last-modified") or ""
         content_type = response.headers.get("content-type") or None
@@ -118,4 +584,5 @@ class BaseDownloader(IDownloader):
             "content": content,
             "content_type": content_type,
             "last_modified": response_last_modified,
+            "fetched_at": time.time(),
         }
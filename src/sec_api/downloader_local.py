@@ -1,18 +1,50 @@
-import json
+import asyncio
+import zlib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import override
 from urllib.parse import urlsplit
 
-from pydantic import TypeAdapter
+from httpx import Limits
+from pyrate_limiter import Limiter
 
+from .cache_format import (
+    DOCUMENTS_DIRECTORY,
+    CacheEntry,
+    CacheHeader,
+    CacheMetadata,
+    Compression,
+    decode_cache_entry,
+    encode_cache_entry,
+    encode_header,
+    is_legacy_entry,
+    read_cache_header,
+)
 from .downloader_base import BaseDownloader
+from .fileio import read_bytes, write_bytes_atomic
+from .freshness import IFreshnessPolicy
+from .memory_cache import MemoryCache
+from .metrics import Metrics
+from .rate_control import AdaptiveRateController
+from .text_index import TextIndex
 from .typings import DownloadResponse, ProxyType
 
-DownloadResponseValidator = TypeAdapter(DownloadResponse)
+
+def get_response(entry: CacheEntry) -> DownloadResponse | None:
+    try:
+        return entry.to_response()
+    except (OSError, EOFError, UnicodeDecodeError, zlib.error):
+        # Corrupt body, treat as not cached
+        return None
 
 
 class LocalCacheDownloader(BaseDownloader):
     _cache_directory: str
+    _io_workers: int
+    _compression: Compression
+    _text_index: TextIndex | None
+    _executor: ThreadPoolExecutor | None = None
 
     def __init__(
         self,
@@ -21,29 +53,113 @@ class LocalCacheDownloader(BaseDownloader):
         cache_directory: str = ".data",
         rate_per_second: int | None = None,
         proxy: ProxyType | None = None,
+        limits: Limits | None = None,
+        http2: bool = False,
+        freshness_policy: IFreshnessPolicy | None = None,
+        memory_cache: MemoryCache | None = None,
+        limiter: Limiter | None = None,
+        rate_controller: AdaptiveRateController | None = None,
+        adaptive: bool = True,
+        metrics: Metrics | None = None,
+        io_workers: int = 4,
+        compression: Compression = "gzip",
+        text_index: TextIndex | None = None,
     ):
         super().__init__(
-            user_agent=user_agent, rate_per_second=rate_per_second, proxy=proxy
+            user_agent=user_agent,
+            rate_per_second=rate_per_second,
+            proxy=proxy,
+            limits=limits,
+            http2=http2,
+            freshness_policy=freshness_policy,
+            memory_cache=memory_cache,
+            limiter=limiter,
+            rate_controller=rate_controller,
+            adaptive=adaptive,
+            metrics=metrics,
         )
         self._cache_directory = cache_directory
+        self._io_workers = io_workers
+        self._compression = compression
+        # Documents and submissions are queued for indexing as they are cached,
+        # see `TextIndex.wait_async`
+        self._text_index = text_index
+
+    @override
+    async def aclose(self) -> None:
+        await super().aclose()
+
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # Waits for queued writes without blocking the event loop
+            await asyncio.to_thread(executor.shutdown)
 
     @override
     async def read_from_cache_async(self, url: str) -> DownloadResponse | None:
-        fname = Path(self._cache_directory, urlsplit(url).path.lstrip("/"))
-        if fname.exists():
-            with open(fname) as file:
-                content = file.read()
-        else:
-            return None
+        return await self._run_in_executor(self._read_from_cache, url)
 
-        try:
-            return DownloadResponseValidator.validate_json(content)
-        except Exception:
-            return None
+    @override
+    async def read_cache_metadata_async(self, url: str) -> CacheMetadata | None:
+        return await self._run_in_executor(read_cache_header, self._get_cache_path(url))
+
+    @override
+    async def refresh_cache_async(
+        self, url: str, fetched_at: float
+    ) -> DownloadResponse | None:
+        return await self._run_in_executor(self._refresh_cache, url, fetched_at)
 
     @override
     async def write_to_cache_async(self, url: str, response: DownloadResponse):
-        fname = Path(self._cache_directory, urlsplit(url).path.lstrip("/"))
-        fname.parent.mkdir(exist_ok=True, parents=True)
-        with open(fname, "w") as file:
-            _ = file.write(json.dumps(response, indent=2))
+        await self._run_in_executor(self._write_to_cache, url, response)
+        if self._text_index is not None:
+            self._text_index.queue_response(url, response)
+
+    @override
+    def get_document_path(self, url: str) -> Path:
+        return Path(
+            self._cache_directory, DOCUMENTS_DIRECTORY, urlsplit(url).path.lstrip("/")
+        )
+
+    def _get_cache_path(self, url: str) -> Path:
+        return Path(self._cache_directory, urlsplit(url).path.lstrip("/"))
+
+    def _read_from_cache(self, url: str) -> DownloadResponse | None:
+        data = read_bytes(self._get_cache_path(url))
+        entry = None if data is None else decode_cache_entry(data)
+        return None if entry is None else get_response(entry)
+
+    def _refresh_cache(self, url: str, fetched_at: float) -> DownloadResponse | None:
+        path = self._get_cache_path(url)
+        data = read_bytes(path)
+        entry = None if data is None else decode_cache_entry(data)
+        response = None if entry is None else get_response(entry)
+        if data is None or entry is None or response is None:
+            return None
+
+        response["fetched_at"] = fetched_at
+
+        if is_legacy_entry(data):
+            # Take the chance to store it in the current format
+            self._write_to_cache(url, response)
+        else:
+            # Only the header changes, the compressed body is kept as is
+            header: CacheHeader = {**entry.header, "fetched_at": fetched_at}
+            write_bytes_atomic(path, encode_header(header) + entry.compressed_body)
+
+        return response
+
+    def _write_to_cache(self, url: str, response: DownloadResponse):
+        write_bytes_atomic(
+            self._get_cache_path(url), encode_cache_entry(response, self._compression)
+        )
+
+    async def _run_in_executor[*Ts, T](self, fn: Callable[[*Ts], T], *args: *Ts) -> T:
+        # Cache I/O (and the (de)serialisation around it) runs on a dedicated
+        # pool, so large documents do not stall other coroutines
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._io_workers, thread_name_prefix="sec-cache-io"
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
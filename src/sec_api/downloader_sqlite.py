@@ -0,0 +1,325 @@
+import hashlib
+import sqlite3
+import time
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Final, cast, override
+from urllib.parse import urlsplit
+
+from httpx import Limits
+from pyrate_limiter import Limiter
+
+from .cache_format import (
+    CacheEntry,
+    CacheHeader,
+    CacheMetadata,
+    Compression,
+    compress,
+)
+from .downloader_base import BaseDownloader
+from .freshness import IFreshnessPolicy
+from .memory_cache import MemoryCache
+from .metrics import Metrics
+from .rate_control import AdaptiveRateController
+from .sqlite_worker import SqliteWorker
+from .typings import DownloadResponse, ProxyType
+
+# Only bump the access time of an entry when it is older than this, so
+# repeated hits on hot entries do not turn every read into a write
+ACCESS_TIME_RESOLUTION: Final = 60.0
+
+# Evict down to this fraction of the budget, so eviction runs in batches
+EVICTION_LOW_WATERMARK: Final = 0.9
+
+SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    status_code INTEGER NOT NULL,
+    last_modified TEXT NOT NULL,
+    content_type TEXT,
+    fetched_at REAL,
+    compression TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+"""
+
+METADATA_COLUMNS: Final = "url, status_code, last_modified, content_type, fetched_at"
+HEADER_COLUMNS: Final = f"{METADATA_COLUMNS}, compression, sha256, size"
+
+type MetadataRow = tuple[str, int, str, str | None, float | None]
+
+# The header columns and the body
+type ResponseRow = tuple[
+    str, int, str, str | None, float | None, Compression, str, int, bytes
+]
+
+type EntryRow = tuple[
+    str, int, str, str | None, float | None, Compression, str, int, int, float, bytes
+]
+
+
+def row_to_metadata(row: MetadataRow) -> CacheMetadata:
+    url, status_code, last_modified, content_type, fetched_at = row
+    metadata: CacheMetadata = {
+        "url": url,
+        "status_code": status_code,
+        "last_modified": last_modified,
+        "content_type": content_type,
+    }
+    if fetched_at is not None:
+        metadata["fetched_at"] = fetched_at
+    return metadata
+
+
+def row_to_response(row: ResponseRow) -> DownloadResponse | None:
+    header: CacheHeader = {
+        **row_to_metadata(row[:5]),
+        "compression": row[5],
+        "sha256": row[6],
+        "size": row[7],
+    }
+    try:
+        return CacheEntry(header, row[8]).to_response()
+    except (OSError, EOFError, UnicodeDecodeError, zlib.error):
+        return None
+
+
+def sum_stored_bytes(connection: sqlite3.Connection) -> int:
+    row = cast(
+        tuple[int],
+        connection.execute(
+            "SELECT COALESCE(SUM(stored_size), 0) FROM entries"
+        ).fetchone(),
+    )
+    return row[0]
+
+
+class SqliteCacheDownloader(BaseDownloader):
+    """
+    Keeps every cached response in a single SQLite database (WAL mode), keyed
+    by the full URL, and evicts least recently used entries once the stored
+    (compressed) size goes over `max_bytes`
+    """
+
+    _max_bytes: int | None
+    _compression: Compression
+    _sqlite: SqliteWorker
+    _stored_bytes: int = 0
+
+    def __init__(
+        self,
+        *,
+        user_agent: str,
+        database: str = ".data/cache.sqlite",
+        max_bytes: int | None = None,
+        rate_per_second: int | None = None,
+        proxy: ProxyType | None = None,
+        limits: Limits | None = None,
+        http2: bool = False,
+        freshness_policy: IFreshnessPolicy | None = None,
+        memory_cache: MemoryCache | None = None,
+        limiter: Limiter | None = None,
+        rate_controller: AdaptiveRateController | None = None,
+        adaptive: bool = True,
+        metrics: Metrics | None = None,
+        compression: Compression = "gzip",
+    ):
+        super().__init__(
+            user_agent=user_agent,
+            rate_per_second=rate_per_second,
+            proxy=proxy,
+            limits=limits,
+            http2=http2,
+            freshness_policy=freshness_policy,
+            memory_cache=memory_cache,
+            limiter=limiter,
+            rate_controller=rate_controller,
+            adaptive=adaptive,
+            metrics=metrics,
+        )
+        self._max_bytes = max_bytes
+        self._compression = compression
+        self._sqlite = SqliteWorker(
+            database,
+            SCHEMA,
+            thread_name_prefix="sec-cache-sqlite",
+            on_connect=self._on_connect,
+        )
+
+    @override
+    async def aclose(self) -> None:
+        await super().aclose()
+        await self._sqlite.aclose()
+
+    @override
+    async def read_from_cache_async(self, url: str) -> DownloadResponse | None:
+        return (await self.get_many_async([url])).get(url)
+
+    @override
+    async def read_cache_metadata_async(self, url: str) -> CacheMetadata | None:
+        return await self._sqlite.run(self._read_metadata, url)
+
+    @override
+    async def refresh_cache_async(
+        self, url: str, fetched_at: float
+    ) -> DownloadResponse | None:
+        return await self._sqlite.run(self._refresh, url, fetched_at)
+
+    @override
+    async def write_to_cache_async(self, url: str, response: DownloadResponse):
+        await self.put_many_async([(url, response)])
+
+    @override
+    def get_document_path(self, url: str) -> Path:
+        # Documents stay files, streamed to disk next to the database
+        return Path(self._sqlite.database).parent.joinpath(
+            "documents", urlsplit(url).path.lstrip("/")
+        )
+
+    async def get_many_async(self, urls: Iterable[str]) -> dict[str, DownloadResponse]:
+        """Cached responses for the URLs that are cached, in one transaction"""
+        return await self._sqlite.run(self._get_many, list(urls))
+
+    async def put_many_async(self, items: Iterable[tuple[str, DownloadResponse]]):
+        """Store responses in one transaction, then evict if over budget"""
+        rows = [self._make_row(url, response) for url, response in items]
+        evicted = await self._sqlite.run(self._put_many, rows)
+        if evicted and self._metrics is not None:
+            self._metrics.increment("cache_evictions_total", evicted, cache="sqlite")
+
+    async def get_stored_bytes_async(self) -> int:
+        return await self._sqlite.run(self._sum_stored_bytes)
+
+    def _make_row(self, url: str, response: DownloadResponse) -> EntryRow:
+        body = response["content"].encode("utf-8")
+        stored = compress(body, self._compression)
+        return (
+            url,
+            response["status_code"],
+            response["last_modified"],
+            response["content_type"],
+            response.get("fetched_at"),
+            self._compression,
+            hashlib.sha256(body).hexdigest(),
+            len(body),
+            len(stored),
+            time.time(),
+            stored,
+        )
+
+    def _on_connect(self, connection: sqlite3.Connection):
+        self._stored_bytes = sum_stored_bytes(connection)
+
+    def _sum_stored_bytes(self) -> int:
+        return sum_stored_bytes(self._sqlite.connect())
+
+    def _read_metadata(self, url: str) -> CacheMetadata | None:
+        row = cast(
+            MetadataRow | None,
+            self._sqlite.connect()
+            .execute(f"SELECT {METADATA_COLUMNS} FROM entries WHERE url = ?", (url,))
+            .fetchone(),
+        )
+        return None if row is None else row_to_metadata(row)
+
+    def _get_many(self, urls: list[str]) -> dict[str, DownloadResponse]:
+        connection = self._sqlite.connect()
+        now = time.time()
+        responses: dict[str, DownloadResponse] = {}
+        touched: list[tuple[float, str]] = []
+
+        with connection:
+            _ = connection.execute("BEGIN")
+            for url in urls:
+                row = cast(
+                    "tuple[*ResponseRow, float] | None",
+                    connection.execute(
+                        f"SELECT {HEADER_COLUMNS}, body, accessed_at FROM entries "
+                        + "WHERE url = ?",
+                        (url,),
+                    ).fetchone(),
+                )
+                if row is None:
+                    continue
+
+                response = row_to_response(row[:9])
+                if response is None:
+                    continue
+
+                responses[url] = response
+                if now - row[9] > ACCESS_TIME_RESOLUTION:
+                    touched.append((now, url))
+
+            if touched:
+                _ = connection.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE url = ?", touched
+                )
+
+        return responses
+
+    def _put_many(self, rows: list[EntryRow]) -> int:
+        """Stores `rows`, returning the number of entries evicted"""
+        connection = self._sqlite.connect()
+
+        with connection:
+            _ = connection.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                previous = cast(
+                    tuple[int] | None,
+                    connection.execute(
+                        "SELECT stored_size FROM entries WHERE url = ?", (row[0],)
+                    ).fetchone(),
+                )
+                _ = connection.execute(
+                    "INSERT OR REPLACE INTO entries (url, status_code, last_modified, "
+                    + "content_type, fetched_at, compression, sha256, size, "
+                    + "stored_size, accessed_at, body) "
+                    + "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                self._stored_bytes += row[8] - (0 if previous is None else previous[0])
+
+        if self._max_bytes is not None and self._stored_bytes > self._max_bytes:
+            return self._evict(self._max_bytes)
+        return 0
+
+    def _refresh(self, url: str, fetched_at: float) -> DownloadResponse | None:
+        connection = self._sqlite.connect()
+        with connection:
+            _ = connection.execute("BEGIN IMMEDIATE")
+            _ = connection.execute(
+                "UPDATE entries SET fetched_at = ? WHERE url = ?", (fetched_at, url)
+            )
+        return self._get_many([url]).get(url)
+
+    def _evict(self, max_bytes: int) -> int:
+        connection = self._sqlite.connect()
+        target = int(max_bytes * EVICTION_LOW_WATERMARK)
+
+        with connection:
+            _ = connection.execute("BEGIN IMMEDIATE")
+            # Other processes may share the database, so recount first
+            self._stored_bytes = self._sum_stored_bytes()
+            if self._stored_bytes <= max_bytes:
+                return 0
+
+            evicted: list[tuple[str]] = []
+            cursor = connection.execute(
+                "SELECT url, stored_size FROM entries ORDER BY accessed_at, rowid"
+            )
+            for url, stored_size in cast(Iterable[tuple[str, int]], cursor):
+                if self._stored_bytes <= target:
+                    break
+                evicted.append((url,))
+                self._stored_bytes -= stored_size
+            cursor.close()
+
+            _ = connection.executemany("DELETE FROM entries WHERE url = ?", evicted)
+
+        return len(evicted)
@@ -0,0 +1,473 @@
+"""
+Clean text and item sections of downloaded filing documents
+
+HTML and inline XBRL documents are turned into plain text, one line per block,
+with scripts, styles, the hidden iXBRL header and numeric tables left out. The
+text is split into the filing's items ("Item 1A", "Item 7", ...). Parsing runs
+in a process pool, as it is CPU bound, and each result is cached next to the
+raw document with the SHA-256 of the content it came from, so a document is
+only extracted again when its content changes.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+from collections.abc import AsyncGenerator, AsyncIterable, Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Final, TypedDict, override
+from urllib.parse import urlsplit
+
+from .fileio import read_bytes, write_bytes_atomic
+from .json_decoder import JsonDecoder
+from .process_pool import spawn_pool
+from .scheduler import ScheduledResult
+from .typings import DownloadResponse
+
+logger = logging.getLogger(__name__)
+
+# Bumped when extraction changes, so cached results are made again
+EXTRACTION_VERSION: Final = 1
+
+EXTRACTED_SUFFIX: Final = ".text.json"
+
+BLOCK_TAGS: Final = frozenset(
+    {
+        "address",
+        "article",
+        "aside",
+        "blockquote",
+        "br",
+        "caption",
+        "center",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "figcaption",
+        "figure",
+        "footer",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "header",
+        "hr",
+        "li",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "table",
+        "tr",
+        "ul",
+    }
+)
+
+CELL_TAGS: Final = frozenset({"td", "th"})
+
+# Never shown: the iXBRL header holds contexts, units and hidden facts
+SKIPPED_TAGS: Final = frozenset(
+    {"head", "ix:header", "noscript", "script", "style", "template", "title"}
+)
+
+VOID_TAGS: Final = frozenset(
+    {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta"}
+)
+
+HIDDEN_STYLE: Final = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+
+LINE_BREAKS: Final = str.maketrans("\r\n", "  ")
+
+# A cell holding a figure and nothing else: "1,234", "(56.7)", "12%", "—"
+NUMERIC_CELL: Final = re.compile(r"^[\s$€£¥()%.,\-–—]*\d[\d\s$€£¥()%.,\-–—]*$")
+# Cells without a digit or a letter ("$", ")") say nothing about the table
+BLANK_CELL: Final = re.compile(r"^[\W_]*$")
+
+PART_HEADING: Final = re.compile(r"^part\s+(iv|i{1,3})\b", re.IGNORECASE)
+ITEM_HEADING: Final = re.compile(
+    r"^item\s+(\d{1,2}[a-c]?)\b\s*[.:\-–—]?\s*(.{0,200})$", re.IGNORECASE
+)
+
+
+class Section(TypedDict):
+    """An item of the document, as offsets into its text"""
+
+    part: str | None
+    item: str
+    title: str
+    start: int
+    end: int
+
+
+class ExtractedDocument(TypedDict):
+    url: str
+    sha256: str
+    version: int
+    text: str
+    sections: list[Section]
+
+
+ExtractedDocumentDecoder = JsonDecoder(ExtractedDocument)
+
+
+class TextExtractor(HTMLParser):
+    """Collects the visible text of an HTML or inline XBRL document"""
+
+    numeric_tables: bool
+    _parts: list[str]
+    # Tag of the hidden element being skipped, and how deep in it we are
+    _skipping: str | None
+    _skip_depth: int
+    _table_depth: int
+    _table_start: int
+    _table_facts: bool
+    _cell_start: int
+    _cells: int
+    _numeric_cells: int
+
+    def __init__(self, *, numeric_tables: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.numeric_tables = numeric_tables
+        self._parts = []
+        self._skipping = None
+        self._skip_depth = 0
+        self._table_depth = 0
+        self._table_start = 0
+        self._table_facts = False
+        self._cell_start = 0
+        self._cells = 0
+        self._numeric_cells = 0
+
+    def get_text(self) -> str:
+        lines = (" ".join(line.split()) for line in "".join(self._parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+    @override
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+        if self._skipping is not None:
+            if tag == self._skipping:
+                self._skip_depth += 1
+            return
+
+        if tag in SKIPPED_TAGS or (
+            tag not in VOID_TAGS
+            and any(
+                name == "style" and value and HIDDEN_STYLE.search(value)
+                for name, value in attrs
+            )
+        ):
+            self._skipping, self._skip_depth = tag, 1
+            return
+
+        if tag == "table":
+            self._table_depth += 1
+            if self._table_depth == 1:
+                self._parts.append("\n")
+                self._table_start = len(self._parts)
+                self._table_facts = False
+                self._cells = self._numeric_cells = 0
+        elif tag in CELL_TAGS:
+            self._parts.append(" ")
+            self._cell_start = len(self._parts)
+        elif tag == "ix:nonfraction":
+            self._table_facts = True
+
+        if tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    @override
+    def handle_endtag(self, tag: str):
+        if self._skipping is not None:
+            if tag == self._skipping:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skipping = None
+            return
+
+        if tag in CELL_TAGS and self._table_depth:
+            cell = "".join(self._parts[self._cell_start :])
+            if not BLANK_CELL.match(cell):
+                self._cells += 1
+                self._numeric_cells += bool(NUMERIC_CELL.match(cell))
+        elif tag == "table" and self._table_depth:
+            self._table_depth -= 1
+            if self._table_depth == 0 and self._is_numeric_table():
+                del self._parts[self._table_start :]
+
+        if tag in BLOCK_TAGS:
+            self._parts.append("\n")
+
+    @override
+    def handle_data(self, data: str):
+        if self._skipping is None:
+            # Line breaks in the source are only whitespace
+            self._parts.append(data.translate(LINE_BREAKS))
+
+    def _is_numeric_table(self) -> bool:
+        # Financial statements: tagged iXBRL figures, or mostly figures
+        if self.numeric_tables:
+            return False
+        return self._table_facts or self._numeric_cells * 2 > self._cells
+
+
+def html_to_text(html: str, *, numeric_tables: bool = False) -> str:
+    parser = TextExtractor(numeric_tables=numeric_tables)
+    parser.feed(html)
+    parser.close()
+    return parser.get_text()
+
+
+def split_sections(text: str) -> list[Section]:
+    """
+    Items of the text, in order. An item listed more than once, as in a table
+    of contents, is the occurrence followed by the most text.
+    """
+    headings: list[tuple[int, str | None, str, str]] = []
+    part = None
+    offset = 0
+    for line in text.split("\n"):
+        if match := PART_HEADING.match(line):
+            part = match[1].upper()
+            headings.append((offset, part, "", ""))
+        elif match := ITEM_HEADING.match(line):
+            headings.append((offset, part, match[1].upper(), match[2].strip()))
+        offset += len(line) + 1
+
+    sections: dict[tuple[str | None, str], Section] = {}
+    for i, (start, part, item, title) in enumerate(headings):
+        if not item:
+            continue
+        end = headings[i + 1][0] - 1 if i + 1 < len(headings) else len(text)
+        best = sections.get((part, item))
+        if best is None or end - start > best["end"] - best["start"]:
+            sections[(part, item)] = Section(
+                part=part, item=item, title=title, start=start, end=end
+            )
+
+    # A contents listing before the first part heading has no part
+    in_parts = {item for part, item in sections if part is not None}
+    return sorted(
+        (
+            section
+            for (part, item), section in sections.items()
+            if part is not None or item not in in_parts
+        ),
+        key=lambda section: section["start"],
+    )
+
+
+def get_section_text(
+    document: ExtractedDocument, item: str, part: str | None = None
+) -> str | None:
+    """Text of `item` (e.g. `1A`), in `part` when the filing has parts"""
+    for section in document["sections"]:
+        if section["item"] == item.upper() and (
+            part is None or section["part"] == part.upper()
+        ):
+            return document["text"][section["start"] : section["end"]]
+    return None
+
+
+def get_sha256(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def document_to_text(
+    content: str, content_type: str, *, numeric_tables: bool = False
+) -> str:
+    if content_type.startswith("text/plain"):
+        return "\n".join(
+            " ".join(line.split()) for line in content.splitlines() if line.strip()
+        )
+    return html_to_text(content, numeric_tables=numeric_tables)
+
+
+def extract_document(
+    url: str,
+    content: str,
+    content_type: str,
+    sha256: str,
+    numeric_tables: bool = False,
+) -> ExtractedDocument:
+    """Text and sections of a document (in a worker)"""
+    text = document_to_text(content, content_type, numeric_tables=numeric_tables)
+    return {
+        "url": url,
+        "sha256": sha256,
+        "version": EXTRACTION_VERSION,
+        "text": text,
+        "sections": split_sections(text),
+    }
+
+
+class DocumentExtractor:
+    """
+    Extracts documents in worker processes, each result cached as
+    `<document path>.text.json` under `directory`, or not at all when it is
+    `None`. With the defaults it sits beside `LocalCacheDownloader`'s copy.
+    """
+
+    _directory: Path | None
+    _workers: int | None
+    _numeric_tables: bool
+    _pool: ProcessPoolExecutor | None = None
+    _executor: ThreadPoolExecutor | None = None
+
+    def __init__(
+        self,
+        directory: str | None = ".data",
+        *,
+        workers: int | None = None,
+        numeric_tables: bool = False,
+    ):
+        self._directory = None if directory is None else Path(directory)
+        self._workers = workers
+        self._numeric_tables = numeric_tables
+
+    async def aclose(self) -> None:
+        pool, self._pool = self._pool, None
+        executor, self._executor = self._executor, None
+        for shutdown in (pool, executor):
+            if shutdown is not None:
+                await asyncio.to_thread(shutdown.shutdown)
+
+    async def extract_async(self, response: DownloadResponse) -> ExtractedDocument:
+        url = response["url"]
+        sha256, cached = await self._run_in_executor(
+            self._read_cached, url, response["content"]
+        )
+        if cached is not None:
+            return cached
+
+        if self._pool is None:
+            self._pool = spawn_pool(self._workers)
+        document = await asyncio.get_running_loop().run_in_executor(
+            self._pool,
+            extract_document,
+            url,
+            response["content"],
+            response["content_type"] or "",
+            sha256,
+            self._numeric_tables,
+        )
+        await self._run_in_executor(self._write_cached, document)
+        return document
+
+    async def iter_extracted_async[I](
+        self,
+        results: AsyncIterable[ScheduledResult[I, DownloadResponse]],
+        window: int | None = None,
+    ) -> AsyncGenerator[ScheduledResult[I, ExtractedDocument]]:
+        """
+        Extracts documents as they come out of a download stream, such as
+        `Company.iter_primary_documents_async`, yielding in completion order.
+        Failed downloads pass through with their error. Downloads are only
+        pulled while fewer than `window` (default: twice the workers)
+        documents wait for extraction.
+        """
+        window = window or 2 * (self._workers or os.cpu_count() or 1)
+        iterator = aiter(results)
+        pending: set[asyncio.Task[ScheduledResult[I, ExtractedDocument]]] = set()
+        pulling: asyncio.Task[ScheduledResult[I, DownloadResponse] | None] | None = None
+        exhausted = False
+
+        async def pull() -> ScheduledResult[I, DownloadResponse] | None:
+            return await anext(iterator, None)
+
+        async def extract_one(
+            item: I, response: DownloadResponse
+        ) -> ScheduledResult[I, ExtractedDocument]:
+            result = ScheduledResult[I, ExtractedDocument](item=item)
+            try:
+                result["value"] = await self.extract_async(response)
+            except Exception as error:
+                # Parsing arbitrary documents can fail in any way, and one
+                # failure must not end the stream: it goes back with its item
+                logger.warning("Extracting %s failed", response["url"], exc_info=error)
+                result["error"] = error
+            return result
+
+        try:
+            while True:
+                if pulling is None and not exhausted and len(pending) < window:
+                    pulling = asyncio.create_task(pull())
+                waiting = pending if pulling is None else pending | {pulling}
+                if not waiting:
+                    return
+
+                done, _ = await asyncio.wait(
+                    waiting, return_when=asyncio.FIRST_COMPLETED
+                )
+                if pulling is not None and pulling in done:
+                    downloaded, pulling = pulling.result(), None
+                    if downloaded is None:
+                        exhausted = True
+                    elif "value" in downloaded:
+                        pending.add(
+                            asyncio.create_task(
+                                extract_one(downloaded["item"], downloaded["value"])
+                            )
+                        )
+                    elif "error" in downloaded:
+                        yield ScheduledResult[I, ExtractedDocument](
+                            item=downloaded["item"], error=downloaded["error"]
+                        )
+
+                for task in pending & done:
+                    pending.discard(task)
+                    yield task.result()
+        finally:
+            # The consumer stopped early, do not leave work running
+            for task in pending:
+                _ = task.cancel()
+            if pulling is not None:
+                _ = pulling.cancel()
+                _ = await asyncio.gather(pulling, return_exceptions=True)
+            if pending:
+                _ = await asyncio.gather(*pending, return_exceptions=True)
+
+    def get_path(self, url: str) -> Path | None:
+        if self._directory is None:
+            return None
+        path = Path(self._directory, urlsplit(url).path.lstrip("/"))
+        return path.with_name(path.name + EXTRACTED_SUFFIX)
+
+    def _read_cached(
+        self, url: str, content: str
+    ) -> tuple[str, ExtractedDocument | None]:
+        sha256 = get_sha256(content)
+        path = self.get_path(url)
+        data = None if path is None else read_bytes(path)
+        if data is None:
+            return sha256, None
+
+        try:
+            document = ExtractedDocumentDecoder(data)
+        except ValueError:
+            return sha256, None
+        if document["sha256"] != sha256 or document["version"] != EXTRACTION_VERSION:
+            return sha256, None
+        return sha256, document
+
+    def _write_cached(self, document: ExtractedDocument):
+        path = self.get_path(document["url"])
+        if path is not None:
+            write_bytes_atomic(path, json.dumps(document).encode())
+
+    async def _run_in_executor[*Ts, T](self, fn: Callable[[*Ts], T], *args: *Ts) -> T:
+        # Hashing and cache I/O stay off the event loop, parsing goes to the
+        # process pool
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="sec-extraction-io"
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
@@ -0,0 +1,261 @@
+"""
+Local columnar store of every company's XBRL facts, loaded from SEC's nightly
+bulk `companyfacts.zip` instead of one rate limited request per company
+
+The archive holds one `CIK##########.json` per company, the same JSON as the
+companyfacts API. Worker processes parse a batch of companies each into a
+`FactsTable`, sort it by concept, unit and frame, and write it as a segment
+file. A query maps each segment and bisects its key column for the run of
+rows it asks for, so "Revenues of every filer in CY2024Q1" only reads those
+facts.
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import re
+import shutil
+import time
+import zipfile
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Final, TypedDict, cast
+
+from .constants import COMPANYFACTS_ZIP_URL
+from .downloader_base import BaseDownloader
+from .fileio import write_bytes_atomic
+from .filings_store import iter_bounded
+from .process_pool import spawn_pool
+from .xbrl import (
+    CompanyFactsJSON,
+    FactsTable,
+    FactsTableHeader,
+    find_key_range,
+    get_concept,
+    read_facts_header,
+)
+
+MEMBER: Final = re.compile(r"^CIK(\d{10})\.json$")
+
+# Companies per segment, parsed and sorted by one worker process
+BATCH_SIZE: Final = 200
+
+SEGMENT_SUFFIX: Final = ".facts"
+
+
+class FactsIngestStats(TypedDict):
+    companies: int
+    facts: int
+    segments: int
+    seconds: float
+
+
+def write_segment(directory: str, archive: str, members: list[str]) -> int:
+    """Writes the facts of `members` as one sorted segment (in a worker)"""
+    table = FactsTable()
+    with zipfile.ZipFile(archive) as zf:
+        for member in members:
+            match = MEMBER.match(member)
+            if match is None:
+                continue
+            data = cast(CompanyFactsJSON, json.loads(zf.read(member)))
+            # Companies without XBRL filings have no facts at all
+            _ = data.setdefault("facts", {})
+            data["cik"] = int(match[1])
+            table.extend_company_facts(data)
+
+    path = Path(directory, Path(members[0]).stem + SEGMENT_SUFFIX)
+    write_bytes_atomic(path, table.sort().encode())
+    return len(table)
+
+
+class FactsSegment:
+    """A segment file, mapped, with its header read once"""
+
+    _file: int
+    _map: mmap.mmap
+    _header: FactsTableHeader
+    _body: memoryview
+    _keys: memoryview
+    _codes: dict[str, int] | None = None
+
+    def __init__(self, path: Path):
+        self._file = os.open(path, os.O_RDONLY)
+        self._map = mmap.mmap(self._file, 0, access=mmap.ACCESS_READ)
+        parsed = read_facts_header(memoryview(self._map))
+        if parsed is None:
+            self.close()
+            raise ValueError(f"Not a facts segment: {path}")
+        self._header, self._body = parsed
+        key = self._header["sections"].get("key")
+        if key is None:
+            # `FactsTable.encode` leaves the keys out above `MAX_SORTED_STRINGS`
+            self.close()
+            raise ValueError(f"Facts segment without sort keys: {path}")
+        start, end = key
+        self._keys = self._body[start:end].cast("Q")
+
+    def select(
+        self, concept: str, unit: str | None, frame: str | None
+    ) -> FactsTable | None:
+        if self._codes is None:
+            strings = self._header["strings"]
+            self._codes = dict(zip(strings, range(len(strings))))
+
+        start, end = find_key_range(self._codes, self._keys, concept, unit, frame)
+        if start == end:
+            return None
+        table = FactsTable.from_sections(self._header, self._body, start, end)
+        if unit is None and frame is not None:
+            table = table.filter(frame=frame)
+        return table
+
+    def close(self):
+        # Views into the map must go before it can close
+        if hasattr(self, "_keys"):
+            self._keys.release()
+        if hasattr(self, "_body"):
+            self._body.release()
+        self._map.close()
+        os.close(self._file)
+
+
+class FactsStore:
+    """
+    Directory of segment files holding the facts of the bulk archive, queried
+    by concept across every company
+    """
+
+    _directory: Path
+    _executor: ThreadPoolExecutor | None = None
+    _segments: list[FactsSegment] | None = None
+
+    def __init__(self, directory: str = ".data/companyfacts"):
+        self._directory = Path(directory)
+
+    async def aclose(self) -> None:
+        if self._executor is not None:
+            await self._run_in_executor(self._close)
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown)
+
+    async def ingest_archive_async(
+        self, archive: str | Path, workers: int | None = None
+    ) -> FactsIngestStats:
+        """
+        Replaces the store with a local copy of the archive, parsing with up
+        to `workers` processes. Queries see the old facts until it is done.
+        """
+        return await self._run_in_executor(self._ingest_archive, archive, workers)
+
+    async def download_and_ingest_async(
+        self,
+        downloader: BaseDownloader,
+        url: str = COMPANYFACTS_ZIP_URL,
+        workers: int | None = None,
+    ) -> FactsIngestStats:
+        """Streams the archive to disk next to the store, then ingests it"""
+        archive = self._directory.with_name("companyfacts.zip")
+        _ = await downloader.download_to_file_async(url, archive)
+        return await self.ingest_archive_async(archive, workers)
+
+    async def query_async(
+        self,
+        concept: str,
+        *,
+        unit: str | None = None,
+        frame: str | None = None,
+        cik: int | None = None,
+    ) -> FactsTable:
+        """Facts of `concept` (`taxonomy:tag`) of every company, or of `cik`"""
+        return await self._run_in_executor(self._query, concept, unit, frame, cik)
+
+    async def get_frame_async(
+        self, taxonomy: str, tag: str, unit: str, period: str
+    ) -> FactsTable:
+        """The facts the frames endpoint would give, e.g. for `CY2024Q1`"""
+        return await self.query_async(
+            get_concept(taxonomy, tag), unit=unit, frame=period
+        )
+
+    def _ingest_archive(
+        self, archive: str | Path, workers: int | None = None
+    ) -> FactsIngestStats:
+        start = time.perf_counter()
+        stats: FactsIngestStats = {
+            "companies": 0,
+            "facts": 0,
+            "segments": 0,
+            "seconds": 0.0,
+        }
+
+        with zipfile.ZipFile(archive) as zf:
+            members = [name for name in zf.namelist() if MEMBER.match(name)]
+        batches = [
+            members[i : i + BATCH_SIZE] for i in range(0, len(members), BATCH_SIZE)
+        ]
+
+        # Segments are written aside, then swapped in whole
+        ingesting = self._directory.with_name(self._directory.name + ".ingesting")
+        shutil.rmtree(ingesting, ignore_errors=True)
+        ingesting.mkdir(parents=True)
+
+        workers = workers or os.cpu_count() or 1
+        with spawn_pool(workers) as executor:
+            for facts in iter_bounded(
+                executor,
+                partial(write_segment, str(ingesting)),
+                str(archive),
+                batches,
+                workers * 2,
+            ):
+                stats["facts"] += facts
+                stats["segments"] += 1
+
+        stats["companies"] = len(members)
+        self._close()
+        replaced = self._directory.with_name(self._directory.name + ".replaced")
+        shutil.rmtree(replaced, ignore_errors=True)
+        if self._directory.exists():
+            _ = self._directory.rename(replaced)
+        _ = ingesting.rename(self._directory)
+        shutil.rmtree(replaced, ignore_errors=True)
+
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def _query(
+        self, concept: str, unit: str | None, frame: str | None, cik: int | None
+    ) -> FactsTable:
+        tables = [
+            table
+            for segment in self._get_segments()
+            if (table := segment.select(concept, unit, frame)) is not None
+        ]
+        result = FactsTable.concat(tables)
+        return result if cik is None else result.filter(cik=cik)
+
+    def _get_segments(self) -> list[FactsSegment]:
+        if self._segments is None:
+            paths = sorted(self._directory.glob(f"*{SEGMENT_SUFFIX}"))
+            self._segments = [FactsSegment(path) for path in paths]
+        return self._segments
+
+    def _close(self):
+        segments, self._segments = self._segments, None
+        for segment in segments or []:
+            segment.close()
+
+    async def _run_in_executor[*Ts, T](self, fn: Callable[[*Ts], T], *args: *Ts) -> T:
+        # A single worker thread owns the mapped segments, which also
+        # serialises queries with an ingestion swapping them out
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="sec-facts-store"
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
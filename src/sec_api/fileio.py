@@ -0,0 +1,37 @@
+import os
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+
+# Blocking helpers, meant to be run off the event loop (e.g. in an executor)
+
+
+def read_bytes(path: Path) -> bytes | None:
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_bytes_atomic(path: Path, data: bytes, *, fsync: bool = False):
+    """
+    Write to a temporary file next to `path` and rename it into place, so
+    readers see either the old or the new content and never a partial write
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            _ = file.write(data)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(temp_name)
+        raise
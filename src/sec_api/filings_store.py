@@ -0,0 +1,281 @@
+"""
+Local index of every company's filings, loaded from SEC's nightly bulk
+`submissions.zip` instead of one rate limited request per company
+
+The archive holds `CIK##########.json` (the same JSON as the submissions API)
+and, for long-lived filers, `CIK##########-submissions-###.json` pages of older
+filings. Members are parsed in worker processes, a batch of companies at a
+time, and each batch is committed on its own, so reads are served while an
+archive is ingested.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+import zipfile
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Final, TypedDict, cast
+
+from .constants import SUBMISSIONS_ZIP_URL
+from .downloader_base import BaseDownloader
+from .filings_table import FilingsTable
+from .process_pool import spawn_pool
+from .sqlite_worker import SqliteWorker
+from .typings import SubmissionsJSON_Filings_File
+
+# Filing fields, in column order, and their value when a page omits them
+FILING_COLUMNS: Final[dict[str, object]] = {
+    "accessionNumber": "",
+    "filingDate": "",
+    "reportDate": "",
+    "acceptanceDateTime": "",
+    "act": "",
+    "form": "",
+    "fileNumber": "",
+    "filmNumber": "",
+    "items": "",
+    "core_type": "",
+    "size": 0,
+    "isXBRL": 0,
+    "isInlineXBRL": 0,
+    "primaryDocument": "",
+    "primaryDocDescription": "",
+}
+
+SCHEMA: Final = f"""
+CREATE TABLE IF NOT EXISTS companies (
+    cik INTEGER PRIMARY KEY,
+    name TEXT,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS filings (
+    cik INTEGER NOT NULL,
+    {", ".join(FILING_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS filings_cik ON filings (cik);
+"""
+
+INSERT_FILING: Final = (
+    f"INSERT INTO filings (cik, {', '.join(FILING_COLUMNS)}) "
+    + f"VALUES (?, {', '.join('?' * len(FILING_COLUMNS))})"
+)
+
+MAIN_MEMBER: Final = re.compile(r"^CIK(\d{10})\.json$")
+
+# Companies per task sent to a worker process
+BATCH_SIZE: Final = 100
+
+type FilingRow = tuple[object, ...]
+type CompanyRows = tuple[int, str | None, list[FilingRow]]
+
+
+type FilingColumns = dict[str, list[object]]
+
+
+# What is read of a submissions JSON, which is not validated: any part may
+# be missing
+class ArchiveFilings(TypedDict, total=False):
+    recent: FilingColumns
+    files: list[SubmissionsJSON_Filings_File]
+
+
+class ArchiveSubmissions(TypedDict, total=False):
+    name: str
+    filings: ArchiveFilings
+
+
+class IngestStats(TypedDict):
+    companies: int
+    filings: int
+    seconds: float
+
+
+def columns_to_rows(cik: int, columns: FilingColumns) -> list[FilingRow]:
+    """Rows of the filings columns, ValueError when their lengths differ"""
+    count = len(columns.get("accessionNumber", []))
+    values = [
+        columns.get(name) or [default] * count
+        for name, default in FILING_COLUMNS.items()
+    ]
+    return [(cik, *row) for row in zip(*values, strict=True)]
+
+
+def read_company_members(archive: str, members: list[str]) -> list[CompanyRows]:
+    """Filings of the companies whose main member is in `members` (in a worker)"""
+    companies: list[CompanyRows] = []
+
+    with zipfile.ZipFile(archive) as zf:
+        names = set(zf.namelist())
+
+        for member in members:
+            match = MAIN_MEMBER.match(member)
+            if match is None:
+                continue
+
+            cik = int(match[1])
+            try:
+                data = cast(ArchiveSubmissions, json.loads(zf.read(member)))
+                filings = data.get("filings", {})
+                rows = columns_to_rows(cik, filings.get("recent", {}))
+
+                # Older filings, newest page first like `recent`
+                for page in filings.get("files", []):
+                    if page["name"] in names:
+                        page_columns = cast(
+                            FilingColumns, json.loads(zf.read(page["name"]))
+                        )
+                        rows.extend(columns_to_rows(cik, page_columns))
+            except ValueError:
+                # Not JSON, or columns of different lengths: the company is
+                # left out rather than stored with some of its filings
+                continue
+
+            companies.append((cik, data.get("name"), rows))
+
+    return companies
+
+
+def iter_bounded[T](
+    executor: ProcessPoolExecutor,
+    fn: Callable[[str, list[str]], T],
+    archive: str,
+    batches: list[list[str]],
+    window: int,
+) -> Iterator[T]:
+    """Results of `fn` per batch in order, with at most `window` in flight"""
+    pending: list[Future[T]] = []
+    for batch in batches:
+        pending.append(executor.submit(fn, archive, batch))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+
+async def iter_bounded_async[T](
+    executor: ProcessPoolExecutor,
+    fn: Callable[[str, list[str]], T],
+    archive: str,
+    batches: list[list[str]],
+    window: int,
+) -> AsyncIterator[T]:
+    """`iter_bounded`, awaiting the results instead of blocking on them"""
+    loop = asyncio.get_running_loop()
+    pending: list[asyncio.Future[T]] = []
+    try:
+        for batch in batches:
+            pending.append(loop.run_in_executor(executor, fn, archive, batch))
+            if len(pending) >= window:
+                yield await pending.pop(0)
+        for future in pending:
+            yield await future
+    finally:
+        for future in pending:
+            _ = future.cancel()
+
+
+def list_main_members(archive: str | Path) -> list[str]:
+    with zipfile.ZipFile(archive) as zf:
+        return [name for name in zf.namelist() if MAIN_MEMBER.match(name)]
+
+
+class FilingsStore:
+    """
+    SQLite store of filings ingested from the bulk submissions archive, that
+    `Company` reads from before falling back to the submissions API
+    """
+
+    _sqlite: SqliteWorker
+
+    def __init__(self, database: str = ".data/filings.sqlite"):
+        self._sqlite = SqliteWorker(
+            database, SCHEMA, thread_name_prefix="sec-filings-store"
+        )
+
+    async def aclose(self) -> None:
+        await self._sqlite.aclose()
+
+    async def get_filings_async(self, cik: str | int) -> FilingsTable | None:
+        """Filings of the company, newest first, or None if never ingested"""
+        return await self._sqlite.run(self._get_filings, int(cik))
+
+    async def ingest_archive_async(
+        self, archive: str | Path, workers: int | None = None
+    ) -> IngestStats:
+        """
+        Loads a local copy of the archive, parsing with up to `workers`
+        processes. Companies are readable as soon as their batch is committed.
+        """
+        start = time.perf_counter()
+        stats: IngestStats = {"companies": 0, "filings": 0, "seconds": 0.0}
+
+        members = await asyncio.to_thread(list_main_members, archive)
+        batches = [
+            members[i : i + BATCH_SIZE] for i in range(0, len(members), BATCH_SIZE)
+        ]
+
+        workers = workers or os.cpu_count() or 1
+        executor = spawn_pool(workers)
+        try:
+            async for companies in iter_bounded_async(
+                executor, read_company_members, str(archive), batches, workers * 2
+            ):
+                # One write per batch, so queued reads run in between
+                stats["filings"] += await self._sqlite.run(
+                    self._insert_companies, companies
+                )
+                stats["companies"] += len(companies)
+        finally:
+            await asyncio.to_thread(executor.shutdown)
+
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    async def download_and_ingest_async(
+        self,
+        downloader: BaseDownloader,
+        url: str = SUBMISSIONS_ZIP_URL,
+        workers: int | None = None,
+    ) -> IngestStats:
+        """Streams the archive to disk next to the database, then ingests it"""
+        archive = Path(self._sqlite.database).with_name("submissions.zip")
+        _ = await downloader.download_to_file_async(url, archive)
+        return await self.ingest_archive_async(archive, workers)
+
+    def _insert_companies(self, companies: list[CompanyRows]) -> int:
+        connection = self._sqlite.connect()
+        ingested_at = time.time()
+        with connection:
+            _ = connection.execute("BEGIN IMMEDIATE")
+            for cik, name, rows in companies:
+                _ = connection.execute("DELETE FROM filings WHERE cik = ?", (cik,))
+                _ = connection.executemany(INSERT_FILING, rows)
+                _ = connection.execute(
+                    "INSERT OR REPLACE INTO companies VALUES (?, ?, ?)",
+                    (cik, name, ingested_at),
+                )
+        return sum(len(rows) for _, _, rows in companies)
+
+    def _get_filings(self, cik: int) -> FilingsTable | None:
+        connection = self._sqlite.connect()
+        if (
+            connection.execute(
+                "SELECT 1 FROM companies WHERE cik = ?", (cik,)
+            ).fetchone()
+            is None
+        ):
+            return None
+
+        rows: list[FilingRow] = connection.execute(
+            f"SELECT {', '.join(FILING_COLUMNS)} FROM filings WHERE cik = ? "
+            + "ORDER BY rowid",
+            (cik,),
+        ).fetchall()
+        columns = {
+            name: [row[i] for row in rows] for i, name in enumerate(FILING_COLUMNS)
+        }
+        return FilingsTable(str(cik).rjust(10, "0"), columns)  # pyright: ignore[reportArgumentType]
@@ -0,0 +1,263 @@
+"""
+Columnar filings: the parallel arrays SEC sends in `filings.recent`, with forms
+dictionary-encoded and dates as integer days. Queries go through indexes built
+once per table, on first use: the rows sorted by each date field, for range
+lookups by bisection, and the rows of each form. `Filing` dicts are only built
+for the rows a caller asks for.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import UTC, date, datetime
+from typing import Final
+
+from .typings import DateField, Filing, SubmissionsJSON_Filings_Recent
+
+# Day number (or second) of an empty date, which SEC sends for some forms
+EMPTY_DAY: Final = 0
+
+SECONDS_PER_DAY: Final = 24 * 60 * 60
+
+
+def date_to_day(value: str) -> int:
+    return date.fromisoformat(value[:10]).toordinal() if value else EMPTY_DAY
+
+
+def datetime_to_second(value: str, *, end: bool = False) -> int:
+    """Unix time of an ISO datetime, or of the start (or `end`) of an ISO date"""
+    if not value:
+        return EMPTY_DAY
+    if len(value) == 10:
+        start = datetime.fromisoformat(value).replace(tzinfo=UTC).timestamp()
+        return int(start) + (SECONDS_PER_DAY - 1 if end else 0)
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return int(moment.timestamp())
+
+
+def to_days(values: Iterable[str]) -> array[int]:
+    days: dict[str, int] = {}
+    result = array("i")
+    for value in values:
+        day = days.get(value)
+        if day is None:
+            day = days[value] = date_to_day(value)
+        result.append(day)
+    return result
+
+
+class SortedIndex:
+    """Rows ordered by an integer column, for range lookups by bisection"""
+
+    _keys: array[int]
+    _rows: array[int]
+
+    def __init__(self, column: Sequence[int]):
+        self._rows = array("I", sorted(range(len(column)), key=column.__getitem__))
+        self._keys = array(column.typecode if isinstance(column, array) else "q")
+        self._keys.extend(column[i] for i in self._rows)
+
+    def bounds(self, low: int | None, high: int | None) -> tuple[int, int]:
+        """Positions of the rows with `low <= key <= high`"""
+        start = 0 if low is None else bisect_left(self._keys, low)
+        end = len(self._keys) if high is None else bisect_right(self._keys, high)
+        return start, end
+
+    def rows(self, start: int, end: int) -> array[int]:
+        return self._rows[start:end]
+
+
+class FilingsTable:
+    _cik: str
+    # Distinct forms, `_form` and `_core_type` hold indexes into it
+    _forms: list[str]
+    _form_codes: dict[str, int]
+    _form: array[int]
+    _core_type: array[int]
+    _report_day: array[int]
+    _filing_day: array[int]
+    _size: array[int]
+    _is_xbrl: array[int]
+    _is_inline_xbrl: array[int]
+    _accession_number: list[str]
+    _report_date: list[str]
+    _filing_date: list[str]
+    _acceptance_date_time: list[str]
+    _act: list[str]
+    _file_number: list[str]
+    _film_number: list[str]
+    _items: list[str]
+    _primary_document: list[str]
+    _primary_doc_description: list[str]
+    _indexes: dict[DateField, SortedIndex]
+    # Rows of each form code, in table order
+    _postings: list[array[int]] | None = None
+    _acceptance_second: array[int] | None = None
+
+    def __init__(self, cik: str, columns: SubmissionsJSON_Filings_Recent):
+        self._cik = cik
+        self._forms = []
+        self._form_codes = {}
+        self._form = array("H", map(self._encode_form, columns["form"]))
+        self._core_type = array("H", map(self._encode_form, columns["core_type"]))
+        self._report_day = to_days(columns["reportDate"])
+        self._filing_day = to_days(columns["filingDate"])
+        self._size = array("q", columns["size"])
+        self._is_xbrl = array("b", columns["isXBRL"])
+        self._is_inline_xbrl = array("b", columns["isInlineXBRL"])
+        # Strings stay as the lists they were parsed into, shared with the
+        # parsed JSON, for building rows
+        self._accession_number = columns["accessionNumber"]
+        self._report_date = columns["reportDate"]
+        self._filing_date = columns["filingDate"]
+        self._acceptance_date_time = columns["acceptanceDateTime"]
+        self._act = columns["act"]
+        self._file_number = columns["fileNumber"]
+        self._film_number = columns["filmNumber"]
+        self._items = columns["items"]
+        self._primary_document = columns["primaryDocument"]
+        self._primary_doc_description = columns["primaryDocDescription"]
+        self._indexes = {}
+
+    def __len__(self) -> int:
+        return len(self._accession_number)
+
+    def __getitem__(self, i: int) -> Filing:
+        return {
+            "cik": self._cik,
+            "accessionNumber": self._accession_number[i],
+            "filingDate": self._filing_date[i],
+            "reportDate": self._report_date[i],
+            "acceptanceDateTime": self._acceptance_date_time[i],
+            "act": self._act[i],
+            "form": self._forms[self._form[i]],
+            "fileNumber": self._file_number[i],
+            "filmNumber": self._film_number[i],
+            "items": self._items[i],
+            "core_type": self._forms[self._core_type[i]],
+            "size": self._size[i],
+            "isXBRL": self._is_xbrl[i],
+            "isInlineXBRL": self._is_inline_xbrl[i],
+            "primaryDocument": self._primary_document[i],
+            "primaryDocDescription": self._primary_doc_description[i],
+        }
+
+    def __iter__(self) -> Iterator[Filing]:
+        return map(self.__getitem__, range(len(self)))
+
+    @property
+    def forms(self) -> list[str]:
+        return list(self._forms)
+
+    def rows(self, indexes: Iterable[int]) -> list[Filing]:
+        return list(map(self.__getitem__, indexes))
+
+    def select(
+        self,
+        *,
+        form: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        is_xbrl: bool | None = None,
+        date_field: DateField = "reportDate",
+    ) -> list[int]:
+        """Indexes of the matching rows, in table order"""
+        rows: Sequence[int] = range(len(self))
+        code = None
+
+        if form is not None:
+            code = self._form_codes.get(form)
+            if code is None:
+                return []
+            rows = self._get_postings()[code]
+
+        if start_date is not None or end_date is not None:
+            index, low, high = self._get_date_range(date_field, start_date, end_date)
+            start, end = index.bounds(low, high)
+
+            if code is not None and len(rows) < end - start:
+                # Fewer filings of the form than in the range: check their dates
+                keys = self._get_date_keys(date_field)
+                rows = [
+                    i
+                    for i in rows
+                    if (low is None or low <= keys[i])
+                    and (high is None or keys[i] <= high)
+                ]
+            else:
+                in_range = index.rows(start, end)
+                if code is not None:
+                    forms = self._form
+                    in_range = [i for i in in_range if forms[i] == code]
+                rows = sorted(in_range)
+
+        if is_xbrl is not None:
+            flags = self._is_xbrl
+            rows = [i for i in rows if flags[i] == is_xbrl]
+
+        return list(rows)
+
+    def filter(
+        self,
+        *,
+        form: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        is_xbrl: bool | None = None,
+        date_field: DateField = "reportDate",
+    ) -> list[Filing]:
+        return self.rows(
+            self.select(
+                form=form,
+                start_date=start_date,
+                end_date=end_date,
+                is_xbrl=is_xbrl,
+                date_field=date_field,
+            )
+        )
+
+    def _get_date_keys(self, date_field: DateField) -> array[int]:
+        if date_field == "reportDate":
+            return self._report_day
+        if date_field == "filingDate":
+            return self._filing_day
+        if self._acceptance_second is None:
+            self._acceptance_second = array(
+                "q", map(datetime_to_second, self._acceptance_date_time)
+            )
+        return self._acceptance_second
+
+    def _get_date_range(
+        self, date_field: DateField, start_date: str | None, end_date: str | None
+    ) -> tuple[SortedIndex, int | None, int | None]:
+        index = self._indexes.get(date_field)
+        if index is None:
+            index = self._indexes[date_field] = SortedIndex(
+                self._get_date_keys(date_field)
+            )
+
+        if date_field == "acceptanceDateTime":
+            low = None if start_date is None else datetime_to_second(start_date)
+            high = None if end_date is None else datetime_to_second(end_date, end=True)
+        else:
+            low = None if start_date is None else date_to_day(start_date)
+            high = None if end_date is None else date_to_day(end_date)
+
+        return index, low, high
+
+    def _get_postings(self) -> list[array[int]]:
+        if self._postings is None:
+            postings = [array("I") for _ in self._forms]
+            for i, code in enumerate(self._form):
+                postings[code].append(i)
+            self._postings = postings
+        return self._postings
+
+    def _encode_form(self, form: str) -> int:
+        code = self._form_codes.get(form)
+        if code is None:
+            code = self._form_codes[form] = len(self._forms)
+            self._forms.append(form)
+        return code
@@ -0,0 +1,116 @@
+import math
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Final, Literal, TypedDict, override
+
+from .cache_format import CacheMetadata
+
+type CacheState = Literal["fresh", "stale", "expired"]
+
+
+class CacheDirective(TypedDict):
+    # Seconds a cached copy is served as-is, without asking the server
+    max_age: float
+    # Seconds past `max_age` a cached copy is still served, while it is
+    # revalidated in the background
+    stale_while_revalidate: float
+
+
+IMMUTABLE: Final[CacheDirective] = {
+    "max_age": math.inf,
+    "stale_while_revalidate": 0,
+}
+
+REVALIDATE: Final[CacheDirective] = {
+    "max_age": 0,
+    "stale_while_revalidate": 0,
+}
+
+DEFAULT_FRESHNESS_RULES: Final[list[tuple[str, CacheDirective]]] = [
+    # Filing documents never change once accepted
+    (r"/Archives/edgar/data/", IMMUTABLE),
+    (
+        r"/submissions/CIK\d{10}\.json$",
+        {"max_age": 10 * 60, "stale_while_revalidate": 60 * 60},
+    ),
+    # Pages of older filings only change when a page fills up
+    (
+        r"/submissions/CIK\d{10}-submissions-\d{3}\.json$",
+        {"max_age": 24 * 60 * 60, "stale_while_revalidate": 7 * 24 * 60 * 60},
+    ),
+    # Rebuilt nightly for the current quarter, past quarters no longer change
+    (
+        r"/full-index/\d{4}/QTR[1-4]/",
+        {"max_age": 12 * 60 * 60, "stale_while_revalidate": 0},
+    ),
+    # Published once each business day, and only rarely corrected after
+    (
+        r"/daily-index/\d{4}/QTR[1-4]/master\.\d{8}\.idx$",
+        {"max_age": 10 * 60, "stale_while_revalidate": 0},
+    ),
+    # Company facts change with each new filing, frames of past periods rarely
+    (
+        r"/api/xbrl/",
+        {"max_age": 60 * 60, "stale_while_revalidate": 24 * 60 * 60},
+    ),
+    (
+        r"/company_tickers_exchange\.json$",
+        {"max_age": 60 * 60, "stale_while_revalidate": 24 * 60 * 60},
+    ),
+]
+
+
+class IFreshnessPolicy(ABC):
+    @abstractmethod
+    def get_directive(self, url: str) -> CacheDirective:
+        pass
+
+
+class PatternFreshnessPolicy(IFreshnessPolicy):
+    """First rule whose pattern is found in the URL wins"""
+
+    _rules: list[tuple[re.Pattern[str], CacheDirective]]
+    _default: CacheDirective
+
+    def __init__(
+        self,
+        rules: list[tuple[str, CacheDirective]] = DEFAULT_FRESHNESS_RULES,
+        default: CacheDirective = REVALIDATE,
+    ):
+        self._rules = [(re.compile(pattern), directive) for pattern, directive in rules]
+        self._default = default
+
+    @override
+    def get_directive(self, url: str) -> CacheDirective:
+        for pattern, directive in self._rules:
+            if pattern.search(url) is not None:
+                return directive
+
+        return self._default
+
+
+def has_lifetime(directive: CacheDirective) -> bool:
+    return directive["max_age"] > 0 or directive["stale_while_revalidate"] > 0
+
+
+def get_cache_state(
+    directive: CacheDirective, cached: CacheMetadata, now: float | None = None
+) -> CacheState:
+    if directive["max_age"] == math.inf:
+        return "fresh"
+
+    # Entries cached before `fetched_at` was recorded have an unknown age
+    fetched_at = cached.get("fetched_at")
+    if fetched_at is None:
+        return "expired"
+
+    age = (time.time() if now is None else now) - fetched_at
+
+    if age <= directive["max_age"]:
+        return "fresh"
+
+    if age <= directive["max_age"] + directive["stale_while_revalidate"]:
+        return "stale"
+
+    return "expired"
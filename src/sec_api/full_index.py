@@ -0,0 +1,317 @@
+"""
+Local table of EDGAR's quarterly full index, for queries across every company
+without a request per company
+
+`full-index/YYYY/QTRn/master.gz` lists each filing of the quarter, one per
+line after a short header:
+
+    CIK|Company Name|Form Type|Date Filed|Filename
+    --------------------------------------------------------------------------
+    1000045|NICHOLAS FINANCIAL INC|10-Q|2024-02-14|edgar/data/1000045/0000950170-24-015223.txt
+
+Quarters are streamed to disk, parsed line by line and stored in SQLite,
+indexed by form, CIK and filing date. A quarter is ingested again only when
+its file changes, which for past quarters is never.
+"""
+
+import asyncio
+import gzip
+import time
+from collections.abc import Iterable, Iterator
+from datetime import UTC, date, datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Final, TypedDict, cast
+
+from .constants import FULL_INDEX_URL
+from .downloader_base import BaseDownloader
+from .singleflight import SingleFlight
+from .sqlite_worker import SqliteWorker
+from .typings import Quarter
+
+SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS full_index_quarters (
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    ingested_at REAL NOT NULL,
+    PRIMARY KEY (year, quarter)
+);
+CREATE TABLE IF NOT EXISTS full_index (
+    year INTEGER NOT NULL,
+    quarter INTEGER NOT NULL,
+    cik INTEGER NOT NULL,
+    company_name TEXT NOT NULL,
+    form TEXT NOT NULL,
+    filing_date TEXT NOT NULL,
+    accession_number TEXT NOT NULL,
+    filename TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS full_index_form ON full_index (form, filing_date);
+CREATE INDEX IF NOT EXISTS full_index_cik ON full_index (cik, filing_date);
+CREATE INDEX IF NOT EXISTS full_index_date ON full_index (filing_date);
+CREATE INDEX IF NOT EXISTS full_index_quarter ON full_index (year, quarter);
+"""
+
+INSERT_ENTRY: Final = "INSERT INTO full_index VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+# Rows inserted per `executemany`, so parsing never holds a whole quarter
+BATCH_SIZE: Final = 10_000
+
+# A quarter's index ingested this long after the quarter ended is final
+SETTLED_AFTER: Final = timedelta(days=7)
+
+type IndexRow = tuple[int, int, int, str, str, str, str, str]
+
+
+class IndexEntry(TypedDict):
+    cik: int
+    companyName: str
+    form: str
+    filingDate: str
+    accessionNumber: str
+    # Path of the full submission text file, relative to the EDGAR archives
+    filename: str
+
+
+def get_full_index_url(year: int, quarter: Quarter, base_url: str = FULL_INDEX_URL):
+    return f"{base_url}/{year}/QTR{quarter}/master.gz"
+
+
+def get_quarters(start_date: str, end_date: str) -> list[tuple[int, Quarter]]:
+    """Quarters overlapping the dates, up to the current one"""
+    start = date.fromisoformat(start_date)
+    end = min(date.fromisoformat(end_date), datetime.now(UTC).date())
+    quarters: list[tuple[int, Quarter]] = []
+    year, quarter = start.year, (start.month - 1) // 3 + 1
+    while (year, quarter) <= (end.year, (end.month - 1) // 3 + 1):
+        quarters.append((year, quarter))  # pyright: ignore[reportArgumentType]
+        year, quarter = (year + 1, 1) if quarter == 4 else (year, quarter + 1)
+    return quarters
+
+
+def get_quarter_end(year: int, quarter: Quarter) -> datetime:
+    if quarter == 4:
+        return datetime(year + 1, 1, 1, tzinfo=UTC)
+    return datetime(year, quarter * 3 + 1, 1, tzinfo=UTC)
+
+
+def parse_master_index(
+    lines: Iterable[bytes], year: int, quarter: Quarter
+) -> Iterator[IndexRow]:
+    lines = iter(lines)
+    # Header lines end with the dashed line under the column names
+    for line in lines:
+        if line.startswith(b"---"):
+            break
+
+    for line in lines:
+        fields = line.rstrip(b"\r\n").split(b"|")
+        if len(fields) != 5:
+            continue
+        cik, name, form, filed, filename = fields
+        filing_date = filed.decode("ascii")
+        if len(filing_date) == 8:
+            # Older indexes have YYYYMMDD
+            filing_date = f"{filing_date[:4]}-{filing_date[4:6]}-{filing_date[6:]}"
+        # `edgar/data/<cik>/<accession number>.txt`
+        accession_number = filename[filename.rfind(b"/") + 1 :].removesuffix(b".txt")
+        yield (
+            year,
+            quarter,
+            int(cik),
+            # Names are not always valid UTF-8
+            name.decode("latin-1"),
+            form.decode("latin-1"),
+            filing_date,
+            accession_number.decode("ascii"),
+            filename.decode("latin-1"),
+        )
+
+
+def row_to_entry(row: tuple[int, str, str, str, str, str]) -> IndexEntry:
+    return {
+        "cik": row[0],
+        "companyName": row[1],
+        "form": row[2],
+        "filingDate": row[3],
+        "accessionNumber": row[4],
+        "filename": row[5],
+    }
+
+
+class FullIndexStore:
+    """SQLite table of the quarterly full index, queried across companies"""
+
+    _sqlite: SqliteWorker
+    _updating: SingleFlight[tuple[int, int, str], bool]
+
+    def __init__(self, database: str = ".data/full_index.sqlite"):
+        self._sqlite = SqliteWorker(
+            database,
+            SCHEMA,
+            thread_name_prefix="sec-full-index",
+            # Room for the indexes' working set while a quarter is inserted
+            pragmas=("cache_size=-65536",),
+        )
+        self._updating = SingleFlight()
+
+    async def aclose(self) -> None:
+        await self._sqlite.aclose()
+
+    async def update_quarters_async(
+        self,
+        downloader: BaseDownloader,
+        quarters: Iterable[tuple[int, Quarter]],
+        base_url: str = FULL_INDEX_URL,
+    ) -> int:
+        """
+        Brings the quarters up to date, downloading their index files
+        concurrently, and returns how many were (re)ingested
+        """
+        updated = await asyncio.gather(
+            *(
+                self.update_quarter_async(downloader, year, quarter, base_url)
+                for year, quarter in dict.fromkeys(quarters)
+            )
+        )
+        return sum(updated)
+
+    async def update_quarter_async(
+        self,
+        downloader: BaseDownloader,
+        year: int,
+        quarter: Quarter,
+        base_url: str = FULL_INDEX_URL,
+    ) -> bool:
+        """Ingests the quarter unless it is stored and final, or unchanged"""
+        return await self._updating.do(
+            (year, quarter, base_url),
+            partial(self._update_quarter_async, downloader, year, quarter, base_url),
+        )
+
+    async def ingest_file_async(
+        self,
+        path: str | Path,
+        year: int,
+        quarter: Quarter,
+        *,
+        sha256: str = "",
+    ) -> int:
+        """Replaces the quarter with the entries of a `master.idx` or `master.gz`"""
+        return await self._sqlite.run(
+            self._ingest_file, Path(path), year, quarter, sha256
+        )
+
+    async def query_async(
+        self,
+        *,
+        form: str | None = None,
+        cik: int | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        limit: int | None = None,
+    ) -> list[IndexEntry]:
+        """Entries matching every given filter, newest first"""
+        return await self._sqlite.run(
+            self._query, form, cik, start_date, end_date, limit
+        )
+
+    async def _update_quarter_async(
+        self,
+        downloader: BaseDownloader,
+        year: int,
+        quarter: Quarter,
+        base_url: str,
+    ) -> bool:
+        ingested = await self._sqlite.run(self._get_quarter, year, quarter)
+        if ingested is not None:
+            sha256, ingested_at = ingested
+            settled = get_quarter_end(year, quarter) + SETTLED_AFTER
+            if ingested_at >= settled.timestamp():
+                return False
+        else:
+            sha256 = None
+
+        document = await downloader.download_async(
+            get_full_index_url(year, quarter, base_url)
+        )
+        if document["sha256"] == sha256:
+            return False
+
+        _ = await self.ingest_file_async(
+            document["path"], year, quarter, sha256=document["sha256"]
+        )
+        return True
+
+    def _get_quarter(self, year: int, quarter: int) -> tuple[str, float] | None:
+        return cast(
+            tuple[str, float] | None,
+            self._sqlite.connect()
+            .execute(
+                "SELECT sha256, ingested_at FROM full_index_quarters "
+                + "WHERE year = ? AND quarter = ?",
+                (year, quarter),
+            )
+            .fetchone(),
+        )
+
+    def _ingest_file(self, path: Path, year: int, quarter: Quarter, sha256: str) -> int:
+        connection = self._sqlite.connect()
+        opener = gzip.open if path.suffix == ".gz" else open
+        count = 0
+
+        with opener(path, "rb") as file, connection:
+            _ = connection.execute("BEGIN IMMEDIATE")
+            _ = connection.execute(
+                "DELETE FROM full_index WHERE year = ? AND quarter = ?",
+                (year, quarter),
+            )
+            batch: list[IndexRow] = []
+            for row in parse_master_index(file, year, quarter):
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    _ = connection.executemany(INSERT_ENTRY, batch)
+                    count += len(batch)
+                    batch.clear()
+            _ = connection.executemany(INSERT_ENTRY, batch)
+            count += len(batch)
+            _ = connection.execute(
+                "INSERT OR REPLACE INTO full_index_quarters VALUES (?, ?, ?, ?)",
+                (year, quarter, sha256, time.time()),
+            )
+
+        return count
+
+    def _query(
+        self,
+        form: str | None,
+        cik: int | None,
+        start_date: str | None,
+        end_date: str | None,
+        limit: int | None,
+    ) -> list[IndexEntry]:
+        conditions: list[str] = []
+        parameters: list[object] = []
+        for condition, value in (
+            ("form = ?", form),
+            ("cik = ?", cik),
+            ("filing_date >= ?", start_date),
+            ("filing_date <= ?", end_date),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        sql = (
+            "SELECT cik, company_name, form, filing_date, accession_number, filename "
+            + "FROM full_index"
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY filing_date DESC, rowid DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+
+        return list(map(row_to_entry, self._sqlite.connect().execute(sql, parameters)))
@@ -0,0 +1,84 @@
+"""
+Validating JSON decoders for the TypedDicts of SEC payloads
+
+pydantic is always available. msgspec, when installed, decodes and validates
+the same TypedDicts in a single pass over the bytes, which is markedly faster
+on large submissions JSONs and the ticker file. The backend is chosen at
+runtime: the `backend` argument, else the `SEC_API_JSON_BACKEND` environment
+variable, else msgspec if it can be imported.
+
+Both backends coerce the same way pydantic's lax mode does for these payloads
+(e.g. `"1"` for an `int`), ignore unknown keys, and raise `ValueError` for
+invalid JSON or a payload that does not match the type.
+"""
+
+import importlib
+import os
+from collections.abc import Callable
+from types import ModuleType
+from typing import Final, Literal, Protocol, cast
+
+from pydantic import TypeAdapter
+
+# Imported by name, so the module types the same with msgspec or without it
+msgspec: ModuleType | None
+try:
+    msgspec = importlib.import_module("msgspec")
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+type JsonBackend = Literal["pydantic", "msgspec"]
+
+JSON_BACKENDS: Final = ("pydantic", "msgspec")
+
+BACKEND_ENVIRONMENT_VARIABLE: Final = "SEC_API_JSON_BACKEND"
+
+
+def get_default_backend() -> JsonBackend:
+    backend = os.environ.get(BACKEND_ENVIRONMENT_VARIABLE)
+    if backend is None or backend == "":
+        return "pydantic" if msgspec is None else "msgspec"
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unknown {BACKEND_ENVIRONMENT_VARIABLE}: {backend!r}")
+    return backend
+
+
+class MsgspecDecoder[T](Protocol):
+    def decode(self, data: str | bytes, /) -> T: ...
+
+
+class JsonDecoder[T]:
+    """
+    Callable decoding JSON `str` or `bytes` into `T`. Build one per type at
+    module level: both backends compile the type once, and the instance can be
+    passed as a long-lived `parser` to `IDownloader.get_parsed_async`
+    """
+
+    backend: JsonBackend
+    _adapter: TypeAdapter[T] | None = None
+    # `decode` of a msgspec decoder, and the error it raises
+    _decode: Callable[[str | bytes], T] | None = None
+    _decode_error: type[Exception] = ValueError
+
+    def __init__(self, type_: type[T], backend: JsonBackend | None = None):
+        self.backend = get_default_backend() if backend is None else backend
+
+        if self.backend == "msgspec":
+            if msgspec is None:
+                raise RuntimeError("The msgspec JSON backend requires `msgspec`")
+            json_module = cast(ModuleType, msgspec.json)
+            new_decoder = cast(Callable[..., MsgspecDecoder[T]], json_module.Decoder)
+            self._decode = new_decoder(type_, strict=False).decode
+            self._decode_error = cast(type[Exception], msgspec.DecodeError)
+        else:
+            self._adapter = TypeAdapter(type_)
+
+    def __call__(self, data: str | bytes) -> T:
+        if self._adapter is not None:
+            return self._adapter.validate_json(data)
+
+        assert self._decode is not None
+        try:
+            return self._decode(data)
+        except self._decode_error as e:
+            raise ValueError(str(e)) from e
@@ -0,0 +1,145 @@
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Final, TypedDict
+
+from .metrics import Metrics, get_enabled
+from .typings import DownloadResponse
+
+# Rough per-entry overhead of the response dict and its other fields
+ENTRY_OVERHEAD: Final = 512
+
+# Parsed objects (dicts, lists, small strings) take several times the memory
+# of the text they were parsed from
+PARSED_SIZE_FACTOR: Final = 4
+
+
+class MemoryCacheStats(TypedDict):
+    hits: int
+    misses: int
+    parsed_hits: int
+    parsed_misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+class _Entry:
+    response: DownloadResponse
+    size: int
+    parsed: dict[Callable[[str], object], object]
+
+    def __init__(self, response: DownloadResponse):
+        self.response = response
+        self.size = len(response["content"]) + ENTRY_OVERHEAD
+        self.parsed = {}
+
+
+class MemoryCache:
+    """
+    LRU of downloaded responses, and of objects parsed from them, bounded by
+    an estimate of the bytes they hold rather than by the number of entries
+    """
+
+    _max_bytes: int
+    _entries: OrderedDict[str, _Entry]
+    _bytes: int
+    _stats: MemoryCacheStats
+    _metrics: Metrics | None
+
+    def __init__(
+        self, max_bytes: int = 256 * 1024 * 1024, metrics: Metrics | None = None
+    ):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "parsed_hits": 0,
+            "parsed_misses": 0,
+            "evictions": 0,
+            "entries": 0,
+            "bytes": 0,
+        }
+        # Hits and misses are counted by the downloader, evictions here
+        self._metrics = get_enabled(metrics)
+
+    @property
+    def stats(self) -> MemoryCacheStats:
+        return {**self._stats, "entries": len(self._entries), "bytes": self._bytes}
+
+    def get(self, url: str) -> DownloadResponse | None:
+        entry = self._entries.get(url)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        self._entries.move_to_end(url)
+        return entry.response
+
+    def put(self, url: str, response: DownloadResponse):
+        previous = self._entries.pop(url, None)
+        entry = _Entry(response)
+
+        if previous is not None:
+            self._bytes -= previous.size
+            # A revalidated copy with unchanged content keeps its parsed objects
+            if previous.response["content"] == response["content"]:
+                entry.parsed = previous.parsed
+                entry.size = previous.size
+
+        if entry.size > self._max_bytes:
+            return
+
+        self._entries[url] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def discard(self, url: str):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def get_parsed[T](
+        self, url: str, response: DownloadResponse, parser: Callable[[str], T]
+    ) -> tuple[T] | None:
+        """Object parsed from `response` earlier, as a 1-tuple, or None"""
+        entry = self._entries.get(url)
+        if (
+            entry is None
+            or parser not in entry.parsed
+            or entry.response["content"] != response["content"]
+        ):
+            self._stats["parsed_misses"] += 1
+            return None
+
+        self._stats["parsed_hits"] += 1
+        self._entries.move_to_end(url)
+        return (entry.parsed[parser],)  # pyright: ignore[reportReturnType]
+
+    def put_parsed[T](
+        self, url: str, response: DownloadResponse, parser: Callable[[str], T], value: T
+    ):
+        entry = self._entries.get(url)
+        if entry is None or entry.response["content"] != response["content"]:
+            return
+
+        if parser not in entry.parsed:
+            size = len(response["content"]) * PARSED_SIZE_FACTOR
+            entry.size += size
+            self._bytes += size
+
+        entry.parsed[parser] = value
+        self._evict()
+
+    def _evict(self):
+        evicted = 0
+        while self._bytes > self._max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            evicted += 1
+
+        self._stats["evictions"] += evicted
+        if evicted and self._metrics is not None:
+            self._metrics.increment("cache_evictions_total", evicted, cache="memory")
@@ -0,0 +1,259 @@
+"""
+Counters and histograms of where downloads spend their time, sent to
+pluggable sinks
+
+Instrumented classes take a `Metrics` and keep None when it has no sinks, so
+disabled metrics cost an attribute check and nothing is timed. Recorded:
+
+- `http_requests_total{status}`: responses received, throttled retries included
+- `http_request_seconds{status}`: time to the response headers
+- `http_response_bytes_total`: body bytes read off the wire (compressed)
+- `limiter_wait_seconds`: time waiting for a rate limiter slot, adaptive
+  spacing included
+- `throttle_backoff_seconds`: sleeps before retrying a throttled request
+- `cache_lookups_total{cache, result}`: `memory` hit or miss, then `store`
+  fresh, stale, expired or miss
+- `cache_read_seconds`, `cache_write_seconds`: cache store I/O
+- `cache_evictions_total{cache}`: `memory` or `sqlite` entries evicted
+- `parse_seconds{parser}`: parsing downloaded content, e.g. JSON validation
+
+Sinks are called on the event loop thread, except `render` of
+`PrometheusSink`, which may be called from any thread.
+"""
+
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Final, Literal, TypedDict, override
+
+type MetricKind = Literal["counter", "histogram"]
+
+# Sorted (name, value) pairs
+type Labels = tuple[tuple[str, str], ...]
+
+# Upper bounds of histogram buckets, in seconds
+DEFAULT_BUCKETS: Final = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class MetricEvent(TypedDict):
+    kind: MetricKind
+    name: str
+    value: float
+    labels: dict[str, str]
+
+
+class IMetricsSink(ABC):
+    @abstractmethod
+    def record(self, kind: MetricKind, name: str, value: float, labels: Labels):
+        pass
+
+
+class Metrics:
+    """Registry the instrumented classes record to, fanning out to `sinks`"""
+
+    _sinks: tuple[IMetricsSink, ...]
+
+    def __init__(self, *sinks: IMetricsSink):
+        self._sinks = sinks
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._sinks)
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        self._record("counter", name, value, labels)
+
+    def observe(self, name: str, value: float, **labels: str):
+        self._record("histogram", name, value, labels)
+
+    def _record(
+        self, kind: MetricKind, name: str, value: float, labels: dict[str, str]
+    ):
+        key = tuple(sorted(labels.items()))
+        for sink in self._sinks:
+            sink.record(kind, name, value, key)
+
+
+def get_enabled(metrics: Metrics | None) -> Metrics | None:
+    """`metrics`, or None when there is nothing to record to"""
+    return metrics if metrics is not None and metrics.enabled else None
+
+
+def get_parser_name(parser: Callable[[str], object]) -> str:
+    # Functions by name, callable instances (e.g. `JsonDecoder`) by class
+    name = getattr(parser, "__qualname__", None)
+    return name if isinstance(name, str) else type(parser).__name__
+
+
+class CallbackSink(IMetricsSink):
+    """Calls `callback` with every recorded value"""
+
+    _callback: Callable[[MetricEvent], None]
+
+    def __init__(self, callback: Callable[[MetricEvent], None]):
+        self._callback = callback
+
+    @override
+    def record(self, kind: MetricKind, name: str, value: float, labels: Labels):
+        self._callback(
+            {"kind": kind, "name": name, "value": value, "labels": dict(labels)}
+        )
+
+
+class LogSink(IMetricsSink):
+    """
+    Logs every recorded value, with the `MetricEvent` as the `metric`
+    attribute of the log record for structured handlers
+    """
+
+    _logger: logging.Logger
+    _level: int
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.INFO):
+        self._logger = logger or logging.getLogger(__name__)
+        self._level = level
+
+    @override
+    def record(self, kind: MetricKind, name: str, value: float, labels: Labels):
+        if not self._logger.isEnabledFor(self._level):
+            return
+
+        event: MetricEvent = {
+            "kind": kind,
+            "name": name,
+            "value": value,
+            "labels": dict(labels),
+        }
+        self._logger.log(
+            self._level,
+            "%s%s %s",
+            name,
+            format_labels(labels),
+            format_value(value),
+            extra={"metric": event},
+        )
+
+
+class _Histogram:
+    counts: list[int]
+    sum: float
+    count: int
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+
+
+class PrometheusSink(IMetricsSink):
+    """Aggregates values for the Prometheus text exposition format"""
+
+    _namespace: str
+    _buckets: tuple[float, ...]
+    _counters: dict[str, dict[Labels, float]]
+    _histograms: dict[str, dict[Labels, _Histogram]]
+    _lock: threading.Lock
+
+    def __init__(
+        self, namespace: str = "sec_api", buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self._namespace = namespace
+        self._buckets = tuple(sorted(buckets))
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @override
+    def record(self, kind: MetricKind, name: str, value: float, labels: Labels):
+        with self._lock:
+            if kind == "counter":
+                counters = self._counters.setdefault(name, {})
+                counters[labels] = counters.get(labels, 0.0) + value
+                return
+
+            histograms = self._histograms.setdefault(name, {})
+            histogram = histograms.get(labels)
+            if histogram is None:
+                histogram = histograms[labels] = _Histogram(len(self._buckets))
+            for i, bound in enumerate(self._buckets):
+                if value <= bound:
+                    histogram.counts[i] += 1
+                    break
+            histogram.sum += value
+            histogram.count += 1
+
+    def render(self) -> str:
+        """Every metric so far, as served on a `/metrics` endpoint"""
+        lines: list[str] = []
+        with self._lock:
+            for name, counters in sorted(self._counters.items()):
+                full_name = self._get_name(name)
+                lines.append(f"# TYPE {full_name} counter")
+                for labels, value in sorted(counters.items()):
+                    lines.append(
+                        f"{full_name}{format_labels(labels)} {format_value(value)}"
+                    )
+
+            for name, histograms in sorted(self._histograms.items()):
+                full_name = self._get_name(name)
+                lines.append(f"# TYPE {full_name} histogram")
+                for labels, histogram in sorted(histograms.items()):
+                    # Bucket counts are cumulative
+                    cumulative = 0
+                    for bound, count in zip(self._buckets, histogram.counts):
+                        cumulative += count
+                        bucket = format_labels((*labels, ("le", format_value(bound))))
+                        lines.append(f"{full_name}_bucket{bucket} {cumulative}")
+                    bucket = format_labels((*labels, ("le", "+Inf")))
+                    lines.append(f"{full_name}_bucket{bucket} {histogram.count}")
+                    lines.append(
+                        f"{full_name}_sum{format_labels(labels)} "
+                        + format_value(histogram.sum)
+                    )
+                    lines.append(
+                        f"{full_name}_count{format_labels(labels)} {histogram.count}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+    def _get_name(self, name: str) -> str:
+        return f"{self._namespace}_{name}" if self._namespace else name
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{escape_label_value(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 2**53:
+        return str(int(value))
+    return repr(value)
@@ -0,0 +1,11 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def spawn_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Pool of `workers` processes (default: one per CPU), started with spawn.
+    Not fork: callers run an event loop and executor threads, whose locks a
+    forked child would inherit in whatever state they were in.
+    """
+    return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
@@ -0,0 +1,142 @@
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Final
+
+# SEC answers 429 (and, when it starts blocking, 403 or 503) to clients going
+# over its fair access rate
+THROTTLE_STATUS_CODES: Final = frozenset({403, 429, 503})
+
+# httpx request extension replacing `THROTTLE_STATUS_CODES` for one request,
+# for URLs where one of them also means something else
+THROTTLE_STATUS_CODES_EXTENSION: Final = "sec_api.throttle_status_codes"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a `Retry-After` header (delay-seconds or HTTP-date)"""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        until = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if until.tzinfo is None:
+        until = until.replace(tzinfo=UTC)
+    return max(0.0, (until - datetime.now(UTC)).total_seconds())
+
+
+class AdaptiveRateController:
+    """
+    Spaces requests evenly at a rate that is cut multiplicatively when
+    throttled responses cluster, then raised additively back to `ceiling` while
+    requests succeed (AIMD). `Retry-After` pauses every request going through
+    the controller. The fixed rate limiter still applies on top.
+    """
+
+    _ceiling: float
+    _floor: float
+    _rate: float
+    _decrease_factor: float
+    _increase_per_success: float
+    _cluster_size: int
+    _cluster_window: float
+    _cooldown: float
+    _throttled_at: deque[float]
+    _lock: asyncio.Lock
+    _released_at: float = float("-inf")
+    _paused_until: float = 0.0
+    _cooldown_until: float = 0.0
+
+    max_retries: int
+    max_retry_wait: float
+    base_backoff: float
+    max_backoff: float
+
+    def __init__(
+        self,
+        *,
+        ceiling: float,
+        floor: float = 0.5,
+        decrease_factor: float = 0.5,
+        increase_per_success: float = 0.05,
+        cluster_size: int = 3,
+        cluster_window: float = 10.0,
+        cooldown: float = 2.0,
+        max_retries: int = 5,
+        max_retry_wait: float = 120.0,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self._ceiling = ceiling
+        self._floor = min(floor, ceiling)
+        self._rate = ceiling
+        self._decrease_factor = decrease_factor
+        self._increase_per_success = increase_per_success
+        self._cluster_size = cluster_size
+        self._cluster_window = cluster_window
+        self._cooldown = cooldown
+        self._throttled_at = deque()
+        self._lock = asyncio.Lock()
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    async def wait_async(self):
+        # Waiters are released one at a time, in order, so a rate cut or a
+        # pause applies to every request not yet sent
+        async with self._lock:
+            while True:
+                start = max(self._paused_until, self._released_at + 1 / self._rate)
+                delay = start - time.monotonic()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+
+            self._released_at = time.monotonic()
+
+    def on_success(self):
+        self._rate = min(self._ceiling, self._rate + self._increase_per_success)
+
+    def on_throttled(self, retry_after: float | None):
+        now = time.monotonic()
+
+        if retry_after is not None:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+        # Responses to requests sent before the last cut say nothing about
+        # the new rate
+        if now < self._cooldown_until:
+            return
+
+        self._throttled_at.append(now)
+        while self._throttled_at[0] < now - self._cluster_window:
+            _ = self._throttled_at.popleft()
+
+        if len(self._throttled_at) >= self._cluster_size:
+            self._rate = max(self._floor, self._rate * self._decrease_factor)
+            self._throttled_at.clear()
+            self._cooldown_until = now + self._cooldown
+
+    def get_backoff(self, attempt: int, retry_after: float | None) -> float:
+        """Delay before retry number `attempt` (0-based) of a throttled request"""
+        if retry_after is not None:
+            return retry_after
+
+        # Equal jitter: at least half the exponential delay, at most all of it
+        delay = min(self.max_backoff, self.base_backoff * 2.0**attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
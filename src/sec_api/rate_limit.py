@@ -0,0 +1,38 @@
+from pathlib import Path
+from typing import Final
+
+from pyrate_limiter import Duration, Limiter, limiter_factory
+
+DEFAULT_RATE_PER_SECOND: Final = 5
+
+
+def create_limiter(rate_per_second: int | None = None) -> Limiter:
+    """Rate limiter private to the calling downloader"""
+    # https://github.com/vutran1710/PyrateLimiter/blob/master/examples/httpx_ratelimiter.py
+    return limiter_factory.create_inmemory_limiter(
+        rate_per_duration=rate_per_second or DEFAULT_RATE_PER_SECOND,
+        duration=Duration.SECOND,
+        max_delay=Duration.MINUTE,
+        async_wrapper=True,
+    )
+
+
+def create_shared_limiter(
+    database: str = ".data/rate_limit.sqlite",
+    rate_per_second: int | None = None,
+) -> Limiter:
+    """
+    Rate limiter backed by a SQLite bucket guarded by a file lock, so every
+    downloader on the host using the same `database`, in this process or any
+    other, draws from one budget. Requires the optional `filelock` package.
+    """
+    Path(database).parent.mkdir(parents=True, exist_ok=True)
+    return limiter_factory.create_sqlite_limiter(
+        rate_per_duration=rate_per_second or DEFAULT_RATE_PER_SECOND,
+        duration=Duration.SECOND,
+        db_path=database,
+        table_name="sec_requests",
+        max_delay=Duration.MINUTE,
+        use_file_lock=True,
+        async_wrapper=True,
+    )
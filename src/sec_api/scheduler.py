@@ -0,0 +1,132 @@
+import asyncio
+import heapq
+import itertools
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable, Iterator
+from enum import IntEnum
+from typing import Final, NotRequired, TypedDict
+
+DEFAULT_MAX_CONCURRENCY: Final = 8
+
+
+class Priority(IntEnum):
+    """Lower values are scheduled first"""
+
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+
+class ScheduledResult[I, T](TypedDict):
+    """Outcome for one item: either `value` or `error` is set"""
+
+    item: I
+    value: NotRequired[T]
+    error: NotRequired[BaseException]
+
+
+class FetchScheduler:
+    """
+    Caps the number of fetches in flight. When at the cap, waiting fetches are
+    started in priority order, then in the order they arrived.
+    """
+
+    _max_concurrency: int
+    _active: int
+    _waiters: list[tuple[int, int, asyncio.Future[None]]]
+    _sequence: Iterator[int]
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self._max_concurrency = max_concurrency
+        self._active = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    async def run[T](
+        self,
+        fn: Callable[[], Awaitable[T]],
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> T:
+        await self._acquire(priority)
+        try:
+            return await fn()
+        finally:
+            self._release()
+
+    async def map_async[I, T](
+        self,
+        fn: Callable[[I], Awaitable[T]],
+        items: Iterable[I],
+        priority: Priority = Priority.INTERACTIVE,
+        window: int | None = None,
+    ) -> AsyncGenerator[ScheduledResult[I, T]]:
+        """
+        Yields the result of `fn` for each item as it finishes, in completion
+        order. At most `window` items (default: the concurrency cap) are
+        started and not yet yielded, so memory stays flat however many items
+        there are and however slowly they are consumed.
+        """
+        window = window or self._max_concurrency
+        pending: set[asyncio.Task[ScheduledResult[I, T]]] = set()
+        iterator = iter(items)
+
+        async def run_one(item: I) -> ScheduledResult[I, T]:
+            result = ScheduledResult[I, T](item=item)
+            # `fn` is the caller's: whatever it raises is handed back to them
+            # in the result, to handle alongside the other items
+            try:
+                result["value"] = await self.run(lambda: fn(item), priority)
+            except Exception as error:  # noqa: BLE001
+                result["error"] = error
+            return result
+
+        try:
+            for item in itertools.islice(iterator, window):
+                pending.add(asyncio.create_task(run_one(item)))
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+                    for item in itertools.islice(iterator, 1):
+                        pending.add(asyncio.create_task(run_one(item)))
+        finally:
+            # The consumer stopped early, do not leave fetches running
+            for task in pending:
+                _ = task.cancel()
+            if pending:
+                _ = await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _acquire(self, priority: Priority):
+        if self._active < self._max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The slot was handed over just before the cancellation
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        # Hand the slot straight to the next live waiter, if any
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+        self._active -= 1
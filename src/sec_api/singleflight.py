@@ -0,0 +1,36 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+
+
+class SingleFlight[K: Hashable, T]:
+    """
+    Runs at most one call per key at a time; concurrent callers for the same
+    key wait for, and share the result (or exception) of, the call in flight
+    """
+
+    _calls: dict[K, asyncio.Future[T]]
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+
+        if call is None:
+            call = asyncio.ensure_future(fn())
+            self._calls[key] = call
+
+            def done(call: asyncio.Future[T]):
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                # Mark the exception retrieved, even if every caller gave up
+                if not call.cancelled():
+                    _ = call.exception()
+
+            call.add_done_callback(done)
+
+        # A cancelled caller must not cancel the call the others wait for
+        return await asyncio.shield(call)
@@ -0,0 +1,77 @@
+import asyncio
+import sqlite3
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+class SqliteWorker:
+    """
+    An SQLite database (WAL mode) owned by a single worker thread, which also
+    serialises access to it. Coroutines `run` functions on the thread, and
+    those functions `connect` to get the connection, opened on first use.
+    """
+
+    _database: str
+    _schema: str
+    _pragmas: tuple[str, ...]
+    _on_connect: Callable[[sqlite3.Connection], None] | None
+    _thread_name_prefix: str
+    _executor: ThreadPoolExecutor | None = None
+    _connection: sqlite3.Connection | None = None
+
+    def __init__(
+        self,
+        database: str,
+        schema: str,
+        *,
+        thread_name_prefix: str,
+        pragmas: tuple[str, ...] = (),
+        on_connect: Callable[[sqlite3.Connection], None] | None = None,
+    ):
+        self._database = database
+        self._schema = schema
+        # Set after the WAL pragmas, e.g. `cache_size=-65536`
+        self._pragmas = pragmas
+        # Called on the worker thread once the connection is open
+        self._on_connect = on_connect
+        self._thread_name_prefix = thread_name_prefix
+
+    @property
+    def database(self) -> str:
+        return self._database
+
+    async def aclose(self) -> None:
+        if self._executor is not None:
+            await self.run(self._close)
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown)
+
+    async def run[*Ts, T](self, fn: Callable[[*Ts], T], *args: *Ts) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=self._thread_name_prefix
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def connect(self) -> sqlite3.Connection:
+        """The connection, on the worker thread only"""
+        if self._connection is None:
+            Path(self._database).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self._database, isolation_level=None)
+            _ = connection.execute("PRAGMA journal_mode=WAL")
+            _ = connection.execute("PRAGMA synchronous=NORMAL")
+            for pragma in self._pragmas:
+                _ = connection.execute(f"PRAGMA {pragma}")
+            _ = connection.executescript(self._schema)
+            self._connection = connection
+            if self._on_connect is not None:
+                self._on_connect(connection)
+        return self._connection
+
+    def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from typing import override
+
+import httpx
+import pytest
+
+from .batch import iter_filings_async
+from .company import Company
+from .constants import DATA_SEC_URL
+from .scheduler import FetchScheduler
+from .test_company import make_columns
+from .testing import FakeDownloader
+from .typings import Filing, IDownloader
+
+
+class BatchDownloader(FakeDownloader):
+    """Submissions of CIKs 1 to `count`, each with two filings, except CIK 3"""
+
+    @override
+    async def get_content_async(self, url: str) -> str:
+        await asyncio.sleep(0.001)
+        if url.endswith("CIK0000000003.json"):
+            raise httpx.ConnectError("unavailable")
+
+        content = "<html></html>"
+        if url.startswith(f"{DATA_SEC_URL}/submissions/"):
+            content = json.dumps(
+                {
+                    "filings": {
+                        "recent": make_columns(
+                            ("0000000001-24-000002", "2024-02-01"),
+                            ("0000000001-24-000001", "2024-01-01"),
+                        ),
+                        "files": [],
+                    }
+                }
+            )
+        return content
+
+
+def make_companies(downloader: IDownloader, scheduler: FetchScheduler, count: int):
+    return [Company(cik, downloader, scheduler) for cik in range(1, count + 1)]
+
+
+async def list_filings(company: Company) -> list[Filing]:
+    return await company.get_filing_details_async()
+
+
+@pytest.mark.asyncio
+async def test_every_filing_and_document_is_yielded():
+    """Test that each filing comes with its document, and listing errors once."""
+    downloader = BatchDownloader()
+    scheduler = FetchScheduler(max_concurrency=2)
+    companies = make_companies(downloader, scheduler, 5)
+
+    results = [
+        result
+        async for result in iter_filings_async(companies, list_filings, scheduler)
+    ]
+
+    errors = [result for result in results if "error" in result]
+    assert [(e["cik"], "filing" in e) for e in errors] == [("0000000003", False)]
+    documents = [
+        (result["cik"], result["filing"], result["document"]["url"])
+        for result in results
+        if "filing" in result and "document" in result
+    ]
+    assert sorted((cik, filing["filingDate"]) for cik, filing, _ in documents) == [
+        (f"{cik:010d}", day)
+        for cik in (1, 2, 4, 5)
+        for day in ("2024-01-01", "2024-02-01")
+    ]
+    assert all(
+        url.endswith(f"/{filing['accessionNumber'].replace('-', '')}/doc.htm")
+        for _, filing, url in documents
+    )
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_documents_download_while_companies_are_listed():
+    """Test that listing and downloading overlap under the scheduler's cap."""
+    downloader = BatchDownloader()
+    scheduler = FetchScheduler(max_concurrency=2)
+    companies = make_companies(downloader, scheduler, 10)
+    peak = 0
+
+    async for _ in iter_filings_async(companies, list_filings, scheduler):
+        peak = max(peak, scheduler.active)
+
+    # A document was requested before the last company's submissions
+    first_document = next(
+        i for i, url in enumerate(downloader.requests) if url.endswith("doc.htm")
+    )
+    last_submissions = max(
+        i for i, url in enumerate(downloader.requests) if "/submissions/" in url
+    )
+    assert first_document < last_submissions
+    assert peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_filings_only_and_early_close():
+    """Test listing without documents, and that closing early stops fetches."""
+    downloader = BatchDownloader()
+    scheduler = FetchScheduler(max_concurrency=2)
+    companies = make_companies(downloader, scheduler, 4)
+
+    results = [
+        result
+        async for result in iter_filings_async(
+            companies, list_filings, scheduler, documents=False
+        )
+    ]
+    assert len([r for r in results if "filing" in r]) == 6
+    assert not any(url.endswith("doc.htm") for url in downloader.requests)
+
+    downloader.requests.clear()
+    companies = make_companies(downloader, scheduler, 50)
+    results = iter_filings_async(companies, list_filings, scheduler, window=2)
+    _ = await anext(results)
+    await results.aclose()
+    requested = len(downloader.requests)
+    await asyncio.sleep(0.01)
+
+    assert len(downloader.requests) == requested < 50
+    assert scheduler.active == 0
@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from .cache_format import (
+    Compression,
+    decode_cache_entry,
+    encode_cache_entry,
+    is_legacy_entry,
+    migrate_cache_directory,
+    read_cache_header,
+)
+from .typings import DownloadResponse
+
+
+@pytest.fixture
+def response() -> DownloadResponse:
+    return {
+        "url": "https://www.sec.gov/Archives/edgar/data/123/0001/doc.htm",
+        "status_code": 200,
+        "content": "<html>" + "Item 1A. Risk Factors " * 1000 + "</html>",
+        "content_type": "text/html",
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "fetched_at": 1704067200.0,
+    }
+
+
+@pytest.mark.parametrize("compression", ["identity", "gzip"])
+def test_encode_decode_round_trip(
+    response: DownloadResponse, compression: Compression
+) -> None:
+    """Test that an encoded entry decodes to the original response."""
+    data = encode_cache_entry(response, compression)
+    entry = decode_cache_entry(data)
+
+    assert entry is not None
+    assert entry.header["compression"] == compression
+    assert entry.header["size"] == len(response["content"])
+    assert entry.to_response() == response
+
+
+def test_gzip_entry_is_smaller_than_json(response: DownloadResponse) -> None:
+    """Test that compressed entries beat the legacy JSON layout."""
+    assert len(encode_cache_entry(response, "gzip")) < len(json.dumps(response)) / 10
+
+
+def test_read_cache_header_only(tmp_path: Path, response: DownloadResponse) -> None:
+    """Test that the header is readable without the body."""
+    path = tmp_path / "entry"
+    _ = path.write_bytes(encode_cache_entry(response, "gzip"))
+
+    header = read_cache_header(path)
+
+    assert header is not None
+    assert header["last_modified"] == response["last_modified"]
+    assert header.get("fetched_at") == response.get("fetched_at")
+    assert read_cache_header(tmp_path / "missing") is None
+
+
+def test_corrupt_header_is_not_cached(
+    tmp_path: Path, response: DownloadResponse
+) -> None:
+    """Test that a damaged header reads as a miss instead of raising."""
+    data = encode_cache_entry(response, "gzip")
+    corrupt = data.replace(b'"url"', b'"u\x00l', 1)
+    _ = (tmp_path / "entry").write_bytes(corrupt)
+
+    assert corrupt != data
+    assert decode_cache_entry(corrupt) is None
+    assert read_cache_header(tmp_path / "entry") is None
+
+
+def test_legacy_entry_is_decoded(response: DownloadResponse) -> None:
+    """Test that JSON entries written by older versions are still readable."""
+    data = json.dumps(response, indent=2).encode()
+    entry = decode_cache_entry(data)
+
+    assert is_legacy_entry(data)
+    assert entry is not None
+    assert entry.to_response() == response
+
+
+def test_migrate_cache_directory(tmp_path: Path, response: DownloadResponse) -> None:
+    """Test that legacy entries are rewritten in place and only once."""
+    path = tmp_path / "Archives/doc.htm"
+    path.parent.mkdir(parents=True)
+    _ = path.write_text(json.dumps(response, indent=2))
+    # Streamed documents and sidecars are not entries, whatever they hold
+    skipped = [
+        tmp_path / "documents/Archives/doc.json",
+        tmp_path / "Archives/doc.htm.meta.json",
+        tmp_path / "Archives/doc.htm.text.json",
+    ]
+    for other in skipped:
+        other.parent.mkdir(parents=True, exist_ok=True)
+        _ = other.write_text(json.dumps(response))
+    _ = (tmp_path / "filings.sqlite").write_bytes(b"SQLite format 3\x00")
+
+    assert migrate_cache_directory(str(tmp_path)) == 1
+    assert all(other.read_text() == json.dumps(response) for other in skipped)
+    assert migrate_cache_directory(str(tmp_path)) == 0
+
+    entry = decode_cache_entry(path.read_bytes())
+    assert entry is not None
+    assert entry.header["compression"] == "gzip"
+    assert entry.to_response() == response
@@ -1,4 +1,6 @@
 import json
+import time
+from pathlib import Path
 from typing import override
 from unittest.mock import AsyncMock
 
@@ -11,6 +13,8 @@ from .cik import (
     StructuredCompanyTickerExchange,
     structure_company_exchange_json,
 )
+from .freshness import REVALIDATE, PatternFreshnessPolicy
+from .testing import FakeDownloader, make_response
 from .typings import DownloadResponse, IDownloader
 
 
@@ -250,3 +254,112 @@ async def test_downloader_failure_returns_none(
 
     with pytest.raises(ConnectionError):
         _ = await cik_instance.get_by_ticker_async("AAPL")
+
+
+class TickerFileDownloader(FakeDownloader):
+    """Serves `responses` in turn, then the last one again"""
+
+    responses: list[DownloadResponse]
+
+    def __init__(self, *responses: DownloadResponse):
+        super().__init__()
+        self.responses = list(responses)
+
+    @override
+    async def get_url_async(self, url: str) -> DownloadResponse:
+        response = self.responses[min(len(self.requests), len(self.responses) - 1)]
+        self.requests.append(url)
+        return response
+
+
+def make_ticker_file(
+    last_modified: str, *rows: tuple[int, str, str, str | None]
+) -> DownloadResponse:
+    content = json.dumps(
+        {"fields": ("cik", "name", "ticker", "exchange"), "data": rows}
+    )
+    return make_response(
+        COMPANY_TICKERS_EXCHANGE_URL, content, last_modified=last_modified
+    )
+
+
+@pytest.mark.asyncio
+async def test_lookups_within_lifetime_skip_downloader(
+    mock_raw_data_success: DownloadResponse,
+):
+    """Test that lookup latency does not depend on the downloader once built."""
+    downloader = TickerFileDownloader(mock_raw_data_success)
+    cik_instance = CentralIndexKey(downloader)
+
+    for ticker in ("AAPL", "MSFT", "GOOG"):
+        assert await cik_instance.get_by_ticker_async(ticker) is not None
+    results = await cik_instance.search_async("microsft")
+
+    assert [co["ticker"] for co in results][:1] == ["MSFT"]
+    assert len(downloader.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_persisted_index_loads_without_download(tmp_path: Path):
+    """Test that a fresh persisted index is served without asking SEC."""
+    path = tmp_path / "company_tickers.idx"
+    downloader = TickerFileDownloader(
+        make_ticker_file("v1", (123, "Apple Inc.", "AAPL", "Nasdaq"))
+    )
+
+    _ = await CentralIndexKey(downloader, index_path=path).get_by_cik_async(123)
+    reloaded = CentralIndexKey(downloader, index_path=path)
+    company = await reloaded.get_by_ticker_async("aapl")
+
+    assert company is not None
+    assert company["cik"] == 123
+    assert len(downloader.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_index_updates_only_when_last_modified_changes(
+    tmp_path: Path,
+):
+    """Test that an expired index is only rebuilt from a changed ticker file."""
+    path = tmp_path / "company_tickers.idx"
+    downloader = TickerFileDownloader(
+        make_ticker_file("v1", (123, "Apple Inc.", "AAPL", "Nasdaq")),
+        make_ticker_file("v1", (456, "Not Parsed Again", "NOPE", None)),
+        make_ticker_file(
+            "v2",
+            (123, "Apple Inc.", "AAPL", "Nasdaq"),
+            (456, "Microsoft Corp.", "MSFT", "Nasdaq"),
+        ),
+    )
+    # Every lookup revalidates
+    cik_instance = CentralIndexKey(
+        downloader,
+        index_path=path,
+        freshness_policy=PatternFreshnessPolicy(rules=[], default=REVALIDATE),
+    )
+
+    assert await cik_instance.get_cik_by_ticker_async("AAPL") == 123
+    assert await cik_instance.get_cik_by_ticker_async("NOPE") is None
+    assert await cik_instance.get_cik_by_ticker_async("MSFT") == 456
+    assert len(downloader.requests) == 3
+
+    reloaded = CentralIndexKey(downloader, index_path=path)
+    assert await reloaded.get_cik_by_ticker_async("MSFT") == 456
+
+
+@pytest.mark.asyncio
+async def test_index_lifetime_starts_when_the_ticker_file_was_fetched():
+    """Test that a long cached ticker file does not count as fetched now."""
+    ticker_file = make_ticker_file("v1", (123, "Apple Inc.", "AAPL", "Nasdaq"))
+    ticker_file["fetched_at"] = time.time() - 3600
+    downloader = TickerFileDownloader(ticker_file)
+    cik_instance = CentralIndexKey(
+        downloader,
+        freshness_policy=PatternFreshnessPolicy(
+            rules=[], default={"max_age": 60, "stale_while_revalidate": 0}
+        ),
+    )
+
+    assert await cik_instance.get_cik_by_ticker_async("AAPL") == 123
+    assert await cik_instance.get_cik_by_ticker_async("AAPL") == 123
+    assert len(downloader.requests) == 2
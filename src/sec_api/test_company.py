@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from .company import Company
+from .constants import DATA_SEC_URL
+from .testing import FakeDownloader
+
+MAIN_URL = f"{DATA_SEC_URL}/submissions/CIK0000000123.json"
+PAGE_1 = "CIK0000000123-submissions-001.json"
+PAGE_2 = "CIK0000000123-submissions-002.json"
+
+
+def make_columns(*filings: tuple[str, str]) -> dict[str, list[object]]:
+    """Submissions columns for (accession number, report and filing date) pairs"""
+    return {
+        "accessionNumber": [accession for accession, _ in filings],
+        "filingDate": [day for _, day in filings],
+        "reportDate": [day for _, day in filings],
+        "acceptanceDateTime": [f"{day}T16:00:00.000Z" for _, day in filings],
+        "act": ["34"] * len(filings),
+        "form": ["10-K"] * len(filings),
+        "fileNumber": [""] * len(filings),
+        "filmNumber": [""] * len(filings),
+        "items": [""] * len(filings),
+        "core_type": ["10-K"] * len(filings),
+        "size": [1] * len(filings),
+        "isXBRL": [1] * len(filings),
+        "isInlineXBRL": [1] * len(filings),
+        "primaryDocument": ["doc.htm"] * len(filings),
+        "primaryDocDescription": ["10-K"] * len(filings),
+    }
+
+
+def make_submissions_downloader() -> FakeDownloader:
+    return FakeDownloader(
+        {
+            MAIN_URL: json.dumps(
+                {
+                    "filings": {
+                        "recent": make_columns(
+                            ("r3", "2024-03-01"),
+                            ("r2", "2024-02-01"),
+                            ("r1", "2024-01-01"),
+                        ),
+                        "files": [
+                            {
+                                "name": PAGE_1,
+                                "filingCount": 2,
+                                "filingFrom": "2015-01-01",
+                                "filingTo": "2019-12-31",
+                            },
+                            {
+                                "name": PAGE_2,
+                                "filingCount": 1,
+                                "filingFrom": "2010-01-01",
+                                "filingTo": "2014-12-31",
+                            },
+                        ],
+                    }
+                }
+            ),
+            f"{DATA_SEC_URL}/submissions/{PAGE_1}": json.dumps(
+                make_columns(("p2", "2019-06-01"), ("p1", "2016-06-01"))
+            ),
+            f"{DATA_SEC_URL}/submissions/{PAGE_2}": json.dumps(
+                make_columns(("p0", "2012-06-01"))
+            ),
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_recent_query_skips_pages_and_keeps_last_filing():
+    """Test that recent dates only load the main JSON, down to its last filing."""
+    downloader = make_submissions_downloader()
+    company = Company(123, downloader)
+
+    filings = await company.get_filing_details_async(start_date="2024-01-01")
+
+    assert [f["accessionNumber"] for f in filings] == ["r3", "r2", "r1"]
+    assert downloader.requests == [MAIN_URL]
+
+
+@pytest.mark.asyncio
+async def test_old_query_loads_only_pages_it_needs():
+    """Test that a date range loads the pages reaching it, once."""
+    downloader = make_submissions_downloader()
+    company = Company(123, downloader)
+
+    filings = await company.get_filing_details_async(year=2016)
+    again = await company.get_filing_details_async(start_date="2016-01-01")
+
+    assert [f["accessionNumber"] for f in filings] == ["p1"]
+    assert [f["accessionNumber"] for f in again] == ["r3", "r2", "r1", "p2", "p1"]
+    assert downloader.requests == [MAIN_URL, f"{DATA_SEC_URL}/submissions/{PAGE_1}"]
+
+
+@pytest.mark.asyncio
+async def test_unbounded_query_loads_full_history():
+    """Test that without a start date every page is loaded."""
+    downloader = make_submissions_downloader()
+    company = Company(123, downloader)
+
+    filings = await company.get_filing_details_async()
+
+    assert [f["accessionNumber"] for f in filings] == [
+        "r3",
+        "r2",
+        "r1",
+        "p2",
+        "p1",
+        "p0",
+    ]
+    assert len(downloader.requests) == 3
@@ -0,0 +1,98 @@
+import hashlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+from .documents import DocumentWriter, get_metadata_path, read_document_metadata
+from .downloader_local import LocalCacheDownloader
+from .freshness import PatternFreshnessPolicy
+from .testing import Reply, Serve
+
+# Not valid UTF-8, so any text decoding would corrupt it
+BINARY = bytes(range(256)) * 4096
+LAST_MODIFIED = formatdate(0, usegmt=True)
+
+
+@pytest.fixture
+def binary_server(serve: Serve) -> tuple[str, list[int]]:
+    """Server for BINARY, honouring If-Modified-Since"""
+    served: list[int] = []
+
+    def respond(handler: BaseHTTPRequestHandler) -> Reply:
+        not_modified = handler.headers.get("If-Modified-Since") == LAST_MODIFIED
+        served.append(304 if not_modified else 200)
+        headers = {"Content-Type": "application/pdf", "Last-Modified": LAST_MODIFIED}
+        return served[-1], headers, b"" if not_modified else BINARY
+
+    return serve(respond), served
+
+
+def test_writer_hashes_and_renames_on_commit(tmp_path: Path):
+    """Test that chunks land in place, hashed, only once committed."""
+    path = tmp_path / "a" / "doc.pdf"
+    writer = DocumentWriter(path)
+    writer.write(BINARY[:1000])
+    writer.write(BINARY[1000:])
+
+    assert not path.exists()
+
+    writer.commit()
+
+    assert path.read_bytes() == BINARY
+    assert writer.sha256 == hashlib.sha256(BINARY).hexdigest()
+    assert writer.size == len(BINARY)
+    assert [p.name for p in path.parent.iterdir()] == ["doc.pdf"]
+
+
+def test_writer_abort_leaves_nothing(tmp_path: Path):
+    """Test that an aborted download leaves no file behind."""
+    writer = DocumentWriter(tmp_path / "doc.pdf")
+    writer.write(BINARY)
+    writer.abort()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_download_streams_bytes_and_revalidates(
+    tmp_path: Path, binary_server: tuple[str, list[int]]
+):
+    """Test that bytes are stored as-is, then revalidated with a 304."""
+    url, served = binary_server
+
+    async with LocalCacheDownloader(
+        user_agent="test",
+        cache_directory=str(tmp_path),
+        freshness_policy=PatternFreshnessPolicy(rules=[]),
+    ) as downloader:
+        document = await downloader.download_async(f"{url}/files/doc.pdf")
+        again = await downloader.download_async(f"{url}/files/doc.pdf")
+
+    path = tmp_path / "documents" / "files" / "doc.pdf"
+    assert document["path"] == str(path)
+    assert path.read_bytes() == BINARY
+    assert document["sha256"] == hashlib.sha256(BINARY).hexdigest()
+    assert document["size"] == len(BINARY)
+    assert document["content_type"] == "application/pdf"
+    assert read_document_metadata(path) == again
+    assert get_metadata_path(path).exists()
+    assert served == [200, 304]
+    assert again["sha256"] == document["sha256"]
+
+
+@pytest.mark.asyncio
+async def test_download_to_file(tmp_path: Path, binary_server: tuple[str, list[int]]):
+    """Test that any downloader can stream to a given path."""
+    url, _ = binary_server
+
+    async with LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path / "cache")
+    ) as downloader:
+        document = await downloader.download_to_file_async(
+            f"{url}/doc.pdf", tmp_path / "out.pdf"
+        )
+
+    assert (tmp_path / "out.pdf").read_bytes() == BINARY
+    assert document["size"] == len(BINARY)
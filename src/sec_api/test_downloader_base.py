@@ -0,0 +1,237 @@
+import asyncio
+import time
+from typing import override
+
+import pytest
+import pytest_asyncio
+
+from .constants import COMPANY_TICKERS_EXCHANGE_URL, DATA_SEC_URL, SEC_URL
+from .downloader_base import BaseDownloader
+from .freshness import (
+    IMMUTABLE,
+    REVALIDATE,
+    CacheDirective,
+    PatternFreshnessPolicy,
+    get_cache_state,
+)
+from .memory_cache import MemoryCache
+from .typings import DownloadResponse
+
+ARCHIVE_URL = f"{SEC_URL}/Archives/edgar/data/123/000012300000001/doc.htm"
+SUBMISSIONS_URL = f"{DATA_SEC_URL}/submissions/CIK0000000123.json"
+
+
+class FakeDownloader(BaseDownloader):
+    """BaseDownloader with a dict cache and a scripted network"""
+
+    cache: dict[str, DownloadResponse]
+    requests: list[tuple[str, str | None]]
+    status_code: int
+    reads: int
+
+    def __init__(self, memory_cache: MemoryCache | None = None):
+        super().__init__(
+            user_agent="test",
+            rate_per_second=None,
+            proxy=None,
+            memory_cache=memory_cache,
+        )
+        self.cache = {}
+        self.requests = []
+        self.status_code = 200
+        self.reads = 0
+
+    @override
+    async def read_from_cache_async(self, url: str) -> DownloadResponse | None:
+        self.reads += 1
+        return self.cache.get(url)
+
+    @override
+    async def write_to_cache_async(self, url: str, response: DownloadResponse):
+        self.cache[url] = response
+
+    @override
+    async def _do_get_url_async(
+        self, *, url: str, last_modified: str | None
+    ) -> DownloadResponse:
+        self.requests.append((url, last_modified))
+        await asyncio.sleep(0)
+        return {
+            "url": url,
+            "status_code": self.status_code,
+            "content": "" if self.status_code == 304 else f"network {url}",
+            "content_type": None,
+            "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+            "fetched_at": time.time(),
+        }
+
+
+def make_cached(url: str, age: float | None) -> DownloadResponse:
+    response: DownloadResponse = {
+        "url": url,
+        "status_code": 200,
+        "content": f"cached {url}",
+        "content_type": None,
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    if age is not None:
+        response["fetched_at"] = time.time() - age
+    return response
+
+
+@pytest_asyncio.fixture
+async def downloader() -> FakeDownloader:
+    # The in-memory limiter needs a running event loop
+    return FakeDownloader()
+
+
+# --- Tests for freshness policy ---
+
+
+def test_default_policy_rules():
+    """Test that the default rules classify SEC URLs as expected."""
+    policy = PatternFreshnessPolicy()
+
+    assert policy.get_directive(ARCHIVE_URL) == IMMUTABLE
+    assert policy.get_directive(SUBMISSIONS_URL)["max_age"] > 0
+    assert policy.get_directive(COMPANY_TICKERS_EXCHANGE_URL)["max_age"] > 0
+    assert policy.get_directive(f"{SEC_URL}/other.json") == REVALIDATE
+
+
+def test_get_cache_state():
+    """Test fresh/stale/expired transitions of a cached entry."""
+    directive: CacheDirective = {"max_age": 10.0, "stale_while_revalidate": 20.0}
+    cached = make_cached(SUBMISSIONS_URL, age=0)
+    fetched_at = cached.get("fetched_at", 0)
+
+    assert get_cache_state(directive, cached, now=fetched_at + 5) == "fresh"
+    assert get_cache_state(directive, cached, now=fetched_at + 15) == "stale"
+    assert get_cache_state(directive, cached, now=fetched_at + 35) == "expired"
+    assert get_cache_state(directive, make_cached(SUBMISSIONS_URL, None)) == "expired"
+    assert get_cache_state(IMMUTABLE, make_cached(ARCHIVE_URL, None)) == "fresh"
+
+
+# --- Tests for BaseDownloader.get_url_async ---
+
+
+@pytest.mark.asyncio
+async def test_immutable_hit_skips_network(downloader: FakeDownloader):
+    """Test that archived documents are served from cache without a request."""
+    downloader.cache[ARCHIVE_URL] = make_cached(ARCHIVE_URL, age=None)
+
+    response = await downloader.get_url_async(ARCHIVE_URL)
+
+    assert response["content"] == f"cached {ARCHIVE_URL}"
+    assert downloader.requests == []
+
+
+@pytest.mark.asyncio
+async def test_fresh_hit_skips_network(downloader: FakeDownloader):
+    """Test that a cached copy within its TTL is served without a request."""
+    downloader.cache[SUBMISSIONS_URL] = make_cached(SUBMISSIONS_URL, age=1)
+
+    _ = await downloader.get_url_async(SUBMISSIONS_URL)
+
+    assert downloader.requests == []
+
+
+@pytest.mark.asyncio
+async def test_stale_hit_revalidates_in_background(downloader: FakeDownloader):
+    """Test that a stale copy is returned at once and refreshed afterwards."""
+    downloader.cache[SUBMISSIONS_URL] = make_cached(SUBMISSIONS_URL, age=15 * 60)
+
+    response = await downloader.get_url_async(SUBMISSIONS_URL)
+    assert response["content"] == f"cached {SUBMISSIONS_URL}"
+
+    await downloader.aclose()
+
+    assert len(downloader.requests) == 1
+    assert downloader.cache[SUBMISSIONS_URL]["content"] == f"network {SUBMISSIONS_URL}"
+
+
+@pytest.mark.asyncio
+async def test_expired_hit_not_modified(downloader: FakeDownloader):
+    """Test that an expired copy is revalidated and its lifetime restarted."""
+    cached = make_cached(SUBMISSIONS_URL, age=24 * 60 * 60)
+    downloader.cache[SUBMISSIONS_URL] = cached
+    downloader.status_code = 304
+
+    response = await downloader.get_url_async(SUBMISSIONS_URL)
+
+    assert downloader.requests == [(SUBMISSIONS_URL, cached["last_modified"])]
+    assert response["content"] == cached["content"]
+    assert response.get("fetched_at", 0) > cached.get("fetched_at", 0)
+    assert downloader.cache[SUBMISSIONS_URL] is response
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_in_front_of_cache_backend():
+    """Test that repeated hits are served from memory, parsed once."""
+    downloader = FakeDownloader(memory_cache=MemoryCache())
+    downloader.cache[ARCHIVE_URL] = make_cached(ARCHIVE_URL, age=None)
+
+    first = await downloader.get_parsed_async(ARCHIVE_URL, str.upper)
+    reads = downloader.reads
+    second = await downloader.get_parsed_async(ARCHIVE_URL, str.upper)
+
+    assert first is second
+    assert downloader.reads == reads
+    assert downloader.requests == []
+    assert downloader.memory_cache is not None
+    assert downloader.memory_cache.stats["parsed_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_memory_miss_is_counted_once():
+    """Test that a memory miss served from the cache backend is one miss."""
+    downloader = FakeDownloader(memory_cache=MemoryCache())
+    downloader.cache[ARCHIVE_URL] = make_cached(ARCHIVE_URL, age=None)
+
+    _ = await downloader.get_url_async(ARCHIVE_URL)
+    _ = await downloader.get_url_async(ARCHIVE_URL)
+
+    assert downloader.memory_cache is not None
+    stats = downloader.memory_cache.stats
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced(downloader: FakeDownloader):
+    """Test that concurrent requests for one URL share a single fetch."""
+    responses = await asyncio.gather(
+        *(downloader.get_url_async(SUBMISSIONS_URL) for _ in range(50))
+    )
+
+    assert len(downloader.requests) == 1
+    assert all(response is responses[0] for response in responses)
+
+
+# --- Tests for the pooled client ---
+
+
+@pytest.mark.asyncio
+async def test_aclose_closes_the_client():
+    """Test that aclose closes the pooled client and later requests fail."""
+    downloader = BaseDownloader(user_agent="test", rate_per_second=None, proxy=None)
+    client = downloader._get_client()  # pyright: ignore[reportPrivateUsage]
+    assert downloader._get_client() is client  # pyright: ignore[reportPrivateUsage]
+
+    await downloader.aclose()
+
+    assert client.is_closed
+    with pytest.raises(RuntimeError, match="closed"):
+        _ = await downloader.get_url_async(ARCHIVE_URL)
+
+
+@pytest.mark.asyncio
+async def test_async_with_closes_the_client():
+    """Test that leaving the context closes the client, even on an error."""
+    downloader = BaseDownloader(user_agent="test", rate_per_second=None, proxy=None)
+    client = downloader._get_client()  # pyright: ignore[reportPrivateUsage]
+    with pytest.raises(ValueError):
+        async with downloader:
+            raise ValueError
+
+    assert client.is_closed
+    with pytest.raises(RuntimeError, match="closed"):
+        _ = await downloader.download_to_file_async(ARCHIVE_URL, "unused")
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+
+from .constants import SEC_URL
+from .downloader_local import LocalCacheDownloader
+from .typings import DownloadResponse
+
+ARCHIVE_URL = f"{SEC_URL}/Archives/edgar/data/123/000012300000001/doc.htm"
+
+
+@pytest.fixture
+def response() -> DownloadResponse:
+    return {
+        "url": ARCHIVE_URL,
+        "status_code": 200,
+        "content": "<html>10-K</html>",
+        "content_type": "text/html",
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "fetched_at": 1704067200.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_cache_round_trip(tmp_path: Path, response: DownloadResponse):
+    """Test that a written entry is read back unchanged."""
+    async with LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path)
+    ) as downloader:
+        assert await downloader.read_from_cache_async(ARCHIVE_URL) is None
+
+        await downloader.write_to_cache_async(ARCHIVE_URL, response)
+
+        assert await downloader.read_from_cache_async(ARCHIVE_URL) == response
+
+
+@pytest.mark.asyncio
+async def test_cache_write_leaves_no_temporary_files(
+    tmp_path: Path, response: DownloadResponse
+):
+    """Test that overwriting an entry replaces it atomically."""
+    async with LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path)
+    ) as downloader:
+        await downloader.write_to_cache_async(ARCHIVE_URL, response)
+        await downloader.write_to_cache_async(
+            ARCHIVE_URL, {**response, "content": "<html>10-K/A</html>"}
+        )
+        cached = await downloader.read_from_cache_async(ARCHIVE_URL)
+
+    assert cached is not None
+    assert cached["content"] == "<html>10-K/A</html>"
+    assert [path.name for path in tmp_path.rglob("*") if path.is_file()] == ["doc.htm"]
+
+
+@pytest.mark.asyncio
+async def test_corrupt_cache_entry_is_a_miss(tmp_path: Path):
+    """Test that an unreadable entry is treated as not cached."""
+    path = tmp_path / "Archives/edgar/data/123/000012300000001/doc.htm"
+    path.parent.mkdir(parents=True)
+    _ = path.write_text('{"url": "truncated')
+
+    async with LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path)
+    ) as downloader:
+        assert await downloader.read_from_cache_async(ARCHIVE_URL) is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_cache_keeps_content(tmp_path: Path, response: DownloadResponse):
+    """Test that refreshing an entry only moves its fetched_at forward."""
+    async with LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path)
+    ) as downloader:
+        await downloader.write_to_cache_async(ARCHIVE_URL, response)
+        refreshed = await downloader.refresh_cache_async(ARCHIVE_URL, 1800000000.0)
+        metadata = await downloader.read_cache_metadata_async(ARCHIVE_URL)
+
+    assert refreshed == {**response, "fetched_at": 1800000000.0}
+    assert metadata is not None
+    assert metadata.get("fetched_at") == 1800000000.0
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import pytest
+
+from .constants import SEC_URL
+from .downloader_sqlite import SqliteCacheDownloader
+from .testing import make_response
+
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_cache_round_trip_keyed_by_full_url(tmp_path: Path):
+    """Test that URLs differing only by query string do not collide."""
+    first = f"{SEC_URL}/cgi-bin/browse-edgar?CIK=1"
+    second = f"{SEC_URL}/cgi-bin/browse-edgar?CIK=2"
+
+    async with SqliteCacheDownloader(
+        user_agent="test", database=str(tmp_path / "cache.sqlite")
+    ) as downloader:
+        response = make_response(
+            first, "one", last_modified=LAST_MODIFIED, fetched_at=1704067200.0
+        )
+        await downloader.write_to_cache_async(first, response)
+        await downloader.write_to_cache_async(second, make_response(second, "two"))
+
+        assert await downloader.read_from_cache_async(first) == response
+        metadata = await downloader.read_cache_metadata_async(second)
+        assert metadata is not None
+        assert metadata["url"] == second
+        assert await downloader.read_from_cache_async(f"{SEC_URL}/other") is None
+
+
+@pytest.mark.asyncio
+async def test_get_many_put_many(tmp_path: Path):
+    """Test bulk reads and writes."""
+    urls = [f"{SEC_URL}/Archives/{i}.htm" for i in range(10)]
+
+    async with SqliteCacheDownloader(
+        user_agent="test", database=str(tmp_path / "cache.sqlite")
+    ) as downloader:
+        await downloader.put_many_async((url, make_response(url, url)) for url in urls)
+        cached = await downloader.get_many_async([*urls, f"{SEC_URL}/missing"])
+
+    assert sorted(cached) == sorted(urls)
+    assert all(cached[url]["content"] == url for url in urls)
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_keeps_within_budget(tmp_path: Path):
+    """Test that least recently used entries are evicted first."""
+    urls = [f"{SEC_URL}/Archives/{i}.htm" for i in range(20)]
+
+    async with SqliteCacheDownloader(
+        user_agent="test",
+        database=str(tmp_path / "cache.sqlite"),
+        max_bytes=10 * 1000,
+        compression="identity",
+    ) as downloader:
+        for url in urls:
+            await downloader.write_to_cache_async(url, make_response(url, "x" * 1000))
+
+        assert await downloader.get_stored_bytes_async() <= 10 * 1000
+        assert await downloader.read_from_cache_async(urls[0]) is None
+        assert await downloader.read_from_cache_async(urls[-1]) is not None
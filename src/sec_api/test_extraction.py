@@ -0,0 +1,129 @@
+import json
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+
+from .extraction import (
+    DocumentExtractor,
+    ExtractedDocument,
+    get_section_text,
+    html_to_text,
+    split_sections,
+)
+from .scheduler import ScheduledResult
+from .testing import make_response
+from .typings import DownloadResponse
+
+URL = "https://www.sec.gov/Archives/edgar/data/1/000000000124000001/doc.htm"
+
+FILING = """<?xml version="1.0"?>
+<html><head><title>10-K</title><style>p { margin: 0 }</style></head><body>
+<div style="display: none"><ix:header><ix:hidden>
+<ix:nonNumeric name="dei:AmendmentFlag">false</ix:nonNumeric>
+</ix:hidden></ix:header></div>
+<script>var x = "Item 9. Not text";</script>
+<table>
+<tr><td>Item 1.</td><td>Business</td><td>3</td></tr>
+<tr><td>Item 1A.</td><td>Risk Factors</td><td>5</td></tr>
+<tr><td>Item 7.</td><td>Management&#8217;s Discussion</td><td>9</td></tr>
+</table>
+<p>PART I</p>
+<p style="font-weight:bold">Item 1. Business</p>
+<p>We make <ix:nonNumeric name="dei:Product">widgets</ix:nonNumeric>
+ and   sell them.</p>
+<p>Item 1A. Risk Factors</p>
+<p>Widgets&nbsp;may break.</p>
+<p>PART II</p>
+<p>ITEM 7 &#8212; Management&#8217;s Discussion</p>
+<table>
+<tr><td>Revenue</td><td>$</td><td><ix:nonFraction name="us-gaap:Revenues">1,000</ix:nonFraction></td></tr>
+</table>
+<p>Revenue grew.</p>
+</body></html>
+"""
+
+
+def test_html_to_text_keeps_visible_text_only():
+    """Test that hidden, script and numeric table content is left out."""
+    text = html_to_text(FILING)
+
+    assert "AmendmentFlag" not in text and "false" not in text
+    assert "Not text" not in text
+    assert "1,000" not in text
+    assert "We make widgets and sell them." in text
+    assert "Widgets may break." in text
+    # A table of words, like the contents, is kept
+    assert "Item 1A. Risk Factors 5" in text
+    assert "1,000" in html_to_text(FILING, numeric_tables=True)
+
+
+def test_split_sections_skips_table_of_contents():
+    """Test that items are the runs of body text, not the contents lines."""
+    text = html_to_text(FILING)
+    sections = split_sections(text)
+
+    assert [(s["part"], s["item"], s["title"]) for s in sections] == [
+        ("I", "1", "Business"),
+        ("I", "1A", "Risk Factors"),
+        ("II", "7", "Management’s Discussion"),
+    ]
+    document = ExtractedDocument(
+        url=URL, sha256="", version=1, text=text, sections=sections
+    )
+    assert get_section_text(document, "1a") == (
+        "Item 1A. Risk Factors\nWidgets may break."
+    )
+    assert get_section_text(document, "7", part="I") is None
+
+
+@pytest.mark.asyncio
+async def test_extractor_caches_by_content_hash(tmp_path: Path):
+    """Test that an unchanged document is read back, a changed one re-extracted."""
+    extractor = DocumentExtractor(str(tmp_path), workers=1)
+    try:
+        document = await extractor.extract_async(make_response(URL, FILING))
+        path = extractor.get_path(URL)
+        assert path is not None and (
+            path
+            == tmp_path / "Archives/edgar/data/1/000000000124000001/doc.htm.text.json"
+        )
+
+        # Mark the cached copy, to tell it apart from a fresh extraction
+        _ = path.write_text(json.dumps({**document, "text": "cached"}))
+        cached = await extractor.extract_async(make_response(URL, FILING))
+        changed = await extractor.extract_async(
+            make_response(URL, FILING.replace("widgets", "gadgets"))
+        )
+    finally:
+        await extractor.aclose()
+
+    assert [item["item"] for item in document["sections"]] == ["1", "1A", "7"]
+    assert cached["text"] == "cached"
+    assert "We make gadgets" in changed["text"]
+    assert changed["sha256"] != document["sha256"]
+
+
+@pytest.mark.asyncio
+async def test_extracts_from_download_stream():
+    """Test that downloads are extracted as they come and errors pass through."""
+
+    async def downloads() -> AsyncGenerator[ScheduledResult[int, DownloadResponse]]:
+        for i in range(5):
+            yield ScheduledResult[int, DownloadResponse](
+                item=i, value=make_response(f"{URL}?{i}", FILING)
+            )
+        yield ScheduledResult[int, DownloadResponse](item=5, error=ValueError("404"))
+
+    extractor = DocumentExtractor(None, workers=2)
+    try:
+        results = [
+            result async for result in extractor.iter_extracted_async(downloads(), 2)
+        ]
+    finally:
+        await extractor.aclose()
+
+    done = sorted(result["item"] for result in results if "value" in result)
+    errors = [str(result["error"]) for result in results if "error" in result]
+    assert done == [0, 1, 2, 3, 4]
+    assert errors == ["404"]
@@ -0,0 +1,67 @@
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from . import facts_store, xbrl
+from .facts_store import FactsSegment, FactsStore
+from .test_xbrl import make_company_facts
+from .xbrl import FactsTable
+
+
+def make_archive(path: Path, revenues: dict[int, float]) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        for cik, revenue in revenues.items():
+            zf.writestr(
+                f"CIK{cik:010d}.json", json.dumps(make_company_facts(cik, revenue))
+            )
+        # A company without XBRL filings
+        zf.writestr("CIK0000000999.json", json.dumps({"cik": 999, "entityName": "X"}))
+    return path
+
+
+@pytest.mark.asyncio
+async def test_ingest_and_query_across_segments(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a frame query gathers every company's fact from each segment."""
+    monkeypatch.setattr(facts_store, "BATCH_SIZE", 2)
+    archive = make_archive(tmp_path / "companyfacts.zip", {1: 10.0, 2: 20.0, 3: 30.0})
+    store = FactsStore(str(tmp_path / "companyfacts"))
+
+    stats = await store.ingest_archive_async(archive, workers=1)
+    frame = await store.get_frame_async("us-gaap", "Revenues", "USD", "CY2024Q1")
+    assets = await store.query_async("us-gaap:Assets", frame="CY2024Q1I")
+    company = await store.query_async("us-gaap:Revenues", cik=2)
+    missing = await store.query_async("us-gaap:Revenues", unit="EUR")
+
+    assert (stats["companies"], stats["facts"], stats["segments"]) == (4, 12, 2)
+    assert [(fact["cik"], fact["val"]) for fact in frame] == [
+        (1, 10.0),
+        (2, 20.0),
+        (3, 30.0),
+    ]
+    assert [fact["val"] for fact in assets] == [100.0, 200.0, 300.0]
+    assert [fact["end"] for fact in company] == ["2023-12-31", "2024-03-31"]
+    assert len(missing) == 0
+
+    # A new archive replaces every segment
+    archive = make_archive(tmp_path / "companyfacts.zip", {4: 40.0})
+    _ = await store.ingest_archive_async(archive, workers=1)
+    frame = await store.get_frame_async("us-gaap", "Revenues", "USD", "CY2024Q1")
+    await store.aclose()
+
+    assert [(fact["cik"], fact["val"]) for fact in frame] == [(4, 40.0)]
+
+
+def test_segment_without_sort_keys(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Test that a table encoded without its key column is not a segment."""
+    monkeypatch.setattr(xbrl, "MAX_SORTED_STRINGS", 1)
+    path = tmp_path / "CIK0000000001.facts"
+    _ = path.write_bytes(
+        FactsTable.from_company_facts(make_company_facts(1, 10.0)).encode()
+    )
+
+    with pytest.raises(ValueError, match="without sort keys"):
+        _ = FactsSegment(path)
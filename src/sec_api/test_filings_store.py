@@ -0,0 +1,117 @@
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from .company import Company
+from .filings_store import FILING_COLUMNS, FilingsStore, columns_to_rows
+from .testing import FakeDownloader
+
+
+def make_columns(accession_numbers: list[str]) -> dict[str, list[object]]:
+    columns: dict[str, list[object]] = {
+        name: [default] * len(accession_numbers)
+        for name, default in FILING_COLUMNS.items()
+    }
+    columns["accessionNumber"] = list(accession_numbers)
+    columns["form"] = ["10-K"] * len(accession_numbers)
+    return columns
+
+
+def make_archive(path: Path, recent: list[str], page: list[str]) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr(
+            "CIK0000000123.json",
+            json.dumps(
+                {
+                    "cik": "123",
+                    "name": "ACME",
+                    "filings": {
+                        "recent": make_columns(recent),
+                        "files": [{"name": "CIK0000000123-submissions-001.json"}],
+                    },
+                }
+            ),
+        )
+        zf.writestr(
+            "CIK0000000123-submissions-001.json", json.dumps(make_columns(page))
+        )
+        zf.writestr(
+            "CIK0000000456.json",
+            json.dumps({"cik": "456", "filings": {"recent": make_columns(["c"])}}),
+        )
+    return path
+
+
+@pytest.mark.asyncio
+async def test_ingest_loads_recent_and_pages(tmp_path: Path):
+    """Test that every filing, pages included, is stored newest first."""
+    archive = make_archive(tmp_path / "submissions.zip", ["a3", "a2"], ["a1"])
+    store = FilingsStore(str(tmp_path / "filings.sqlite"))
+
+    stats = await store.ingest_archive_async(archive, workers=1)
+    filings = await store.get_filings_async(123)
+    await store.aclose()
+
+    assert stats["companies"] == 2
+    assert stats["filings"] == 4
+    assert filings is not None
+    assert [f["accessionNumber"] for f in filings] == ["a3", "a2", "a1"]
+    assert filings[0]["cik"] == "0000000123"
+    assert filings[0]["form"] == "10-K"
+
+
+@pytest.mark.asyncio
+async def test_reingest_replaces_and_unknown_is_none(tmp_path: Path):
+    """Test that a newer archive replaces a company's filings."""
+    store = FilingsStore(str(tmp_path / "filings.sqlite"))
+
+    _ = await store.ingest_archive_async(
+        make_archive(tmp_path / "old.zip", ["a1"], []), workers=1
+    )
+    _ = await store.ingest_archive_async(
+        make_archive(tmp_path / "new.zip", ["a2", "a1"], []), workers=1
+    )
+    filings = await store.get_filings_async("0000000123")
+    missing = await store.get_filings_async(789)
+    await store.aclose()
+
+    assert filings is not None
+    assert [f["accessionNumber"] for f in filings] == ["a2", "a1"]
+    assert missing is None
+
+
+@pytest.mark.asyncio
+async def test_company_reads_from_store(tmp_path: Path):
+    """Test that Company does not hit the network for ingested filers."""
+    store = FilingsStore(str(tmp_path / "filings.sqlite"))
+    _ = await store.ingest_archive_async(
+        make_archive(tmp_path / "submissions.zip", ["a2"], ["a1"]), workers=1
+    )
+
+    company = Company(123, FakeDownloader(), store=store)
+    filings = await company.get_filing_details_async(form="10-K")
+    await store.aclose()
+
+    assert [f["accessionNumber"] for f in filings] == ["a2", "a1"]
+
+
+@pytest.mark.asyncio
+async def test_company_with_uneven_columns_is_left_out(tmp_path: Path):
+    """Test that a short column drops its company, not some of its filings."""
+    archive = make_archive(tmp_path / "submissions.zip", ["a2", "a1"], [])
+    with zipfile.ZipFile(archive, "a") as zf:
+        columns = make_columns(["b2", "b1"])
+        columns["form"] = ["10-K"]
+        zf.writestr("CIK0000000789.json", json.dumps({"filings": {"recent": columns}}))
+    store = FilingsStore(str(tmp_path / "filings.sqlite"))
+
+    stats = await store.ingest_archive_async(archive, workers=1)
+    uneven = await store.get_filings_async(789)
+    await store.aclose()
+
+    assert stats["companies"] == 2
+    assert uneven is None
+    with pytest.raises(ValueError):
+        _ = columns_to_rows(789, columns)
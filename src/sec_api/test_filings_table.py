@@ -0,0 +1,152 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from .filings_table import FilingsTable
+from .typings import DateField, Filing, SubmissionsJSON_Filings_Recent
+from .utils import transform_columns_to_filings
+
+FORMS = ["10-K", "10-Q", "8-K", "4"]
+
+
+@pytest.fixture
+def columns() -> SubmissionsJSON_Filings_Recent:
+    rng = random.Random(0)
+    count = 500
+    filed = [
+        date(2024, 1, 1) - timedelta(days=rng.randint(0, 4000)) for _ in range(count)
+    ]
+    forms = rng.choices(FORMS, k=count)
+    return {
+        "accessionNumber": [f"0000000123-24-{i:06d}" for i in range(count)],
+        "filingDate": [day.isoformat() for day in filed],
+        # Some forms come without a report date
+        "reportDate": [
+            "" if rng.random() < 0.1 else (day - timedelta(days=30)).isoformat()
+            for day in filed
+        ],
+        "acceptanceDateTime": [
+            f"{day.isoformat()}T{rng.randint(6, 21):02d}:30:00.000Z" for day in filed
+        ],
+        "act": ["34"] * count,
+        "form": forms,
+        "fileNumber": ["001-00123"] * count,
+        "filmNumber": [str(i) for i in range(count)],
+        "items": [""] * count,
+        "core_type": forms,
+        "size": [rng.randint(1, 10**6) for _ in range(count)],
+        "isXBRL": [int(form in ("10-K", "10-Q")) for form in forms],
+        "isInlineXBRL": [0] * count,
+        "primaryDocument": [f"doc{i}.htm" for i in range(count)],
+        "primaryDocDescription": forms,
+    }
+
+
+def filter_filings(
+    filings: list[Filing],
+    form: str | None,
+    start_date: str | None,
+    end_date: str | None,
+    date_field: DateField = "reportDate",
+) -> list[Filing]:
+    """The list of dicts filter the table replaces"""
+    return [
+        f
+        for f in filings
+        if (start_date is None or start_date <= f[date_field])
+        and (end_date is None or end_date >= f[date_field])
+        and (form is None or form == f["form"])
+    ]
+
+
+def test_rows_match_filing_dicts(columns: SubmissionsJSON_Filings_Recent):
+    """Test that row views are the dicts the columns used to become."""
+    table = FilingsTable("0000000123", columns)
+
+    assert len(table) == 500
+    assert list(table) == transform_columns_to_filings("0000000123", columns)
+    assert sorted(table.forms) == sorted(FORMS)
+
+
+@pytest.mark.parametrize(
+    ("form", "start_date", "end_date"),
+    [
+        (None, None, None),
+        ("10-K", None, None),
+        (None, "2020-01-01", None),
+        (None, None, "2018-06-30"),
+        ("4", "2016-01-01", "2019-12-31"),
+        ("S-1", None, None),
+    ],
+)
+def test_filter_matches_list_of_dicts(
+    columns: SubmissionsJSON_Filings_Recent,
+    form: str | None,
+    start_date: str | None,
+    end_date: str | None,
+):
+    """Test that column filters select what the per-dict filter did."""
+    table = FilingsTable("0000000123", columns)
+    filings = transform_columns_to_filings("0000000123", columns)
+
+    assert table.filter(
+        form=form, start_date=start_date, end_date=end_date
+    ) == filter_filings(filings, form, start_date, end_date)
+
+
+def test_filter_on_xbrl(columns: SubmissionsJSON_Filings_Recent):
+    """Test the isXBRL filter, combined with a form."""
+    table = FilingsTable("0000000123", columns)
+
+    assert {f["form"] for f in table.filter(is_xbrl=True)} == {"10-K", "10-Q"}
+    assert table.select(form="8-K", is_xbrl=True) == []
+
+
+@pytest.mark.parametrize(
+    ("form", "start_date", "end_date"),
+    [
+        # Wide range, the form's rows are fewer than the range's
+        ("10-K", "2014-01-01", "2023-12-31"),
+        # Narrow range, its rows are fewer than the form's
+        ("4", "2019-03-01", "2019-03-31"),
+        (None, "2019-03-01", "2019-03-31"),
+        ("8-K", "2030-01-01", None),
+    ],
+)
+def test_filter_on_filing_date(
+    columns: SubmissionsJSON_Filings_Recent,
+    form: str | None,
+    start_date: str | None,
+    end_date: str | None,
+):
+    """Test range lookups on the filing date, through either index."""
+    table = FilingsTable("0000000123", columns)
+    filings = transform_columns_to_filings("0000000123", columns)
+
+    assert table.filter(
+        form=form, start_date=start_date, end_date=end_date, date_field="filingDate"
+    ) == filter_filings(filings, form, start_date, end_date, "filingDate")
+
+
+def test_filter_on_acceptance_date_time(columns: SubmissionsJSON_Filings_Recent):
+    """Test that acceptance bounds take datetimes, and dates as whole days."""
+    table = FilingsTable("0000000123", columns)
+    filings = transform_columns_to_filings("0000000123", columns)
+
+    by_day = table.filter(
+        start_date="2019-01-01", end_date="2019-12-31", date_field="acceptanceDateTime"
+    )
+    assert by_day == filter_filings(
+        filings, None, "2019-01-01", "2019-12-31", "filingDate"
+    )
+
+    afternoon = table.filter(
+        start_date="2019-01-01T12:00:00Z",
+        end_date="2019-12-31T12:00:00+00:00",
+        date_field="acceptanceDateTime",
+    )
+    assert afternoon == filter_filings(
+        filings, None, "2019-01-01T12", "2019-12-31T12", "acceptanceDateTime"
+    )
+    assert len(afternoon) < len(by_day)
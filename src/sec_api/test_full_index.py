@@ -0,0 +1,126 @@
+import gzip
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+from .downloader_local import LocalCacheDownloader
+from .full_index import FullIndexStore, get_quarters, parse_master_index
+from .testing import Reply, Serve
+
+HEADER = b"""Description:           Master Index of EDGAR Dissemination Feed
+Last Data Received:    March 31, 2024
+Comments:              webmaster@sec.gov
+Anonymous FTP:         ftp://ftp.sec.gov/edgar/
+
+
+
+
+CIK|Company Name|Form Type|Date Filed|Filename
+--------------------------------------------------------------------------------
+"""
+
+MASTER_INDEX = HEADER + (
+    b"1000045|NICHOLAS FINANCIAL INC|10-Q|2024-02-14|"
+    + b"edgar/data/1000045/0000950170-24-015223.txt\n"
+    + b"1000045|NICHOLAS FINANCIAL INC|8-K|2024-03-01|"
+    + b"edgar/data/1000045/0000950170-24-020001.txt\n"
+    + b"320193|Apple Inc.|10-Q|2024-02-02|"
+    + b"edgar/data/320193/0000320193-24-000006.txt\n"
+    + b"1234567|Soci\xe9t\xe9 G\xe9n\xe9rale|4|20240105|"
+    + b"edgar/data/1234567/0001234567-24-000001.txt\n"
+)
+
+
+def get_accession_numbers(entries: list[dict[str, object]]) -> list[object]:
+    return [entry["accessionNumber"] for entry in entries]
+
+
+def test_parse_master_index():
+    """Test that entries follow the header, whatever their date or encoding."""
+    rows = list(parse_master_index(MASTER_INDEX.splitlines(keepends=True), 2024, 1))
+
+    assert len(rows) == 4
+    assert rows[0] == (
+        2024,
+        1,
+        1000045,
+        "NICHOLAS FINANCIAL INC",
+        "10-Q",
+        "2024-02-14",
+        "0000950170-24-015223",
+        "edgar/data/1000045/0000950170-24-015223.txt",
+    )
+    assert rows[3][3] == "Société Générale"
+    assert rows[3][5] == "2024-01-05"
+
+
+def test_get_quarters():
+    assert get_quarters("2023-11-15", "2024-04-01") == [(2023, 4), (2024, 1), (2024, 2)]
+    assert get_quarters("2024-01-01", "2024-03-31") == [(2024, 1)]
+
+
+@pytest.mark.asyncio
+async def test_ingest_and_query(tmp_path: Path):
+    """Test queries across companies by form, CIK and date, newest first."""
+    path = tmp_path / "master.gz"
+    _ = path.write_bytes(gzip.compress(MASTER_INDEX))
+    store = FullIndexStore(str(tmp_path / "full_index.sqlite"))
+
+    assert await store.ingest_file_async(path, 2024, 1) == 4
+    ten_qs = await store.query_async(form="10-Q")
+    company = await store.query_async(cik=1000045)
+    january = await store.query_async(end_date="2024-01-31")
+    # Ingesting a quarter again replaces it
+    assert await store.ingest_file_async(path, 2024, 1) == 4
+    everything = await store.query_async(limit=10)
+    await store.aclose()
+
+    assert get_accession_numbers(ten_qs) == [  # pyright: ignore[reportArgumentType]
+        "0000950170-24-015223",
+        "0000320193-24-000006",
+    ]
+    assert ten_qs[0]["companyName"] == "NICHOLAS FINANCIAL INC"
+    assert [entry["form"] for entry in company] == ["8-K", "10-Q"]
+    assert [entry["cik"] for entry in january] == [1234567]
+    assert len(everything) == 4
+
+
+@pytest.fixture
+def index_server(serve: Serve) -> tuple[str, list[str]]:
+    """Server for the quarterly master.gz files, honouring If-Modified-Since"""
+    served: list[str] = []
+    last_modified = formatdate(0, usegmt=True)
+    body = gzip.compress(MASTER_INDEX)
+
+    def respond(handler: BaseHTTPRequestHandler) -> Reply:
+        not_modified = handler.headers.get("If-Modified-Since") == last_modified
+        served.append(handler.path)
+        headers = {"Last-Modified": last_modified}
+        return 304 if not_modified else 200, headers, b"" if not_modified else body
+
+    return f"{serve(respond)}/full-index", served
+
+
+@pytest.mark.asyncio
+async def test_settled_quarters_are_downloaded_once(
+    tmp_path: Path, index_server: tuple[str, list[str]]
+):
+    """Test that a past quarter, once ingested, needs no more requests."""
+    base_url, served = index_server
+    store = FullIndexStore(str(tmp_path / "full_index.sqlite"))
+
+    async with LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path / "cache")
+    ) as downloader:
+        first = await store.update_quarters_async(
+            downloader, [(2024, 1), (2024, 1)], base_url
+        )
+        again = await store.update_quarter_async(downloader, 2024, 1, base_url)
+    entries = await store.query_async(start_date="2024-01-01", end_date="2024-03-31")
+    await store.aclose()
+
+    assert (first, again) == (1, False)
+    assert served == ["/full-index/2024/QTR1/master.gz"]
+    assert len(entries) == 4
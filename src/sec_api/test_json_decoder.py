@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from .json_decoder import (
+    BACKEND_ENVIRONMENT_VARIABLE,
+    JsonBackend,
+    JsonDecoder,
+    get_default_backend,
+    msgspec,
+)
+from .typings import DownloadResponse, SubmissionsJSON_Filings_File
+
+BACKENDS: list[JsonBackend] = (
+    ["pydantic"] if msgspec is None else ["pydantic", "msgspec"]
+)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_decodes_and_coerces_like_pydantic(backend: JsonBackend):
+    """Test that every backend validates and coerces the same payload alike."""
+    decoder = JsonDecoder(SubmissionsJSON_Filings_File, backend)
+    payload = {
+        "name": "CIK0000000123-submissions-001.json",
+        "filingCount": "2",
+        "filingFrom": "2015-01-01",
+        "filingTo": "2019-12-31",
+        "unknown": [1, 2],
+    }
+
+    assert decoder(json.dumps(payload)) == {
+        "name": "CIK0000000123-submissions-001.json",
+        "filingCount": 2,
+        "filingFrom": "2015-01-01",
+        "filingTo": "2019-12-31",
+    }
+    assert decoder(json.dumps(payload).encode()) == decoder(json.dumps(payload))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize(
+    "content",
+    [
+        "{not json",
+        '{"url": "u", "status_code": 200}',
+        '{"url": "u", "status_code": "OK", "content": "", "last_modified": "", '
+        + '"content_type": null}',
+    ],
+)
+def test_invalid_payloads_raise_value_error(backend: JsonBackend, content: str):
+    """Test that malformed and mistyped payloads raise ValueError."""
+    decoder = JsonDecoder(DownloadResponse, backend)
+
+    with pytest.raises(ValueError):
+        _ = decoder(content)
+
+
+def test_backend_from_environment(monkeypatch: pytest.MonkeyPatch):
+    """Test that the environment variable picks the backend at runtime."""
+    monkeypatch.setenv(BACKEND_ENVIRONMENT_VARIABLE, "pydantic")
+    assert JsonDecoder(DownloadResponse).backend == "pydantic"
+
+    monkeypatch.setenv(BACKEND_ENVIRONMENT_VARIABLE, "simdjson")
+    with pytest.raises(ValueError):
+        _ = get_default_backend()
+
+    monkeypatch.delenv(BACKEND_ENVIRONMENT_VARIABLE)
+    assert get_default_backend() == ("pydantic" if msgspec is None else "msgspec")
+
+
+@pytest.mark.skipif(msgspec is not None, reason="msgspec is installed")
+def test_msgspec_backend_requires_msgspec():
+    with pytest.raises(RuntimeError):
+        _ = JsonDecoder(DownloadResponse, "msgspec")
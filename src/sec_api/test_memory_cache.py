@@ -0,0 +1,77 @@
+import json
+from typing import cast
+
+from .memory_cache import ENTRY_OVERHEAD, MemoryCache
+from .testing import make_response
+from .typings import DownloadResponse
+
+
+def parse(content: str) -> list[int]:
+    return cast(list[int], json.loads(content))
+
+
+def test_lru_eviction_by_bytes():
+    """Test that the least recently used entries go first once over budget."""
+    cache = MemoryCache(max_bytes=3 * (100 + ENTRY_OVERHEAD))
+
+    for url in ("a", "b", "c"):
+        cache.put(url, make_response(url, "x" * 100))
+    assert cache.get("a") is not None
+
+    cache.put("d", make_response("d", "x" * 100))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats["evictions"] == 1
+    assert cache.stats["entries"] == 3
+    assert cache.stats["bytes"] <= 3 * (100 + ENTRY_OVERHEAD)
+
+
+def test_oversized_entry_is_not_cached():
+    """Test that an entry larger than the whole budget is skipped."""
+    cache = MemoryCache(max_bytes=100)
+    cache.put("a", make_response("a", "x" * 1000))
+
+    assert cache.get("a") is None
+    assert cache.stats == {
+        "hits": 0,
+        "misses": 1,
+        "parsed_hits": 0,
+        "parsed_misses": 0,
+        "evictions": 0,
+        "entries": 0,
+        "bytes": 0,
+    }
+
+
+def test_parsed_objects_follow_content():
+    """Test that parsed objects survive revalidation but not new content."""
+    cache = MemoryCache()
+    response = make_response("a", "[1, 2]")
+    cache.put("a", response)
+
+    assert cache.get_parsed("a", response, parse) is None
+    cache.put_parsed("a", response, parse, [1, 2])
+    assert cache.get_parsed("a", response, parse) == ([1, 2],)
+
+    # Revalidated, same content
+    revalidated: DownloadResponse = {**response, "fetched_at": 1.0}
+    cache.put("a", revalidated)
+    assert cache.get_parsed("a", revalidated, parse) == ([1, 2],)
+
+    # Changed upstream
+    changed = make_response("a", "[3]")
+    cache.put("a", changed)
+    assert cache.get_parsed("a", changed, parse) is None
+    assert cache.stats["parsed_hits"] == 2
+    assert cache.stats["parsed_misses"] == 2
+
+
+def test_parsed_objects_need_a_cached_response():
+    """Test that objects are not cached for responses the cache does not hold."""
+    cache = MemoryCache()
+    response = make_response("a", "[]")
+
+    cache.put_parsed("a", response, parse, [])
+
+    assert cache.get_parsed("a", response, parse) is None
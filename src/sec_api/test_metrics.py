@@ -0,0 +1,121 @@
+import json
+import logging
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import cast
+
+import pytest
+
+from .downloader_local import LocalCacheDownloader
+from .freshness import PatternFreshnessPolicy
+from .memory_cache import MemoryCache
+from .metrics import CallbackSink, LogSink, MetricEvent, Metrics, PrometheusSink
+from .rate_control import AdaptiveRateController
+from .testing import Reply, Serve
+
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+@pytest.fixture
+def server(serve: Serve) -> str:
+    """Throttles the first request, then serves JSON revalidated with 304s"""
+    statuses = [429]
+
+    def respond(handler: BaseHTTPRequestHandler) -> Reply:
+        if statuses:
+            status = statuses.pop(0)
+        elif handler.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            status = 304
+        else:
+            status = 200
+        headers = {"Last-Modified": LAST_MODIFIED}
+        if status == 429:
+            headers["Retry-After"] = "0"
+        return status, headers, b'{"name": "ok"}' if status == 200 else b""
+
+    return serve(respond)
+
+
+def test_prometheus_exposition():
+    """Test counters and cumulative histogram buckets in the text format."""
+    sink = PrometheusSink(buckets=(0.1, 1.0))
+    metrics = Metrics(sink)
+    metrics.increment("http_requests_total", status="200")
+    metrics.increment("http_requests_total", status="200")
+    metrics.increment("http_requests_total", status="304")
+    metrics.increment("http_response_bytes_total", 1024)
+    metrics.observe("parse_seconds", 0.05, parser='a"b')
+    metrics.observe("parse_seconds", 0.5, parser='a"b')
+    metrics.observe("parse_seconds", 2.0, parser='a"b')
+
+    assert sink.render() == (
+        "# TYPE sec_api_http_requests_total counter\n"
+        + 'sec_api_http_requests_total{status="200"} 2\n'
+        + 'sec_api_http_requests_total{status="304"} 1\n'
+        + "# TYPE sec_api_http_response_bytes_total counter\n"
+        + "sec_api_http_response_bytes_total 1024\n"
+        + "# TYPE sec_api_parse_seconds histogram\n"
+        + 'sec_api_parse_seconds_bucket{parser="a\\"b",le="0.1"} 1\n'
+        + 'sec_api_parse_seconds_bucket{parser="a\\"b",le="1"} 2\n'
+        + 'sec_api_parse_seconds_bucket{parser="a\\"b",le="+Inf"} 3\n'
+        + 'sec_api_parse_seconds_sum{parser="a\\"b"} 2.55\n'
+        + 'sec_api_parse_seconds_count{parser="a\\"b"} 3\n'
+    )
+
+
+@pytest.mark.asyncio
+async def test_log_sink_and_disabled_metrics(caplog: pytest.LogCaptureFixture):
+    """Test structured log records, and that no sinks means no metrics."""
+    metrics = Metrics(LogSink(level=logging.INFO))
+    with caplog.at_level(logging.INFO, logger="src.sec_api.metrics"):
+        metrics.observe("limiter_wait_seconds", 0.25)
+
+    assert caplog.messages == ["limiter_wait_seconds 0.25"]
+    event = cast(MetricEvent, caplog.records[0].metric)  # pyright: ignore[reportAttributeAccessIssue]
+    assert event["kind"] == "histogram"
+
+    async with LocalCacheDownloader(user_agent="test", metrics=Metrics()) as downloader:
+        assert downloader.metrics is None
+
+
+@pytest.mark.asyncio
+async def test_downloader_instrumentation(server: str, tmp_path: Path):
+    """Test what one throttled download and one revalidation record."""
+    events: list[MetricEvent] = []
+    prometheus = PrometheusSink()
+    metrics = Metrics(CallbackSink(events.append), prometheus)
+
+    async with LocalCacheDownloader(
+        user_agent="test",
+        cache_directory=str(tmp_path),
+        rate_per_second=1000,
+        rate_controller=AdaptiveRateController(ceiling=1000, base_backoff=0.01),
+        # Every cached copy is revalidated
+        freshness_policy=PatternFreshnessPolicy(rules=[]),
+        memory_cache=MemoryCache(metrics=metrics),
+        metrics=metrics,
+    ) as downloader:
+        for _ in range(2):
+            assert await downloader.get_parsed_async(f"{server}/a.json", json.loads)
+
+    counts = Counter(
+        (event["name"], tuple(sorted(event["labels"].items()))) for event in events
+    )
+    assert counts[("http_requests_total", (("status", "429"),))] == 1
+    assert counts[("http_requests_total", (("status", "200"),))] == 1
+    assert counts[("http_requests_total", (("status", "304"),))] == 1
+    assert counts[("throttle_backoff_seconds", ())] == 1
+    assert counts[("limiter_wait_seconds", ())] == 3
+    assert counts[("cache_lookups_total", (("cache", "memory"), ("result", "miss")))]
+    assert counts[("cache_lookups_total", (("cache", "memory"), ("result", "hit")))]
+    assert counts[("cache_lookups_total", (("cache", "store"), ("result", "miss")))]
+    assert counts[("cache_write_seconds", ())] == 1
+    # Parsed once, the second time it comes from the memory cache
+    assert counts[("parse_seconds", (("parser", "loads"),))] == 1
+    assert sum(
+        event["value"]
+        for event in events
+        if event["name"] == "http_response_bytes_total"
+    ) == len(b'{"name": "ok"}')
+    assert 'sec_api_http_requests_total{status="304"} 1' in prometheus.render()
@@ -0,0 +1,118 @@
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from .downloader_base import BaseDownloader
+from .rate_control import AdaptiveRateController, parse_retry_after
+from .testing import Reply, Serve
+
+
+@pytest.fixture
+def throttling_server(serve: Serve) -> tuple[str, list[int]]:
+    """Server answering 429 (Retry-After: 0) to the first two requests"""
+    statuses = [429, 429]
+    served: list[int] = []
+
+    def respond(_handler: BaseHTTPRequestHandler) -> Reply:
+        status = statuses.pop(0) if statuses else 200
+        served.append(status)
+        headers = {"Last-Modified": formatdate(usegmt=True)}
+        if status == 429:
+            headers["Retry-After"] = "0"
+        return status, headers, b"ok" if status == 200 else b""
+
+    return serve(respond), served
+
+
+def test_parse_retry_after():
+    """Test both forms of Retry-After, and junk."""
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+    retry_after = parse_retry_after(formatdate(time.time() + 60, usegmt=True))
+    assert retry_after is not None and 55 < retry_after <= 60
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0
+
+
+def test_rate_cut_on_clustered_throttles_and_recovers():
+    """Test AIMD: one cut per cluster, a cooldown after it, slow recovery."""
+    controller = AdaptiveRateController(
+        ceiling=10, cluster_size=2, increase_per_success=1
+    )
+
+    controller.on_throttled(None)
+    assert controller.rate == 10
+
+    controller.on_throttled(None)
+    assert controller.rate == 5
+
+    # Stragglers sent before the cut do not cut again
+    controller.on_throttled(None)
+    controller.on_throttled(None)
+    assert controller.rate == 5
+
+    for _ in range(10):
+        controller.on_success()
+    assert controller.rate == 10
+
+
+def test_backoff():
+    """Test that Retry-After wins, and that backoff is jittered and capped."""
+    controller = AdaptiveRateController(ceiling=10, base_backoff=1, max_backoff=8)
+
+    assert controller.get_backoff(3, 2.5) == 2.5
+    assert 0.5 <= controller.get_backoff(0, None) <= 1
+    assert 2 <= controller.get_backoff(2, None) <= 4
+    assert 4 <= controller.get_backoff(10, None) <= 8
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_every_request():
+    """Test that a Retry-After holds back requests not yet sent."""
+    controller = AdaptiveRateController(ceiling=1000)
+    controller.on_throttled(0.2)
+
+    start = time.monotonic()
+    await controller.wait_async()
+
+    assert time.monotonic() - start >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_downloader_retries_throttled_requests(
+    throttling_server: tuple[str, list[int]],
+):
+    """Test that 429s are retried instead of failing the request."""
+    url, served = throttling_server
+    controller = AdaptiveRateController(ceiling=1000, base_backoff=0.01)
+
+    async with BaseDownloader(
+        user_agent="test",
+        rate_per_second=1000,
+        proxy=None,
+        rate_controller=controller,
+    ) as downloader:
+        response = await downloader.get_url_async(f"{url}/doc.htm")
+
+    assert response["status_code"] == 200
+    assert response["content"] == "ok"
+    assert served == [429, 429, 200]
+
+
+@pytest.mark.asyncio
+async def test_downloader_without_controller_fails_fast(
+    throttling_server: tuple[str, list[int]],
+):
+    """Test that `adaptive=False` surfaces the first 429."""
+    url, served = throttling_server
+
+    async with BaseDownloader(
+        user_agent="test", rate_per_second=1000, proxy=None, adaptive=False
+    ) as downloader:
+        with pytest.raises(Exception, match="429"):
+            _ = await downloader.get_url_async(f"{url}/doc.htm")
+
+    assert served == [429]
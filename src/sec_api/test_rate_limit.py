@@ -0,0 +1,69 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from .rate_limit import create_shared_limiter
+
+RATE_PER_SECOND = 10
+
+
+def acquire_tokens(database: str, count: int) -> list[float]:
+    """Acquire `count` tokens from the shared limiter, in a worker process"""
+
+    async def acquire_async() -> list[float]:
+        limiter = create_shared_limiter(database, RATE_PER_SECOND)
+        timestamps: list[float] = []
+        for _ in range(count):
+            while not await limiter.try_acquire_async("test"):
+                pass
+            timestamps.append(time.time())
+        return timestamps
+
+    return asyncio.run(acquire_async())
+
+
+def max_tokens_per_second(timestamps: list[float]) -> int:
+    timestamps = sorted(timestamps)
+    return max(
+        sum(1 for other in timestamps if start <= other < start + 1)
+        for start in timestamps
+    )
+
+
+def test_shared_limiter_holds_rate_across_processes(tmp_path: Path):
+    """Test that N processes together stay within one rate budget."""
+    database = str(tmp_path / "rate_limit.sqlite")
+    processes, tokens = 3, 8
+
+    with ProcessPoolExecutor(
+        processes, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        results = list(
+            executor.map(acquire_tokens, [database] * processes, [tokens] * processes)
+        )
+
+    timestamps = [timestamp for result in results for timestamp in result]
+
+    assert len(timestamps) == processes * tokens
+    assert max_tokens_per_second(timestamps) <= RATE_PER_SECOND
+
+
+@pytest.mark.asyncio
+async def test_shared_limiter_within_one_process(tmp_path: Path):
+    """Test that two limiters on one database share the budget."""
+    database = str(tmp_path / "rate_limit.sqlite")
+    limiters = [create_shared_limiter(database, RATE_PER_SECOND) for _ in range(2)]
+    timestamps: list[float] = []
+
+    async def acquire_async(index: int):
+        while not await limiters[index % 2].try_acquire_async("test"):
+            pass
+        timestamps.append(time.time())
+
+    _ = await asyncio.gather(*map(acquire_async, range(3 * RATE_PER_SECOND // 2)))
+
+    assert max_tokens_per_second(timestamps) <= RATE_PER_SECOND
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from .scheduler import FetchScheduler, Priority
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    """Test that no more than `max_concurrency` calls run at once."""
+    scheduler = FetchScheduler(max_concurrency=3)
+    running = peak = 0
+
+    async def fetch() -> None:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+
+    _ = await asyncio.gather(*(scheduler.run(fetch) for _ in range(20)))
+
+    assert peak == 3
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_goes_ahead_of_background():
+    """Test that waiting interactive calls start before waiting background ones."""
+    scheduler = FetchScheduler(max_concurrency=1)
+    gate = asyncio.Event()
+    started: list[str] = []
+
+    async def blocker() -> None:
+        _ = await gate.wait()
+
+    def fetch(label: str):
+        async def fetch() -> None:
+            started.append(label)
+
+        return fetch
+
+    first = asyncio.create_task(scheduler.run(blocker))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(scheduler.run(fetch("background"), Priority.BACKGROUND)),
+        asyncio.create_task(scheduler.run(fetch("interactive"))),
+    ]
+    await asyncio.sleep(0)
+    gate.set()
+    _ = await asyncio.gather(first, *waiting)
+
+    assert started == ["interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_its_turn():
+    """Test that a cancelled waiter neither runs nor holds a slot."""
+    scheduler = FetchScheduler(max_concurrency=1)
+    gate = asyncio.Event()
+
+    async def blocker() -> None:
+        _ = await gate.wait()
+
+    async def fetch() -> int:
+        return 1
+
+    first = asyncio.create_task(scheduler.run(blocker))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(scheduler.run(fetch))
+    await asyncio.sleep(0)
+    _ = cancelled.cancel()
+    gate.set()
+    await first
+
+    assert await scheduler.run(fetch) == 1
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_map_yields_failures_per_item_within_window():
+    """Test that one failure does not sink the batch, and the window holds."""
+    scheduler = FetchScheduler(max_concurrency=4)
+    started = 0
+
+    async def fetch(item: int) -> int:
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.001 * (item % 3))
+        if item == 5:
+            raise ValueError("boom")
+        return item * 2
+
+    values: dict[int, int] = {}
+    errors: dict[int, BaseException] = {}
+    async for result in scheduler.map_async(fetch, range(20), window=2):
+        # Never more than `window` items started ahead of the consumer
+        assert started - len(values) - len(errors) <= 2
+        if "error" in result:
+            errors[result["item"]] = result["error"]
+        if "value" in result:
+            values[result["item"]] = result["value"]
+
+    assert values == {i: i * 2 for i in range(20) if i != 5}
+    assert list(errors) == [5] and isinstance(errors[5], ValueError)
+
+
+@pytest.mark.asyncio
+async def test_map_closed_early_cancels_pending():
+    """Test that stopping the iteration cancels the fetches still running."""
+    scheduler = FetchScheduler(max_concurrency=4)
+    cancelled = 0
+
+    async def fetch(item: int) -> int:
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(0 if item == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled += 1
+            raise
+        return item
+
+    results = scheduler.map_async(fetch, range(100))
+    async for _ in results:
+        break
+    await results.aclose()
+
+    assert cancelled == 3
+    assert scheduler.active == 0
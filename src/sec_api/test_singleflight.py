@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from .singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_call():
+    """Test that concurrent callers for one key run the function once."""
+    single_flight: SingleFlight[str, int] = SingleFlight()
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*(single_flight.do("a", fetch) for _ in range(50)))
+
+    assert results == [42] * 50
+    assert calls == 1
+    assert len(single_flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_do_not_share():
+    """Test that calls for different keys run independently."""
+    single_flight: SingleFlight[str, str] = SingleFlight()
+
+    async def fetch(key: str) -> str:
+        await asyncio.sleep(0)
+        return key
+
+    results = await asyncio.gather(
+        single_flight.do("a", lambda: fetch("a")),
+        single_flight.do("b", lambda: fetch("b")),
+    )
+
+    assert results == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared_and_not_cached():
+    """Test that every waiter sees the failure and the next call retries."""
+    single_flight: SingleFlight[str, int] = SingleFlight()
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise ConnectionError("429")
+
+    results = await asyncio.gather(
+        *(single_flight.do("a", fetch) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+    with pytest.raises(ConnectionError):
+        _ = await single_flight.do("a", fetch)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    """Test that one caller giving up leaves the shared call running."""
+    single_flight: SingleFlight[str, int] = SingleFlight()
+
+    async def fetch() -> int:
+        await asyncio.sleep(0.01)
+        return 42
+
+    first = asyncio.create_task(single_flight.do("a", fetch))
+    second = asyncio.create_task(single_flight.do("a", fetch))
+    await asyncio.sleep(0)
+    _ = first.cancel()
+
+    assert await second == 42
+    assert first.cancelled()
@@ -0,0 +1,121 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from .cache_format import encode_cache_entry
+from .constants import DATA_SEC_URL, SEC_URL
+from .downloader_local import LocalCacheDownloader
+from .test_company import make_columns
+from .testing import make_response
+from .text_index import TextIndex
+from .typings import Filing
+
+SUBMISSIONS_URL = f"{DATA_SEC_URL}/submissions/CIK0000000123.json"
+ARCHIVES_URL = f"{SEC_URL}/Archives/edgar/data"
+
+DOCUMENTS = {
+    f"{ARCHIVES_URL}/123/000000012324000001/doc.htm": (
+        "<p>Our <b>going concern</b> doubts are material.</p>"
+    ),
+    f"{ARCHIVES_URL}/123/000000012324000002/doc.htm": (
+        "<p>The concern is going away, liquidity is fine.</p>"
+    ),
+    # A company whose submissions were never fetched
+    f"{ARCHIVES_URL}/456/0000000456-24-000009.txt": "going concern doubts",
+}
+
+
+def make_submissions() -> str:
+    columns = make_columns(
+        ("0000000123-24-000002", "2024-05-01"), ("0000000123-24-000001", "2024-02-01")
+    )
+    columns["form"] = ["10-Q", "10-K"]
+    return json.dumps({"filings": {"recent": columns, "files": []}})
+
+
+def get_accession_numbers(filings: list[Filing]) -> list[str]:
+    return [filing["accessionNumber"] for filing in filings]
+
+
+@pytest.mark.asyncio
+async def test_documents_are_indexed_as_they_are_cached(tmp_path: Path):
+    """Test that cached documents are searchable as filings, with filters."""
+    index = TextIndex(str(tmp_path / "text_index.sqlite"))
+    downloader = LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path), text_index=index
+    )
+    await downloader.write_to_cache_async(
+        SUBMISSIONS_URL, make_response(SUBMISSIONS_URL, make_submissions())
+    )
+    for url, content in DOCUMENTS.items():
+        await downloader.write_to_cache_async(url, make_response(url, content))
+    await index.wait_async()
+    unchanged = await index.add_response_async(
+        *next((url, make_response(url, content)) for url, content in DOCUMENTS.items())
+    )
+
+    words = await index.search_async("going concern")
+    phrase = await index.search_async('"going concern"', cik=123)
+    form = await index.search_async("going", form="10-Q")
+    dated = await index.search_async("concern", start_date="2024-03-01")
+    with pytest.raises(ValueError):
+        _ = await index.search_async('"unbalanced')
+    await downloader.aclose()
+    await index.aclose()
+
+    assert not unchanged
+    assert sorted(get_accession_numbers(words)) == [
+        "0000000123-24-000001",
+        "0000000123-24-000002",
+        "0000000456-24-000009",
+    ]
+    assert phrase[0]["form"] == "10-K"
+    assert phrase[0]["cik"] == "0000000123"
+    assert len(phrase) == 1
+    assert get_accession_numbers(form) == ["0000000123-24-000002"]
+    assert get_accession_numbers(dated) == ["0000000123-24-000002"]
+    # Unknown to the submissions, the filing has what its url tells
+    unknown = next(filing for filing in words if filing["cik"] == "0000000456")
+    assert (unknown["form"], unknown["primaryDocument"]) == ("", "")
+
+
+@pytest.mark.asyncio
+async def test_changed_document_no_longer_matches_old_text(tmp_path: Path):
+    """Test that re-indexing a document drops the terms of its old text."""
+    url, content = next(iter(DOCUMENTS.items()))
+    index = TextIndex(str(tmp_path / "text_index.sqlite"))
+    _ = await index.add_response_async(url, make_response(url, content))
+    changed = await index.add_response_async(
+        url, make_response(url, "<p>Revenue grew.</p>")
+    )
+    old = await index.search_async("concern")
+    new = await index.search_async("revenue")
+    await index.aclose()
+
+    assert changed
+    assert old == []
+    assert get_accession_numbers(new) == ["0000000123-24-000001"]
+
+
+@pytest.mark.asyncio
+async def test_index_cache_directory(tmp_path: Path):
+    """Test that a batch over the cache indexes what is new, once."""
+    cache = tmp_path / "cache"
+    for url, content in {SUBMISSIONS_URL: make_submissions(), **DOCUMENTS}.items():
+        path = cache / url.split("/", 3)[3]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _ = path.write_bytes(encode_cache_entry(make_response(url, content), "gzip"))
+    _ = (cache / "submissions" / "CIK0000000999.json").write_bytes(b"corrupt")
+
+    index = TextIndex(str(tmp_path / "text_index.sqlite"))
+    stats = await index.index_cache_directory_async(str(cache), workers=1)
+    again = await index.index_cache_directory_async(str(cache), workers=1)
+    filings = await index.search_async("liquidity")
+    await index.aclose()
+
+    assert (stats["documents"], stats["filings"]) == (3, 2)
+    assert (again["documents"], again["filings"]) == (0, 2)
+    assert [(filing["accessionNumber"], filing["form"]) for filing in filings] == [
+        ("0000000123-24-000002", "10-Q")
+    ]
@@ -0,0 +1,138 @@
+import pytest
+
+from .cache_format import CacheMetadata
+from .ticker_index import CompanyTickerExchange, TickerIndex
+
+COMPANIES: list[CompanyTickerExchange] = [
+    {"cik": 320193, "name": "Apple Inc.", "ticker": "AAPL", "exchange": "Nasdaq"},
+    {"cik": 789019, "name": "MICROSOFT CORP", "ticker": "MSFT", "exchange": "Nasdaq"},
+    {"cik": 1652044, "name": "Alphabet Inc.", "ticker": "GOOGL", "exchange": "Nasdaq"},
+    {"cik": 1652044, "name": "Alphabet Inc.", "ticker": "GOOG", "exchange": "Nasdaq"},
+    {
+        "cik": 1067983,
+        "name": "BERKSHIRE HATHAWAY INC",
+        "ticker": "BRK-B",
+        "exchange": "NYSE",
+    },
+    {
+        "cik": 38777,
+        "name": "FRANKLIN RESOURCES INC",
+        "ticker": "BEN",
+        "exchange": "NYSE",
+    },
+    {
+        "cik": 1000045,
+        "name": "Old Market Capital Corp",
+        "ticker": "OMCC",
+        "exchange": None,
+    },
+]
+
+
+def make_metadata(last_modified: str) -> CacheMetadata:
+    return {
+        "url": "https://www.sec.gov/files/company_tickers_exchange.json",
+        "status_code": 200,
+        "last_modified": last_modified,
+        "content_type": "application/json",
+        "fetched_at": 1704067200.0,
+    }
+
+
+@pytest.fixture
+def index() -> TickerIndex:
+    return TickerIndex(COMPANIES, make_metadata("v1"))
+
+
+def get_tickers(companies: list[CompanyTickerExchange]) -> list[str]:
+    return [company["ticker"] for company in companies]
+
+
+def test_exact_lookups(index: TickerIndex):
+    """Test ticker and CIK lookups, a CIK giving its first listed ticker."""
+    assert index.get_by_ticker("brk-b") == COMPANIES[4]
+    assert index.get_by_ticker("NOPE") is None
+    assert index.get_by_cik(1652044) == COMPANIES[2]
+    assert index.get_by_cik(1000045) == COMPANIES[6]
+    assert list(index) == COMPANIES
+
+
+def test_prefix_lookup(index: TickerIndex):
+    """Test that tickers, then names, starting with the prefix are found."""
+    assert get_tickers(index.find_prefix("goog")) == ["GOOG", "GOOGL"]
+    assert get_tickers(index.find_prefix("micro")) == ["MSFT"]
+    # BEN is an exact ticker, BERKSHIRE a name prefix
+    assert get_tickers(index.find_prefix("be")) == ["BEN", "BRK-B"]
+    assert get_tickers(index.find_prefix("a", limit=1)) == ["AAPL"]
+
+
+def test_fuzzy_lookup(index: TickerIndex):
+    """Test that misspelt names still find the company, best match first."""
+    assert get_tickers(index.find_fuzzy("microsft"))[:1] == ["MSFT"]
+    assert get_tickers(index.find_fuzzy("berkshire hathway"))[:1] == ["BRK-B"]
+    assert index.find_fuzzy("zzzz") == []
+    assert get_tickers(index.search("franklin resorces"))[:1] == ["BEN"]
+
+
+def test_encode_decode_round_trip(index: TickerIndex):
+    """Test that a decoded index answers exactly like the one encoded."""
+    decoded = TickerIndex.decode(index.encode())
+
+    assert decoded is not None
+    assert decoded.metadata == index.metadata
+    assert list(decoded) == list(index)
+    assert decoded.get_by_cik(1652044) == COMPANIES[2]
+    assert decoded.find_prefix("be") == index.find_prefix("be")
+    assert decoded.find_fuzzy("microsft") == index.find_fuzzy("microsft")
+    assert TickerIndex.decode(b"not an index") is None
+
+
+def test_incremental_update(index: TickerIndex):
+    """Test that an update drops gone companies and adds new ones in place."""
+    newer = [c for c in COMPANIES if c["ticker"] != "OMCC"]
+    newer.append(
+        {"cik": 1318605, "name": "Tesla, Inc.", "ticker": "TSLA", "exchange": "Nasdaq"}
+    )
+
+    assert index.update(newer, make_metadata("v2")) == (1, 1)
+    assert index.metadata["last_modified"] == "v2"
+    assert len(index) == len(newer)
+    assert index.get_by_ticker("OMCC") is None
+    assert index.get_by_cik(1000045) is None
+    assert index.find_fuzzy("old market capital") == []
+    assert get_tickers(index.find_prefix("tes")) == ["TSLA"]
+
+    decoded = TickerIndex.decode(index.encode())
+    assert decoded is not None
+    assert sorted(get_tickers(list(decoded))) == sorted(get_tickers(newer))
+    assert get_tickers(decoded.find_prefix("t")) == ["TSLA"]
+
+
+def test_update_rebuilds_when_most_rows_are_gone(index: TickerIndex):
+    """Test that replacing most companies rebuilds instead of piling up rows."""
+    assert index.update(COMPANIES[:2], make_metadata("v2")) == (0, 5)
+    assert list(index) == COMPANIES[:2]
+    assert TickerIndex.decode(index.encode()) is not None
+
+
+def test_update_keeps_a_ticker_listed_twice():
+    """Test that removing one of two rows with a ticker keeps the other's."""
+    relisted: CompanyTickerExchange = {
+        "cik": 1000046,
+        "name": "Franklin Successor Inc",
+        "ticker": "BEN",
+        "exchange": "NYSE",
+    }
+    index = TickerIndex([*COMPANIES, relisted], make_metadata("v1"))
+    assert index.get_by_ticker("BEN") == relisted
+
+    assert index.update(COMPANIES, make_metadata("v2")) == (0, 1)
+    assert index.get_by_ticker("BEN") == COMPANIES[5]
+
+
+def test_decode_corrupt_index(index: TickerIndex):
+    """Test that a truncated or corrupt index decodes as none."""
+    encoded = index.encode()
+
+    assert TickerIndex.decode(encoded[:-10]) is None
+    assert TickerIndex.decode(encoded.replace(b'"live"', b'"lave"', 1)) is None
@@ -0,0 +1,237 @@
+from datetime import date
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+import pytest
+
+from . import watcher
+from .downloader_local import LocalCacheDownloader
+from .freshness import PatternFreshnessPolicy
+from .rate_control import AdaptiveRateController
+from .test_full_index import HEADER
+from .testing import Reply, Serve
+from .watcher import FilingsWatcher, get_business_days
+
+# Friday 2024-02-09 to Tuesday 2024-02-13, with Monday a holiday
+DAY_1 = "/daily-index/2024/QTR1/master.20240209.idx"
+DAY_2 = "/daily-index/2024/QTR1/master.20240213.idx"
+
+
+def make_line(cik: int, form: str, filed: str, accession_number: str) -> bytes:
+    return (
+        f"{cik}|COMPANY {cik}|{form}|{filed}|"
+        + f"edgar/data/{cik}/{accession_number}.txt\n"
+    ).encode()
+
+
+class DailyIndexServer:
+    """Serves the daily index files in `files`, honouring If-Modified-Since"""
+
+    files: dict[str, bytes]
+    served: list[str]
+    last_modified: str
+    # Answered for files not in `files`
+    missing_status: int
+    url: str = ""
+
+    def __init__(self):
+        self.files = {}
+        self.served = []
+        self.missing_status = 404
+        self.last_modified = formatdate(0, usegmt=True)
+
+    def respond(self, handler: BaseHTTPRequestHandler) -> Reply:
+        self.served.append(handler.path)
+        body = self.files.get(handler.path)
+        headers = {"Last-Modified": self.last_modified}
+        if body is None:
+            return self.missing_status, headers, b""
+        if handler.headers.get("If-Modified-Since") == self.last_modified:
+            return 304, headers, b""
+        return 200, headers, body
+
+
+@pytest.fixture
+def server(serve: Serve) -> DailyIndexServer:
+    state = DailyIndexServer()
+    state.url = serve(state.respond)
+    return state
+
+
+def test_business_days():
+    """Test that weekends are skipped."""
+    assert get_business_days(date(2024, 2, 9), date(2024, 2, 13)) == [
+        date(2024, 2, 9),
+        date(2024, 2, 12),
+        date(2024, 2, 13),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_polls_only_yield_new_filings_of_watched_ciks(
+    tmp_path: Path, server: DailyIndexServer, monkeypatch: pytest.MonkeyPatch
+):
+    """Test the high-water mark across polls, republished days and restarts."""
+    monkeypatch.setattr(watcher, "get_today", lambda: date(2024, 2, 13))
+    server.files[DAY_1] = (
+        HEADER
+        + make_line(320193, "8-K", "20240209", "0000320193-24-000010")
+        + make_line(789019, "4", "20240209", "0000789019-24-000003")
+        + make_line(1000045, "10-Q", "20240209", "0000950170-24-015223")
+    )
+
+    async def poll() -> list[str]:
+        # Revalidate every request, as if each poll came after the daily
+        # index's freshness lifetime
+        async with LocalCacheDownloader(
+            user_agent="test",
+            rate_per_second=100,
+            cache_directory=str(tmp_path / "cache"),
+            freshness_policy=PatternFreshnessPolicy(rules=[]),
+        ) as downloader:
+            filings = FilingsWatcher(
+                downloader,
+                [320193, 1000045],
+                state_path=tmp_path / "watcher.json",
+                since="2024-02-09",
+                base_url=f"{server.url}/daily-index",
+            )
+            entries = await filings.poll_async()
+        return [entry["accessionNumber"] for entry in entries]
+
+    assert await poll() == ["0000320193-24-000010", "0000950170-24-015223"]
+    # Monday is a holiday, Tuesday not published yet
+    assert sorted(server.served) == sorted(
+        [DAY_1, DAY_1.replace("0209", "0212"), DAY_2]
+    )
+
+    # A restart resumes from the mark, an unchanged day is not parsed again
+    server.served.clear()
+    assert await poll() == []
+    assert sorted(server.served) == sorted(
+        [DAY_1, DAY_1.replace("0209", "0212"), DAY_2]
+    )
+
+    # A republished day only yields what it added
+    server.files[DAY_1] += make_line(
+        320193, "8-K/A", "20240209", "0000320193-24-000011"
+    )
+    server.last_modified = formatdate(60, usegmt=True)
+    assert await poll() == ["0000320193-24-000011"]
+
+    server.files[DAY_2] = HEADER + make_line(
+        1000045, "8-K", "20240213", "0000950170-24-016000"
+    )
+    assert await poll() == ["0000950170-24-016000"]
+    assert await poll() == []
+    assert b'"date": "2024-02-13"' in (tmp_path / "watcher.json").read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_prefetch_downloads_new_filings(
+    tmp_path: Path, server: DailyIndexServer, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that prefetching fetches the submission file of each new filing."""
+    monkeypatch.setattr(watcher, "get_today", lambda: date(2024, 2, 9))
+    server.files[DAY_1] = HEADER + make_line(
+        320193, "8-K", "20240209", "0000320193-24-000010"
+    )
+    submission = "/Archives/edgar/data/320193/0000320193-24-000010.txt"
+    server.files[submission] = b"<SEC-DOCUMENT>"
+
+    async with LocalCacheDownloader(
+        user_agent="test", cache_directory=str(tmp_path / "cache")
+    ) as downloader:
+        filings = FilingsWatcher(
+            downloader,
+            state_path=tmp_path / "watcher.json",
+            since="2024-02-09",
+            base_url=f"{server.url}/daily-index",
+            archives_url=f"{server.url}/Archives",
+        )
+        entries = await filings.poll_async(prefetch=True)
+        cached = await downloader.read_from_cache_async(f"{server.url}{submission}")
+
+    assert len(entries) == 1
+    assert server.served == [DAY_1, submission]
+    assert cached is not None and cached["content"] == "<SEC-DOCUMENT>"
+
+
+@pytest.mark.asyncio
+async def test_forbidden_day_file_is_missing_not_throttled(
+    tmp_path: Path, server: DailyIndexServer, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a 403 for a day file is not retried or slowing requests."""
+    monkeypatch.setattr(watcher, "get_today", lambda: date(2024, 2, 13))
+    server.missing_status = 403
+    controller = AdaptiveRateController(ceiling=100, base_backoff=0.01)
+
+    async with LocalCacheDownloader(
+        user_agent="test",
+        rate_per_second=100,
+        cache_directory=str(tmp_path / "cache"),
+        rate_controller=controller,
+    ) as downloader:
+        filings = FilingsWatcher(
+            downloader,
+            state_path=tmp_path / "watcher.json",
+            base_url=f"{server.url}/daily-index",
+        )
+        assert await filings.poll_async() == []
+
+    assert server.served == [DAY_2]
+    assert controller.rate == 100
+
+
+@pytest.mark.asyncio
+async def test_day_published_late_is_not_skipped(
+    tmp_path: Path, server: DailyIndexServer, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that a day missing before a later one is read is requested again."""
+    today = date(2024, 2, 13)
+    monkeypatch.setattr(watcher, "get_today", lambda: today)
+    day_late = DAY_1.replace("0209", "0212")
+    server.files[DAY_1] = HEADER
+    server.files[DAY_2] = HEADER + make_line(
+        1000045, "8-K", "20240213", "0000950170-24-016000"
+    )
+
+    async with LocalCacheDownloader(
+        user_agent="test",
+        rate_per_second=100,
+        cache_directory=str(tmp_path / "cache"),
+    ) as downloader:
+        filings = FilingsWatcher(
+            downloader,
+            state_path=tmp_path / "watcher.json",
+            since="2024-02-09",
+            base_url=f"{server.url}/daily-index",
+        )
+
+        async def poll() -> list[str]:
+            return [entry["accessionNumber"] for entry in await filings.poll_async()]
+
+        assert await poll() == ["0000950170-24-016000"]
+        mark = filings.high_water_mark
+        assert mark is not None and mark.get("missing") == ["2024-02-12"]
+
+        # Monday comes out after Tuesday, and is read once
+        server.files[day_late] = HEADER + make_line(
+            320193, "8-K", "20240212", "0000320193-24-000012"
+        )
+        assert await poll() == ["0000320193-24-000012"]
+        server.served.clear()
+        assert await poll() == []
+        assert day_late not in server.served
+
+        # A day still missing after the grace period is given up
+        server.files[DAY_2.replace("0213", "0215")] = HEADER
+        today = date(2024, 2, 15)
+        assert await poll() == []
+        mark = filings.high_water_mark
+        assert mark is not None and mark.get("missing") == ["2024-02-14"]
+        today = date(2024, 2, 22)
+        server.served.clear()
+        assert await poll() == []
+        assert DAY_2.replace("0213", "0214") not in server.served
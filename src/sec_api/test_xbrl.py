@@ -0,0 +1,199 @@
+import json
+
+import pytest
+
+from .testing import FakeDownloader
+from .xbrl import (
+    CompanyFactsJSON,
+    FactsTable,
+    XbrlClient,
+    get_company_facts_url,
+    get_frame_url,
+    read_facts_header,
+)
+
+
+def make_fact(
+    end: str, val: float, frame: str | None = None, start: str | None = None
+) -> dict[str, object]:
+    fact: dict[str, object] = {
+        "end": end,
+        "val": val,
+        "accn": f"0000000001-{end[2:4]}-000001",
+        "fy": int(end[:4]),
+        "fp": "Q1",
+        "form": "10-Q",
+        "filed": end[:8] + "28",
+    }
+    if start is not None:
+        fact["start"] = start
+    if frame is not None:
+        fact["frame"] = frame
+    return fact
+
+
+def make_company_facts(cik: int, revenue: float) -> CompanyFactsJSON:
+    return {
+        "cik": cik,
+        "entityName": f"COMPANY {cik}",
+        "facts": {
+            "us-gaap": {
+                "Revenues": {
+                    "label": "Revenues",
+                    "description": None,
+                    "units": {
+                        "USD": [
+                            make_fact("2023-12-31", revenue / 2, None, "2023-10-01"),
+                            make_fact("2024-03-31", revenue, "CY2024Q1", "2024-01-01"),
+                        ]
+                    },
+                },
+                "Assets": {
+                    "label": "Assets",
+                    "description": None,
+                    "units": {
+                        "USD": [make_fact("2024-03-31", revenue * 10, "CY2024Q1I")]
+                    },
+                },
+            },
+            "dei": {
+                "EntityCommonStockSharesOutstanding": {
+                    "label": None,
+                    "description": None,
+                    "units": {"shares": [make_fact("2024-04-15", 1000.0)]},
+                }
+            },
+        },
+    }  # pyright: ignore[reportReturnType]
+
+
+def test_company_facts_are_columnar():
+    """Test that facts become rows of dictionary-encoded columns."""
+    table = FactsTable.from_company_facts(make_company_facts(320193, 100.0))
+
+    assert len(table) == 4
+    assert table.concepts == [
+        "us-gaap:Revenues",
+        "us-gaap:Assets",
+        "dei:EntityCommonStockSharesOutstanding",
+    ]
+    assert table[1] == {
+        "cik": 320193,
+        "concept": "us-gaap:Revenues",
+        "unit": "USD",
+        "frame": "CY2024Q1",
+        "start": "2024-01-01",
+        "end": "2024-03-31",
+        "val": 100.0,
+        "accn": "0000000001-24-000001",
+        "fy": 2024,
+        "fp": "Q1",
+        "form": "10-Q",
+        "filed": "2024-03-28",
+    }
+    assert table[2]["start"] is None
+    assert list(table.column("val")) == [50.0, 100.0, 1000.0, 1000.0]
+    assert [fact["val"] for fact in table.filter(concept="us-gaap:Revenues")] == [
+        50.0,
+        100.0,
+    ]
+    assert table.select(frame="CY2024Q1I") == [2]
+    assert table.select(concept="us-gaap:Nope") == []
+
+
+def test_sorted_tables_find_concept_runs():
+    """Test that a sorted table bisects to a concept, unit and frame."""
+    table = FactsTable.concat(
+        FactsTable.from_company_facts(make_company_facts(cik, float(cik)))
+        for cik in (3, 1, 2)
+    ).sort()
+
+    start, end = table.find("us-gaap:Revenues", "USD", "CY2024Q1")
+    assert [fact["cik"] for fact in table.take(range(start, end))] == [3, 1, 2]
+    start, end = table.find("us-gaap:Revenues")
+    assert end - start == 6
+    assert table.find("us-gaap:Revenues", "EUR") == (0, 0)
+
+
+def test_encode_decode_round_trip():
+    """Test that a decoded table, or a range of it, matches the encoded one."""
+    table = FactsTable.from_company_facts(make_company_facts(1, 5.0)).sort()
+    encoded = table.encode()
+    decoded = FactsTable.decode(encoded)
+    parsed = read_facts_header(encoded)
+
+    assert decoded is not None and parsed is not None
+    assert list(decoded) == list(table)
+    assert list(FactsTable.from_sections(*parsed, 1, 3)) == [table[1], table[2]]
+    assert FactsTable.decode(b"not facts") is None
+
+
+def test_to_numpy():
+    """Test that columns convert to NumPy arrays, dates and strings included."""
+    pytest.importorskip("numpy")
+    arrays = FactsTable.from_company_facts(make_company_facts(1, 5.0)).to_numpy()
+
+    assert str(arrays["val"].dtype) == "float64"
+    assert arrays["concept"][0] == "us-gaap:Revenues"
+    assert arrays["frame"][0] is None
+    assert str(arrays["end"][0]) == "2023-12-31"
+    assert str(arrays["start"][2]) == "NaT"
+
+
+def make_xbrl_downloader() -> FakeDownloader:
+    return FakeDownloader(
+        {
+            get_company_facts_url(320193): json.dumps(
+                make_company_facts(320193, 100.0)
+            ),
+            get_frame_url("us-gaap", "Revenues", "USD", "CY2024Q1"): json.dumps(
+                {
+                    "taxonomy": "us-gaap",
+                    "tag": "Revenues",
+                    "ccp": "CY2024Q1",
+                    "uom": "USD",
+                    "label": "Revenues",
+                    "description": None,
+                    "pts": 2,
+                    "data": [
+                        {
+                            "accn": "0000320193-24-000006",
+                            "cik": 320193,
+                            "entityName": "Apple Inc.",
+                            "loc": "US-CA",
+                            "start": "2024-01-01",
+                            "end": "2024-03-31",
+                            "val": 90753000000,
+                        },
+                        {
+                            "accn": "0000789019-24-000010",
+                            "cik": 789019,
+                            "entityName": "MICROSOFT CORP",
+                            "loc": "US-WA",
+                            "start": "2024-01-01",
+                            "end": "2024-03-31",
+                            "val": 61858000000,
+                        },
+                    ],
+                }
+            ),
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_parses_company_facts_and_frames():
+    """Test that the endpoints come back as tables."""
+    downloader = make_xbrl_downloader()
+    client = XbrlClient(downloader)
+
+    facts = await client.get_company_facts_async(320193)
+    frame = await client.get_frame_async("us-gaap", "Revenues", "USD", "CY2024Q1")
+
+    assert len(facts) == 4
+    assert [(fact["cik"], fact["val"]) for fact in frame] == [
+        (320193, 90753000000.0),
+        (789019, 61858000000.0),
+    ]
+    assert frame[0]["frame"] == "CY2024Q1"
+    assert frame[0]["form"] is None
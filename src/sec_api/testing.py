@@ -0,0 +1,92 @@
+"""Helpers shared by the tests"""
+
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import override
+from urllib.parse import urlsplit
+
+from .typings import DownloadResponse, IDownloader
+
+# Status, headers and body answering a GET request
+type Reply = tuple[int, dict[str, str], bytes]
+
+type Respond = Callable[[BaseHTTPRequestHandler], Reply]
+
+# Starts a local server answering with the function, returning its URL
+type Serve = Callable[[Respond], str]
+
+
+def start_server(respond: Respond) -> ThreadingHTTPServer:
+    """A local HTTP server answering GET requests with `respond`, in a thread"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version: str = "HTTP/1.1"
+
+        def do_GET(self):
+            status, headers, body = respond(self)
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            _ = self.wfile.write(body)
+
+        @override
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def get_content_type(url: str) -> str:
+    path = urlsplit(url).path
+    if path.endswith(".json"):
+        return "application/json"
+    if path.endswith(".txt"):
+        return "text/plain"
+    return "text/html"
+
+
+def make_response(
+    url: str,
+    content: str,
+    *,
+    last_modified: str = "",
+    fetched_at: float | None = None,
+) -> DownloadResponse:
+    """A 200 response, typed by the extension of `url`"""
+    response: DownloadResponse = {
+        "url": url,
+        "status_code": 200,
+        "content": content,
+        "content_type": get_content_type(url),
+        "last_modified": last_modified,
+    }
+    if fetched_at is not None:
+        response["fetched_at"] = fetched_at
+    return response
+
+
+class FakeDownloader(IDownloader):
+    """Serves `contents` by URL, recording every requested URL"""
+
+    contents: dict[str, str]
+    requests: list[str]
+
+    def __init__(self, contents: dict[str, str] | None = None):
+        self.contents = {} if contents is None else contents
+        self.requests = []
+
+    @override
+    async def get_url_async(self, url: str) -> DownloadResponse:
+        self.requests.append(url)
+        return make_response(url, await self.get_content_async(url))
+
+    async def get_content_async(self, url: str) -> str:
+        content = self.contents.get(url)
+        if content is None:
+            raise AssertionError(f"unexpected request for {url}")
+        return content
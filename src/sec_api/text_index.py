@@ -0,0 +1,385 @@
+"""
+Full-text index of downloaded filing documents
+
+Documents are tokenized into an SQLite FTS5 table, which keeps positional
+postings, so words, prefixes (`liquid*`), phrases (`"going concern"`) and
+`NEAR` groups can be searched. The table is contentless: the text is already
+in the download cache and is not stored twice. Filings metadata comes from
+the company submissions JSON going through the same cache, and results are
+`Filing` records filtered by CIK, form and date.
+
+Documents are added as `LocalCacheDownloader` writes them, when it is given
+the index, or by a batch job over an existing cache directory. Either way
+their text is extracted in worker processes, and the downloader only queues
+what it writes, so caching a response never waits on tokenizing it.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Final, TypedDict, cast
+from urllib.parse import urlsplit
+
+from .cache_format import decode_cache_entry
+from .extraction import document_to_text, get_sha256
+from .fileio import read_bytes
+from .filings_store import (
+    FILING_COLUMNS,
+    ArchiveSubmissions,
+    FilingColumns,
+    FilingRow,
+    columns_to_rows,
+    iter_bounded,
+)
+from .process_pool import spawn_pool
+from .sqlite_worker import SqliteWorker
+from .typings import DateField, DownloadResponse, Filing
+
+logger = logging.getLogger(__name__)
+
+SCHEMA: Final = f"""
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    cik INTEGER NOT NULL,
+    accession_number TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_cik ON documents (cik);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_text USING fts5 (
+    text, content='', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS filings (
+    cik INTEGER NOT NULL,
+    {", ".join(FILING_COLUMNS)},
+    PRIMARY KEY (cik, accessionNumber)
+);
+"""
+
+INSERT_FILING: Final = (
+    f"INSERT OR REPLACE INTO filings (cik, {', '.join(FILING_COLUMNS)}) "
+    + f"VALUES (?, {', '.join('?' * len(FILING_COLUMNS))})"
+)
+
+# A filing's documents, or its complete submission text file
+ARCHIVE_DOCUMENT: Final = re.compile(
+    r"^/Archives/edgar/data/(\d+)/(\d{10})-?(\d{2})-?(\d{6})(?:/([^/]+)|\.txt)$"
+)
+SUBMISSIONS: Final = re.compile(
+    r"^/submissions/CIK(\d{10})(-submissions-\d{3})?\.json$"
+)
+
+# Cache directories holding what the index reads
+CACHE_SOURCES: Final = ("Archives/edgar/data", "submissions")
+
+# Cache files per task sent to a worker process
+BATCH_SIZE: Final = 50
+
+# url, cik, accession number, sha256 of the content, text
+type DocumentRow = tuple[str, int, str, str, str]
+
+
+class TextIndexStats(TypedDict):
+    documents: int
+    filings: int
+    seconds: float
+
+
+def is_indexed(url: str, response: DownloadResponse) -> bool:
+    """Whether `read_response` may find anything in the response"""
+    path = urlsplit(url).path
+    return response["status_code"] == 200 and (
+        SUBMISSIONS.match(path) is not None or ARCHIVE_DOCUMENT.match(path) is not None
+    )
+
+
+def read_response(
+    url: str, response: DownloadResponse, indexed: str | None = None
+) -> tuple[list[DocumentRow], list[FilingRow]]:
+    """
+    The document or filings metadata in a response, if any. The text of a
+    document whose content hash is `indexed` is not extracted again.
+    """
+    if response["status_code"] != 200:
+        return [], []
+    path = urlsplit(url).path
+
+    if match := SUBMISSIONS.match(path):
+        if match[2]:
+            columns = cast(FilingColumns, json.loads(response["content"]))
+        else:
+            data = cast(ArchiveSubmissions, json.loads(response["content"]))
+            columns = data.get("filings", {}).get("recent", {})
+        return [], columns_to_rows(int(match[1]), columns)
+
+    if match := ARCHIVE_DOCUMENT.match(path):
+        sha256 = get_sha256(response["content"])
+        if sha256 == indexed:
+            return [], []
+        text = document_to_text(response["content"], response["content_type"] or "")
+        accession_number = f"{match[2]}-{match[3]}-{match[4]}"
+        return [(url, int(match[1]), accession_number, sha256, text)], []
+
+    return [], []
+
+
+def read_cache_files(
+    directory: str, paths: list[str]
+) -> tuple[list[DocumentRow], list[FilingRow]]:
+    """Documents and filings metadata in cache files (in a worker)"""
+    documents: list[DocumentRow] = []
+    filings: list[FilingRow] = []
+    for path in paths:
+        data = read_bytes(Path(directory, path))
+        entry = None if data is None else decode_cache_entry(data)
+        if entry is None:
+            continue
+        try:
+            read = read_response(entry.header["url"], entry.to_response())
+        except (OSError, EOFError, UnicodeDecodeError, zlib.error, ValueError):
+            # Corrupt body, or not JSON where JSON is expected
+            continue
+        documents.extend(read[0])
+        filings.extend(read[1])
+    return documents, filings
+
+
+def row_to_filing(row: tuple[object, ...]) -> Filing:
+    # The document's cik, accession number and url, then the filing columns,
+    # all None when its submissions were never seen
+    cik, accession_number, url, *values = row
+    if values[0] is None:
+        filing = dict(FILING_COLUMNS)
+        filing["accessionNumber"] = accession_number
+        match = ARCHIVE_DOCUMENT.match(urlsplit(str(url)).path)
+        filing["primaryDocument"] = (match and match[5]) or ""
+    else:
+        filing = dict(zip(FILING_COLUMNS, values))
+    filing["cik"] = str(cik).rjust(10, "0")
+    return filing  # pyright: ignore[reportReturnType]
+
+
+class TextIndex:
+    """SQLite full-text index of filing documents, searched as filings"""
+
+    _sqlite: SqliteWorker
+    _workers: int | None
+    _pool: ProcessPoolExecutor | None = None
+    _queued: set[asyncio.Task[bool]]
+
+    def __init__(
+        self, database: str = ".data/text_index.sqlite", workers: int | None = None
+    ):
+        self._sqlite = SqliteWorker(
+            database, SCHEMA, thread_name_prefix="sec-text-index"
+        )
+        # Processes extracting the text of added documents
+        self._workers = workers
+        self._queued = set()
+
+    async def aclose(self) -> None:
+        await self.wait_async()
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown)
+        await self._sqlite.aclose()
+
+    async def add_response_async(self, url: str, response: DownloadResponse) -> bool:
+        """
+        Indexes a downloaded document, or the filings metadata of a
+        submissions JSON. Other responses are ignored. True when it changed
+        the index.
+        """
+        if not is_indexed(url, response):
+            return False
+
+        indexed = await self._sqlite.run(self._get_indexed_sha256, url)
+        if self._pool is None:
+            self._pool = spawn_pool(self._workers)
+        try:
+            documents, filings = await asyncio.get_running_loop().run_in_executor(
+                self._pool, read_response, url, response, indexed
+            )
+        except ValueError:
+            # Not JSON where JSON is expected, nothing to index
+            return False
+        await self._sqlite.run(self._insert, documents, filings)
+        return bool(documents or filings)
+
+    def queue_response(self, url: str, response: DownloadResponse):
+        """
+        Indexes the response as `add_response_async` does, in the background.
+        Failures are logged. `wait_async` waits for what is queued.
+        """
+        task = asyncio.create_task(self.add_response_async(url, response))
+        self._queued.add(task)
+
+        def done(task: asyncio.Task[bool]):
+            self._queued.discard(task)
+            if not task.cancelled() and (error := task.exception()) is not None:
+                logger.warning("Indexing %s failed", url, exc_info=error)
+
+        task.add_done_callback(done)
+
+    async def wait_async(self) -> None:
+        """Waits for the responses queued so far to be indexed"""
+        while self._queued:
+            _ = await asyncio.gather(*self._queued, return_exceptions=True)
+
+    async def index_cache_directory_async(
+        self, directory: str = ".data", workers: int | None = None
+    ) -> TextIndexStats:
+        """
+        Indexes what `LocalCacheDownloader` cached under `directory` and the
+        index does not hold yet, parsing with up to `workers` processes
+        """
+        return await self._sqlite.run(self._index_cache_directory, directory, workers)
+
+    async def search_async(
+        self,
+        query: str,
+        *,
+        cik: str | int | None = None,
+        form: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        date_field: DateField = "filingDate",
+        limit: int = 100,
+    ) -> list[Filing]:
+        """
+        Filings whose document matches the FTS5 `query`, best match first,
+        optionally of one company and form and by `date_field` between
+        `start_date` and `end_date` (inclusive). Form and date filters only
+        match documents whose company submissions were seen.
+        """
+        return await self._sqlite.run(
+            self._search, query, cik, form, start_date, end_date, date_field, limit
+        )
+
+    def _get_indexed_sha256(self, url: str) -> str | None:
+        row = cast(
+            tuple[str] | None,
+            self._sqlite.connect()
+            .execute("SELECT sha256 FROM documents WHERE url = ?", (url,))
+            .fetchone(),
+        )
+        return None if row is None else row[0]
+
+    def _index_cache_directory(
+        self, directory: str, workers: int | None
+    ) -> TextIndexStats:
+        start = time.perf_counter()
+        stats: TextIndexStats = {"documents": 0, "filings": 0, "seconds": 0.0}
+        connection = self._sqlite.connect()
+
+        # Cache files are at the path of their url
+        urls = cast(
+            list[tuple[str]], connection.execute("SELECT url FROM documents").fetchall()
+        )
+        indexed = {urlsplit(url).path for (url,) in urls}
+        root = Path(directory)
+        paths: list[str] = []
+        for source in CACHE_SOURCES:
+            for path in sorted(Path(root, source).rglob("*")):
+                if path.name.startswith(".") or not path.is_file():
+                    continue
+                # Documents never change, submissions are read every time
+                relative = path.relative_to(root).as_posix()
+                if source == "submissions" or f"/{relative}" not in indexed:
+                    paths.append(relative)
+        batches = [paths[i : i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+
+        workers = workers or os.cpu_count() or 1
+        with spawn_pool(workers) as executor:
+            for documents, filings in iter_bounded(
+                executor, read_cache_files, directory, batches, workers * 2
+            ):
+                self._insert(documents, filings)
+                stats["documents"] += len(documents)
+                stats["filings"] += len(filings)
+
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def _insert(self, documents: list[DocumentRow], filings: list[FilingRow]):
+        if not documents and not filings:
+            return
+
+        connection = self._sqlite.connect()
+        indexed_at = time.time()
+        with connection:
+            _ = connection.execute("BEGIN IMMEDIATE")
+            _ = connection.executemany(INSERT_FILING, filings)
+            for url, cik, accession_number, sha256, text in documents:
+                # A contentless table cannot delete postings: those of a
+                # replaced document stay under an id no document gets again
+                _ = connection.execute("DELETE FROM documents WHERE url = ?", (url,))
+                cursor = connection.execute(
+                    "INSERT INTO documents "
+                    + "(url, cik, accession_number, sha256, indexed_at) "
+                    + "VALUES (?, ?, ?, ?, ?)",
+                    (url, cik, accession_number, sha256, indexed_at),
+                )
+                _ = connection.execute(
+                    "INSERT INTO documents_text (rowid, text) VALUES (?, ?)",
+                    (cursor.lastrowid, text),
+                )
+
+    def _search(
+        self,
+        query: str,
+        cik: str | int | None,
+        form: str | None,
+        start_date: str | None,
+        end_date: str | None,
+        date_field: DateField,
+        limit: int,
+    ) -> list[Filing]:
+        if date_field not in FILING_COLUMNS:
+            raise ValueError(f"Unknown date field: {date_field!r}")
+
+        conditions = ["documents_text MATCH ?"]
+        parameters: list[object] = [query]
+        if cik is not None:
+            conditions.append("d.cik = ?")
+            parameters.append(int(cik))
+        if form is not None:
+            conditions.append("f.form = ?")
+            parameters.append(form)
+        # `acceptanceDateTime` is a timestamp, compare its date
+        if start_date is not None:
+            conditions.append(f"substr(f.{date_field}, 1, 10) >= ?")
+            parameters.append(start_date)
+        if end_date is not None:
+            conditions.append(f"substr(f.{date_field}, 1, 10) <= ?")
+            parameters.append(end_date)
+
+        columns = ", ".join(f"f.{name}" for name in FILING_COLUMNS)
+        try:
+            rows = cast(
+                list[tuple[object, ...]],
+                self._sqlite.connect()
+                .execute(
+                    f"SELECT d.cik, d.accession_number, d.url, {columns} "
+                    + "FROM documents_text "
+                    + "JOIN documents d ON d.id = documents_text.rowid "
+                    + "LEFT JOIN filings f "
+                    + "ON f.cik = d.cik AND f.accessionNumber = d.accession_number "
+                    + f"WHERE {' AND '.join(conditions)} "
+                    + "ORDER BY documents_text.rank LIMIT ?",
+                    (*parameters, limit),
+                )
+                .fetchall(),
+            )
+        except sqlite3.OperationalError as error:
+            raise ValueError(f"Invalid search query {query!r}: {error}") from error
+
+        return [row_to_filing(row) for row in rows]
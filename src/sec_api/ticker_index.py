@@ -0,0 +1,481 @@
+"""
+Compact index of `company_tickers_exchange.json` for exact, prefix and fuzzy
+lookups, persisted so a process starts with it in a few milliseconds
+
+    MAGIC (4 bytes) | header length (4 bytes, big endian) | header | body
+
+The header is a small JSON object (see `TickerIndexHeader`): the cache metadata
+of the ticker file the index was built from, and where each section starts in
+the body. Sections are arrays, read back with `array.frombytes`, and strings
+joined by a separator, read back with `str.split`, so loading does no work per
+company in Python.
+
+Rows are only appended: an update marks the companies gone from the ticker
+file dead and appends the new ones, and the index is rebuilt once dead rows
+pile up. Lookups skip dead rows.
+"""
+
+import heapq
+import json
+import math
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Iterable, Iterator, MutableSequence
+from itertools import chain, compress
+from pathlib import Path
+from typing import Final, TypedDict, cast
+
+from .cache_format import CacheMetadata
+from .fileio import read_bytes, write_bytes_atomic
+
+MAGIC: Final = b"TIX\x01"
+
+_HEADER_LENGTH: Final = struct.Struct(">I")
+_PREAMBLE_SIZE: Final = len(MAGIC) + _HEADER_LENGTH.size
+
+# Neither appears in company names nor tickers
+SEPARATOR: Final = "\x1f"
+
+# Share of dead rows past which an update rebuilds the index
+MAX_DEAD_RATIO: Final = 0.25
+
+DEFAULT_MIN_SCORE: Final = 0.3
+
+_NOT_ALPHANUMERIC: Final = re.compile(r"[^0-9A-Z]+")
+
+
+class CompanyTickerExchange(TypedDict):
+    cik: int
+    name: str
+    ticker: str
+    exchange: str | None
+
+
+class TickerIndexHeader(TypedDict):
+    metadata: CacheMetadata
+    byteorder: str
+    # Section name to its (start, end) in the body
+    sections: dict[str, tuple[int, int]]
+
+
+def normalize(value: str) -> str:
+    """Upper case words, punctuation and repeated spaces dropped"""
+    return _NOT_ALPHANUMERIC.sub(" ", value.upper()).strip()
+
+
+def get_trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def to_offsets(postings: dict[str, list[int]]) -> tuple[array[int], array[int]]:
+    """Each trigram's rows, one after the other, and where each starts"""
+    offsets = array("I", [0])
+    rows = array("I")
+    for trigram_rows in postings.values():
+        rows.extend(trigram_rows)
+        offsets.append(len(rows))
+    return offsets, rows
+
+
+def insert_sorted[K](
+    keys: MutableSequence[K], rows: MutableSequence[int], key: K, row: int
+):
+    # Rows are appended with increasing ids, so they go after equal keys
+    i = bisect_right(keys, key)  # pyright: ignore[reportArgumentType]
+    keys.insert(i, key)
+    rows.insert(i, row)
+
+
+def delete_sorted[K](
+    keys: MutableSequence[K], rows: MutableSequence[int], key: K, row: int
+):
+    i = bisect_left(keys, key)  # pyright: ignore[reportArgumentType]
+    while rows[i] != row:
+        i += 1
+    del keys[i]
+    del rows[i]
+
+
+class TickerIndex:
+    metadata: CacheMetadata
+    _cik: array[int]
+    _name: list[str]
+    _ticker: list[str]
+    # "" for companies without an exchange
+    _exchange: list[str]
+    _name_key: list[str]
+    _trigram_count: array[int]
+    _live: bytearray
+    _dead: int
+    # Live row ids sorted by CIK, ticker and normalized name, with their keys
+    _cik_keys: array[int]
+    _cik_order: array[int]
+    _ticker_keys: list[str]
+    _ticker_order: list[int]
+    _name_keys: list[str]
+    _name_order: list[int]
+    _by_ticker: dict[str, int]
+    # Row ids of the names holding each trigram, ascending: those of the
+    # last build in one array, at each trigram's offsets, then those appended
+    _trigram_ids: dict[str, int]
+    _trigram_offsets: array[int]
+    _trigram_rows: array[int]
+    _trigram_added: dict[str, list[int]]
+
+    def __init__(
+        self, companies: Iterable[CompanyTickerExchange], metadata: CacheMetadata
+    ):
+        self._build(companies, metadata)
+
+    def __len__(self) -> int:
+        return len(self._live) - self._dead
+
+    def __iter__(self) -> Iterator[CompanyTickerExchange]:
+        return map(self._get_row, self._get_live_rows())
+
+    def get_by_ticker(self, ticker: str) -> CompanyTickerExchange | None:
+        row = self._by_ticker.get(ticker.upper())
+        return None if row is None else self._get_row(row)
+
+    def get_by_cik(self, cik: int) -> CompanyTickerExchange | None:
+        """The company's first listed, usually primary, ticker"""
+        i = bisect_left(self._cik_keys, cik)
+        if i == len(self._cik_keys) or self._cik_keys[i] != cik:
+            return None
+        return self._get_row(self._cik_order[i])
+
+    def find_prefix(self, prefix: str, limit: int = 10) -> list[CompanyTickerExchange]:
+        """Companies whose ticker, then whose name, starts with `prefix`"""
+        return list(map(self._get_row, self._find_prefix_rows(prefix, limit)))
+
+    def find_fuzzy(
+        self, query: str, limit: int = 10, min_score: float = DEFAULT_MIN_SCORE
+    ) -> list[CompanyTickerExchange]:
+        """
+        Companies whose name is most alike `query`, by the Dice coefficient of
+        their trigrams, best first
+        """
+        return list(map(self._get_row, self._find_fuzzy_rows(query, limit, min_score)))
+
+    def search(self, query: str, limit: int = 10) -> list[CompanyTickerExchange]:
+        """Exact ticker, then prefix, then fuzzy name matches, for autocomplete"""
+        rows = self._find_prefix_rows(query, limit)
+        if len(rows) < limit:
+            seen = set(rows)
+            # Enough that the prefix matches among them still leave `limit`
+            fuzzy = self._find_fuzzy_rows(query, limit + len(rows), DEFAULT_MIN_SCORE)
+            rows += [row for row in fuzzy if row not in seen][: limit - len(rows)]
+        return list(map(self._get_row, rows))
+
+    def update(
+        self, companies: Iterable[CompanyTickerExchange], metadata: CacheMetadata
+    ) -> tuple[int, int]:
+        """
+        Bring the index up to date with a newer ticker file, and return how
+        many companies were added and removed
+        """
+        wanted = {self._get_key(company): company for company in companies}
+        current = {
+            self._get_key(self._get_row(row)): row for row in self._get_live_rows()
+        }
+        removed = [row for key, row in current.items() if key not in wanted]
+        added = [company for key, company in wanted.items() if key not in current]
+
+        if self._dead + len(removed) > MAX_DEAD_RATIO * len(wanted):
+            self._build(wanted.values(), metadata)
+            return len(added), len(removed)
+
+        for row in removed:
+            self._remove_row(row)
+        for company in added:
+            self._append_row(company)
+        self.metadata = metadata
+        return len(added), len(removed)
+
+    def encode(self) -> bytes:
+        # Run off the event loop, so it must not change the index
+        trigrams = list(self._trigram_ids)
+        offsets, rows = self._trigram_offsets, self._trigram_rows
+        if self._trigram_added:
+            postings = self._get_all_postings()
+            trigrams = list(postings)
+            offsets, rows = to_offsets(postings)
+
+        sections: dict[str, bytes] = {
+            "cik": self._cik.tobytes(),
+            "name": SEPARATOR.join(self._name).encode(),
+            "ticker": SEPARATOR.join(self._ticker).encode(),
+            "exchange": SEPARATOR.join(self._exchange).encode(),
+            "name_key": SEPARATOR.join(self._name_key).encode(),
+            "trigram_count": self._trigram_count.tobytes(),
+            "live": bytes(self._live),
+            "cik_keys": self._cik_keys.tobytes(),
+            "cik_order": self._cik_order.tobytes(),
+            "ticker_order": array("I", self._ticker_order).tobytes(),
+            "name_order": array("I", self._name_order).tobytes(),
+            "trigram": SEPARATOR.join(trigrams).encode(),
+            "trigram_offsets": offsets.tobytes(),
+            "trigram_rows": rows.tobytes(),
+        }
+
+        bounds: dict[str, tuple[int, int]] = {}
+        start = 0
+        for name, data in sections.items():
+            bounds[name] = (start, start + len(data))
+            start += len(data)
+
+        header: TickerIndexHeader = {
+            "metadata": self.metadata,
+            "byteorder": sys.byteorder,
+            "sections": bounds,
+        }
+        data = json.dumps(header, separators=(",", ":")).encode()
+        return b"".join(
+            [MAGIC, _HEADER_LENGTH.pack(len(data)), data, *sections.values()]
+        )
+
+    @classmethod
+    def decode(cls, data: bytes) -> "TickerIndex | None":
+        """The index encoded in `data`, None if it is not one this can read"""
+        if len(data) < _PREAMBLE_SIZE or data[: len(MAGIC)] != MAGIC:
+            return None
+
+        length = cast(int, _HEADER_LENGTH.unpack_from(data, len(MAGIC))[0])
+        try:
+            header = cast(
+                TickerIndexHeader,
+                json.loads(data[_PREAMBLE_SIZE : _PREAMBLE_SIZE + length]),
+            )
+            if header["byteorder"] != sys.byteorder:
+                return None
+            body = memoryview(data)[_PREAMBLE_SIZE + length :]
+            return cls._decode_body(header, body)
+        except (KeyError, IndexError, TypeError, ValueError):
+            # Truncated or corrupt, rebuilt from the ticker file instead
+            return None
+
+    @classmethod
+    def _decode_body(cls, header: TickerIndexHeader, body: memoryview) -> "TickerIndex":
+        def get_bytes(name: str) -> memoryview:
+            start, end = header["sections"][name]
+            return body[start:end]
+
+        def get_array(name: str, typecode: str) -> array[int]:
+            values: array[int] = array(typecode)
+            values.frombytes(get_bytes(name))
+            return values
+
+        def get_strings(name: str) -> list[str]:
+            data = get_bytes(name)
+            # `"".split` would give one empty string for no rows
+            return str(data, "utf-8").split(SEPARATOR) if data else []
+
+        index = cls.__new__(cls)
+        index.metadata = header["metadata"]
+        index._cik = get_array("cik", "q")
+        index._name = get_strings("name")
+        index._ticker = get_strings("ticker")
+        index._exchange = get_strings("exchange")
+        index._name_key = get_strings("name_key")
+        index._trigram_count = get_array("trigram_count", "H")
+        index._live = bytearray(get_bytes("live"))
+        index._dead = index._live.count(0)
+        index._cik_keys = get_array("cik_keys", "q")
+        index._cik_order = get_array("cik_order", "I")
+        index._ticker_order = get_array("ticker_order", "I").tolist()
+        index._ticker_keys = list(map(index._ticker.__getitem__, index._ticker_order))
+        index._name_order = get_array("name_order", "I").tolist()
+        index._name_keys = list(map(index._name_key.__getitem__, index._name_order))
+        index._by_ticker = dict(
+            zip(
+                compress(index._ticker, index._live),
+                compress(range(len(index._live)), index._live),
+                strict=True,
+            )
+        )
+
+        trigrams = get_strings("trigram")
+        index._trigram_ids = dict(zip(trigrams, range(len(trigrams)), strict=True))
+        index._trigram_offsets = get_array("trigram_offsets", "I")
+        index._trigram_rows = get_array("trigram_rows", "I")
+        index._trigram_added = {}
+        return index
+
+    def _build(
+        self, companies: Iterable[CompanyTickerExchange], metadata: CacheMetadata
+    ):
+        self.metadata = metadata
+        self._cik = array("q")
+        self._name = []
+        self._ticker = []
+        self._exchange = []
+        self._name_key = []
+        self._trigram_count = array("H")
+        self._live = bytearray()
+        self._dead = 0
+        self._by_ticker = {}
+        self._trigram_ids = {}
+        self._trigram_offsets = array("I", [0])
+        self._trigram_rows = array("I")
+        self._trigram_added = {}
+
+        for company in companies:
+            _ = self._add_row(company)
+
+        # Stable sorts keep rows with equal keys in ticker file order
+        rows = range(len(self._live))
+        self._cik_order = array("I", sorted(rows, key=self._cik.__getitem__))
+        self._cik_keys = array("q", map(self._cik.__getitem__, self._cik_order))
+        self._ticker_order = sorted(rows, key=self._ticker.__getitem__)
+        self._ticker_keys = list(map(self._ticker.__getitem__, self._ticker_order))
+        self._name_order = sorted(rows, key=self._name_key.__getitem__)
+        self._name_keys = list(map(self._name_key.__getitem__, self._name_order))
+        self._set_postings(self._trigram_added)
+
+    def _add_row(self, company: CompanyTickerExchange) -> int:
+        """Appends a row, leaving the sorted orders to the caller"""
+        row = len(self._live)
+        ticker = company["ticker"].upper()
+        name_key = normalize(company["name"])
+        trigrams = get_trigrams(name_key)
+
+        self._cik.append(company["cik"])
+        self._name.append(company["name"])
+        self._ticker.append(ticker)
+        self._exchange.append(company["exchange"] or "")
+        self._name_key.append(name_key)
+        self._trigram_count.append(min(len(trigrams), 0xFFFF))
+        self._live.append(1)
+        self._by_ticker[ticker] = row
+
+        for trigram in trigrams:
+            rows = self._trigram_added.get(trigram)
+            if rows is None:
+                rows = self._trigram_added[trigram] = []
+            rows.append(row)
+
+        return row
+
+    def _append_row(self, company: CompanyTickerExchange):
+        row = self._add_row(company)
+        insert_sorted(self._cik_keys, self._cik_order, self._cik[row], row)
+        insert_sorted(self._ticker_keys, self._ticker_order, self._ticker[row], row)
+        insert_sorted(self._name_keys, self._name_order, self._name_key[row], row)
+
+    def _remove_row(self, row: int):
+        self._live[row] = 0
+        self._dead += 1
+
+        ticker = self._ticker[row]
+        delete_sorted(self._cik_keys, self._cik_order, self._cik[row], row)
+        delete_sorted(self._ticker_keys, self._ticker_order, ticker, row)
+        delete_sorted(self._name_keys, self._name_order, self._name_key[row], row)
+
+        if self._by_ticker.get(ticker) == row:
+            # Another live row listing the ticker takes over, the last added
+            # as in `_add_row`
+            i = bisect_right(self._ticker_keys, ticker)
+            if i > 0 and self._ticker_keys[i - 1] == ticker:
+                self._by_ticker[ticker] = self._ticker_order[i - 1]
+            else:
+                del self._by_ticker[ticker]
+        # Postings keep the row, lookups skip it as dead
+
+    def _set_postings(self, postings: dict[str, list[int]]):
+        self._trigram_ids = dict(zip(postings, range(len(postings)), strict=True))
+        self._trigram_offsets, self._trigram_rows = to_offsets(postings)
+        self._trigram_added = {}
+
+    def _get_postings(self, trigram: str) -> Iterable[int]:
+        i = self._trigram_ids.get(trigram)
+        rows: Iterable[int] = (
+            ()
+            if i is None
+            else self._trigram_rows[
+                self._trigram_offsets[i] : self._trigram_offsets[i + 1]
+            ]
+        )
+        added = self._trigram_added.get(trigram)
+        return rows if added is None else chain(rows, added)
+
+    def _get_all_postings(self) -> dict[str, list[int]]:
+        return {
+            trigram: list(self._get_postings(trigram))
+            for trigram in chain(self._trigram_ids, self._trigram_added)
+        }
+
+    def _get_live_rows(self) -> Iterator[int]:
+        return compress(range(len(self._live)), self._live)
+
+    def _find_prefix_rows(self, prefix: str, limit: int) -> list[int]:
+        rows: list[int] = []
+        exact = self._by_ticker.get(prefix.upper())
+        if exact is not None:
+            rows.append(exact)
+
+        for keys, order, key in (
+            (self._ticker_keys, self._ticker_order, prefix.upper()),
+            (self._name_keys, self._name_order, normalize(prefix)),
+        ):
+            if not key:
+                continue
+            i = bisect_left(keys, key)
+            while len(rows) < limit and i < len(keys) and keys[i].startswith(key):
+                if order[i] not in rows:
+                    rows.append(order[i])
+                i += 1
+
+        return rows[:limit]
+
+    def _find_fuzzy_rows(self, query: str, limit: int, min_score: float) -> list[int]:
+        trigrams = get_trigrams(normalize(query))
+        # Counted in C, so a query costs the length of its postings, whatever
+        # the number of companies they are in
+        shared = Counter(chain.from_iterable(map(self._get_postings, trigrams)))
+
+        # A Dice coefficient of `min_score` needs at least this many shared
+        least = math.ceil(min_score * len(trigrams) / 2)
+        live = self._live
+        counts = self._trigram_count
+        scored = [
+            (2 * count / (len(trigrams) + counts[row]), row)
+            for row, count in shared.items()
+            if count >= least and live[row]
+        ]
+        # Best score first, then in ticker file order
+        best = heapq.nsmallest(
+            limit,
+            ((-score, row) for score, row in scored if score >= min_score),
+        )
+        return [row for _, row in best]
+
+    def _get_row(self, row: int) -> CompanyTickerExchange:
+        return {
+            "cik": self._cik[row],
+            "name": self._name[row],
+            "ticker": self._ticker[row],
+            "exchange": self._exchange[row] or None,
+        }
+
+    @staticmethod
+    def _get_key(company: CompanyTickerExchange) -> tuple[int, str, str, str | None]:
+        return (
+            company["cik"],
+            company["name"],
+            company["ticker"].upper(),
+            company["exchange"] or None,
+        )
+
+
+def read_ticker_index(path: Path) -> TickerIndex | None:
+    data = read_bytes(path)
+    return None if data is None else TickerIndex.decode(data)
+
+
+def write_ticker_index(path: Path, index: TickerIndex):
+    write_bytes_atomic(path, index.encode())
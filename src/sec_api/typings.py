@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Literal, TypedDict
+from collections.abc import Callable
+from typing import Literal, NotRequired, TypedDict
 
 from httpx import URL, Proxy
 
@@ -43,6 +44,8 @@ type Form = Literal[
 
 type ProxyType = Proxy | URL | str
 
+type DateField = Literal["reportDate", "filingDate", "acceptanceDateTime"]
+
 
 class Filing(TypedDict):
     cik: str
@@ -103,9 +106,20 @@ class DownloadResponse(TypedDict):
     content: str
     last_modified: str
     content_type: str | None
+    # Unix timestamp of when the content was last confirmed with the server
+    fetched_at: NotRequired[float]
 
 
 class IDownloader(ABC):
     @abstractmethod
     async def get_url_async(self, url: str) -> DownloadResponse:
         pass
+
+    async def get_parsed_async[T](self, url: str, parser: Callable[[str], T]) -> T:
+        """
+        `parser` applied to the content of `url`. Downloaders with a memory
+        cache keep the parsed object, so `parser` should be a long-lived
+        callable (e.g. a module level function) rather than a new lambda
+        """
+        response = await self.get_url_async(url)
+        return parser(response["content"])
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from .constants import SEC_URL
-from .typings import Filing, Quarter, SubmissionsJSON
+from .typings import Filing, Quarter, SubmissionsJSON_Filings_Recent
 
 
 def valid_date_string(date_string: str) -> bool:
@@ -61,29 +61,31 @@ def get_end_date(
         return f"{year}-09-30"
 
 
-def transform_json_to_filings(cik: str, data: SubmissionsJSON) -> list[Filing]:
-    recent = data["filings"]["recent"]
+def transform_columns_to_filings(
+    cik: str, columns: SubmissionsJSON_Filings_Recent
+) -> list[Filing]:
+    """Rows from the column arrays of `filings.recent` or of a submissions page"""
     transformed: list[Filing] = []
 
-    for i in range(0, len(recent["accessionNumber"]) - 1):
+    for i in range(len(columns["accessionNumber"])):
         transformed.append(
             {
                 "cik": cik,
-                "acceptanceDateTime": recent["acceptanceDateTime"][i],
-                "accessionNumber": recent["accessionNumber"][i],
-                "act": recent["act"][i],
-                "core_type": recent["core_type"][i],
-                "fileNumber": recent["fileNumber"][i],
-                "filingDate": recent["filingDate"][i],
-                "filmNumber": recent["filmNumber"][i],
-                "form": recent["form"][i],
-                "isInlineXBRL": recent["isInlineXBRL"][i],
-                "isXBRL": recent["isXBRL"][i],
-                "items": recent["items"][i],
-                "primaryDocDescription": recent["primaryDocDescription"][i],
-                "primaryDocument": recent["primaryDocument"][i],
-                "reportDate": recent["reportDate"][i],
-                "size": recent["size"][i],
+                "acceptanceDateTime": columns["acceptanceDateTime"][i],
+                "accessionNumber": columns["accessionNumber"][i],
+                "act": columns["act"][i],
+                "core_type": columns["core_type"][i],
+                "fileNumber": columns["fileNumber"][i],
+                "filingDate": columns["filingDate"][i],
+                "filmNumber": columns["filmNumber"][i],
+                "form": columns["form"][i],
+                "isInlineXBRL": columns["isInlineXBRL"][i],
+                "isXBRL": columns["isXBRL"][i],
+                "items": columns["items"][i],
+                "primaryDocDescription": columns["primaryDocDescription"][i],
+                "primaryDocument": columns["primaryDocument"][i],
+                "reportDate": columns["reportDate"][i],
+                "size": columns["size"][i],
             }
         )
 
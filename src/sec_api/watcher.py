@@ -0,0 +1,268 @@
+"""
+New filings of watched companies, from EDGAR's daily index
+
+`daily-index/YYYY/QTRn/master.YYYYMMDD.idx` lists the filings of one business
+day, in the format of the quarterly full index. Each poll only requests the
+days from the high-water mark on, conditionally, and only parses a day's index
+when it is new or changed, so a poll costs a request or two plus the new
+filings rather than a submissions request per company.
+
+A day whose index is missing when a later day is read is kept with the mark
+and requested again by the next polls, until it is published or a grace
+period has passed: EDGAR sometimes publishes a day late, and holidays have no
+index at all.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncGenerator, Iterable
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Final, NotRequired, TypedDict
+
+import httpx
+
+from .constants import DAILY_INDEX_URL, SEC_URL
+from .documents import StoredDocument
+from .downloader_base import BaseDownloader
+from .fileio import read_bytes, write_bytes_atomic
+from .full_index import IndexEntry, parse_master_index, row_to_entry
+from .json_decoder import JsonDecoder
+from .rate_control import THROTTLE_STATUS_CODES
+from .scheduler import FetchScheduler, Priority
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# EDGAR answers 403 as well as 404 for day files it does not have (yet), so
+# a 403 is not retried as throttling: it would back off and cut the rate for
+# every missing day
+DAY_FILE_THROTTLE_STATUS_CODES: Final = THROTTLE_STATUS_CODES - {403}
+
+# How long a missing day before the mark is requested again
+MISSING_DAY_GRACE: Final = timedelta(days=7)
+
+
+class HighWaterMark(TypedDict):
+    # Latest day whose index was read, and the checksum of that index
+    date: str
+    sha256: str
+    # Filings of that day already seen, in case its index is republished
+    accession_numbers: list[str]
+    # Earlier days whose index was missing, still in their grace period
+    missing: NotRequired[list[str]]
+
+
+HighWaterMarkDecoder = JsonDecoder(HighWaterMark)
+
+
+def get_today() -> date:
+    return datetime.now(UTC).date()
+
+
+def get_daily_index_url(day: date, base_url: str = DAILY_INDEX_URL):
+    quarter = (day.month - 1) // 3 + 1
+    return f"{base_url}/{day.year}/QTR{quarter}/master.{day:%Y%m%d}.idx"
+
+
+def get_business_days(start: date, end: date) -> list[date]:
+    """Days from `start` to `end` (inclusive) EDGAR may publish an index for"""
+    count = (end - start).days + 1
+    days = (start + timedelta(days=i) for i in range(count))
+    return [day for day in days if day.weekday() < 5]
+
+
+def read_daily_index(path: Path) -> list[IndexEntry]:
+    with open(path, "rb") as file:
+        return [row_to_entry(row[2:]) for row in parse_master_index(file, 0, 1)]
+
+
+def read_high_water_mark(path: Path) -> HighWaterMark | None:
+    data = read_bytes(path)
+    if data is None:
+        return None
+    try:
+        return HighWaterMarkDecoder(data)
+    except ValueError:
+        logger.warning("Ignoring unreadable high-water mark %s", path)
+        return None
+
+
+def write_high_water_mark(path: Path, mark: HighWaterMark):
+    write_bytes_atomic(path, json.dumps(mark).encode())
+
+
+class FilingsWatcher:
+    """
+    Polls the daily index for filings of the watched CIKs (every CIK when
+    None) newer than a high-water mark persisted at `state_path`. Without a
+    mark, polling starts from `since` (default: today). Days missing before
+    the mark are requested again for `missing_day_grace`.
+    """
+
+    _downloader: BaseDownloader
+    _ciks: frozenset[int] | None
+    _state_path: Path
+    _since: date | None
+    _base_url: str
+    _archives_url: str
+    _missing_day_grace: timedelta
+    _scheduler: FetchScheduler | None
+    _mark: HighWaterMark | None = None
+    _loaded: bool = False
+    _polling: SingleFlight[bool, list[IndexEntry]]
+
+    def __init__(
+        self,
+        downloader: BaseDownloader,
+        ciks: Iterable[int] | None = None,
+        *,
+        state_path: str | Path = ".data/watcher.json",
+        since: str | None = None,
+        base_url: str = DAILY_INDEX_URL,
+        archives_url: str = f"{SEC_URL}/Archives",
+        missing_day_grace: timedelta = MISSING_DAY_GRACE,
+        scheduler: FetchScheduler | None = None,
+    ):
+        self._downloader = downloader
+        self._ciks = None if ciks is None else frozenset(ciks)
+        self._state_path = Path(state_path)
+        self._since = None if since is None else date.fromisoformat(since)
+        self._base_url = base_url
+        self._archives_url = archives_url
+        self._missing_day_grace = missing_day_grace
+        # Prefetches run at background priority on this scheduler, share it
+        # with the rest of the application to stay under one cap
+        self._scheduler = scheduler
+        self._polling = SingleFlight()
+
+    @property
+    def high_water_mark(self) -> HighWaterMark | None:
+        return self._mark
+
+    async def poll_async(self, *, prefetch: bool = False) -> list[IndexEntry]:
+        """
+        New filings of the watched CIKs since the last poll, oldest day first.
+        With `prefetch`, their complete submission files are downloaded into
+        the downloader's cache before returning.
+        """
+        entries = await self._polling.do(True, self._poll_async)
+        if prefetch:
+            await self._prefetch_async(entries)
+        return entries
+
+    async def watch_async(
+        self, interval: float = 10 * 60, *, prefetch: bool = False
+    ) -> AsyncGenerator[IndexEntry]:
+        """Polls every `interval` seconds, yielding each new filing"""
+        while True:
+            try:
+                entries = await self.poll_async(prefetch=prefetch)
+            except httpx.HTTPError as error:
+                logger.warning("Polling the daily index failed", exc_info=error)
+                entries = []
+            for entry in entries:
+                yield entry
+            await asyncio.sleep(interval)
+
+    async def _poll_async(self) -> list[IndexEntry]:
+        if not self._loaded:
+            self._mark = await asyncio.to_thread(read_high_water_mark, self._state_path)
+            self._loaded = True
+
+        mark: HighWaterMark | None = self._mark
+        today = get_today()
+        oldest = today - self._missing_day_grace
+        marked_day: date | None = None
+        if mark is not None:
+            start = marked_day = date.fromisoformat(mark["date"])
+            late_days = [
+                day
+                for day in map(date.fromisoformat, mark.get("missing", []))
+                if day >= oldest
+            ]
+        else:
+            start = self._since or today
+            late_days = []
+
+        days = [*late_days, *get_business_days(start, today)]
+        documents = await asyncio.gather(*map(self._download_day_async, days))
+
+        new_entries: list[IndexEntry] = []
+        missing: list[str] = []
+        for day, document in zip(days, documents):
+            if document is None:
+                # Not published (yet), or a holiday. The day of the mark was
+                # read before, it cannot be late
+                if day != marked_day and day >= oldest:
+                    missing.append(day.isoformat())
+                continue
+
+            if day < start:
+                # Published late, none of its filings were seen
+                entries = await asyncio.to_thread(
+                    read_daily_index, Path(document["path"])
+                )
+                new_entries.extend(self._filter_watched(entries))
+                continue
+
+            seen: set[str] = set()
+            if mark is not None and mark["date"] == day.isoformat():
+                if mark["sha256"] == document["sha256"]:
+                    continue
+                seen.update(mark["accession_numbers"])
+
+            entries = await asyncio.to_thread(read_daily_index, Path(document["path"]))
+            new_entries.extend(
+                entry
+                for entry in self._filter_watched(entries)
+                if entry["accessionNumber"] not in seen
+            )
+            mark = {
+                "date": day.isoformat(),
+                "sha256": document["sha256"],
+                "accession_numbers": [entry["accessionNumber"] for entry in entries],
+            }
+
+        if mark is not None:
+            # Only days before the mark are late, the others are polled anyway
+            missing = [day for day in missing if day < mark["date"]]
+            if missing != mark.get("missing", []):
+                mark = {**mark, "missing": missing}
+
+        if mark is not self._mark:
+            assert mark is not None
+            await asyncio.to_thread(write_high_water_mark, self._state_path, mark)
+            self._mark = mark
+
+        return new_entries
+
+    def _filter_watched(self, entries: list[IndexEntry]) -> list[IndexEntry]:
+        if self._ciks is None:
+            return entries
+        ciks = self._ciks
+        return [entry for entry in entries if entry["cik"] in ciks]
+
+    async def _download_day_async(self, day: date) -> StoredDocument | None:
+        try:
+            return await self._downloader.download_async(
+                get_daily_index_url(day, self._base_url),
+                throttle_status_codes=DAY_FILE_THROTTLE_STATUS_CODES,
+            )
+        except httpx.HTTPStatusError as error:
+            if error.response.status_code in (403, 404):
+                return None
+            raise
+
+    async def _prefetch_async(self, entries: list[IndexEntry]):
+        scheduler = self._scheduler or FetchScheduler()
+        urls = [f"{self._archives_url}/{entry['filename']}" for entry in entries]
+        results = scheduler.map_async(
+            self._downloader.get_url_async, urls, Priority.BACKGROUND
+        )
+        async for result in results:
+            if "error" in result:
+                logger.warning(
+                    "Prefetching %s failed", result["item"], exc_info=result["error"]
+                )
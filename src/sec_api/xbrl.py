@@ -0,0 +1,636 @@
+"""
+XBRL financial data from the `api/xbrl` companyfacts, companyconcept and
+frames endpoints, held in columns
+
+`FactsTable` keeps facts the way `FilingsTable` keeps filings: one array per
+field, strings dictionary-encoded into a list shared by every string column,
+dates as integer days. The arrays expose the buffer protocol, so
+`numpy.frombuffer` reads a column without a copy, and `to_numpy` converts the
+whole table.
+
+A sorted table is ordered by concept, unit and frame, and its encoding holds a
+key column packing the three codes, so the facts of one concept in one period
+are a contiguous run found by bisection. `facts_store` queries segments of
+the bulk `companyfacts.zip` that way.
+"""
+
+import importlib
+import json
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from datetime import date
+from functools import lru_cache, partial
+from itertools import repeat
+from types import ModuleType
+from typing import Final, NotRequired, Protocol, TypedDict, cast, overload
+
+from .constants import XBRL_API_URL
+from .filings_table import EMPTY_DAY, date_to_day
+from .json_decoder import JsonDecoder
+from .typings import IDownloader
+
+# Imported by name, so the module types the same with numpy or without it
+numpy: ModuleType | None
+try:
+    numpy = importlib.import_module("numpy")
+except ImportError:  # pragma: no cover - optional dependency
+    numpy = None
+
+
+class NumpyArray(Protocol):
+    """The part of `numpy.ndarray` that `FactsTable.to_numpy` relies on"""
+
+    @property
+    def dtype(self) -> object: ...
+
+    def astype(self, dtype: str, /) -> "NumpyArray": ...
+
+    def __sub__(self, other: int, /) -> "NumpyArray": ...
+
+    @overload
+    def __getitem__(self, key: int, /) -> object: ...
+    @overload
+    def __getitem__(self, key: "NumpyArray", /) -> "NumpyArray": ...
+
+    def __setitem__(self, key: "NumpyArray", value: object, /) -> None: ...
+
+
+class XbrlFact(TypedDict):
+    # Absent for instants, e.g. balance sheet items
+    start: NotRequired[str]
+    end: str
+    val: float
+    accn: str
+    fy: int | None
+    fp: str | None
+    form: str
+    filed: str
+    # Calendar period the fact best represents, e.g. `CY2024Q1` or `CY2024Q1I`
+    frame: NotRequired[str]
+
+
+class XbrlConcept(TypedDict):
+    label: str | None
+    description: str | None
+    units: dict[str, list[XbrlFact]]
+
+
+class CompanyFactsJSON(TypedDict):
+    cik: int
+    entityName: str
+    # Concepts by taxonomy (`us-gaap`, `dei`, ...) and tag
+    facts: dict[str, dict[str, XbrlConcept]]
+
+
+class CompanyConceptJSON(XbrlConcept):
+    cik: int
+    taxonomy: str
+    tag: str
+    entityName: str
+
+
+class FrameFact(TypedDict):
+    accn: str
+    cik: int
+    entityName: str
+    loc: str
+    start: NotRequired[str]
+    end: str
+    val: float
+
+
+class FrameJSON(TypedDict):
+    taxonomy: str
+    tag: str
+    ccp: str
+    uom: str
+    label: str | None
+    description: str | None
+    pts: int
+    data: list[FrameFact]
+
+
+class Fact(TypedDict):
+    cik: int
+    # `taxonomy:tag`, e.g. `us-gaap:Revenues`
+    concept: str
+    unit: str
+    frame: str | None
+    start: str | None
+    end: str
+    val: float
+    accn: str
+    # Unknown for facts from the frames endpoint
+    fy: int | None
+    fp: str | None
+    form: str | None
+    filed: str | None
+
+
+class FactsTableHeader(TypedDict):
+    byteorder: str
+    rows: int
+    strings: list[str]
+    sections: dict[str, tuple[int, int]]
+
+
+CompanyFactsDecoder = JsonDecoder(CompanyFactsJSON)
+CompanyConceptDecoder = JsonDecoder(CompanyConceptJSON)
+FrameDecoder = JsonDecoder(FrameJSON)
+
+MAGIC: Final = b"XBF\x01"
+
+_HEADER_LENGTH: Final = struct.Struct(">I")
+_PREAMBLE_SIZE: Final = len(MAGIC) + _HEADER_LENGTH.size
+
+# Typecode of each column. String columns hold indexes into the table's
+# strings, where 0 is the empty string and stands for none.
+COLUMNS: Final = {
+    "cik": "I",
+    "concept": "I",
+    "unit": "I",
+    "frame": "I",
+    "start": "i",
+    "end": "i",
+    "val": "d",
+    "accn": "I",
+    "fy": "H",
+    "fp": "I",
+    "form": "I",
+    "filed": "i",
+}
+
+STRING_COLUMNS: Final = ("concept", "unit", "frame", "accn", "fp", "form")
+
+DATE_COLUMNS: Final = ("start", "end", "filed")
+
+# `val` holds floats, every other column integers
+type Column = array[int] | array[float]
+
+# Bits of each code in a sort key, which caps the strings of a sorted table
+KEY_BITS: Final = 21
+
+MAX_SORTED_STRINGS: Final = 1 << KEY_BITS
+
+# Ordinal of 1970-01-01, to turn day ordinals into `datetime64[D]`
+_UNIX_EPOCH_DAY: Final = 719163
+
+_to_day = lru_cache(maxsize=1 << 16)(date_to_day)
+
+
+@lru_cache(maxsize=1 << 16)
+def day_to_date(day: int) -> str | None:
+    return None if day == EMPTY_DAY else date.fromordinal(day).isoformat()
+
+
+def get_concept(taxonomy: str, tag: str) -> str:
+    return f"{taxonomy}:{tag}"
+
+
+def pack_key(concept: int, unit: int = 0, frame: int = 0) -> int:
+    return (concept << 2 * KEY_BITS) | (unit << KEY_BITS) | frame
+
+
+def get_company_facts_url(cik: int, base_url: str = XBRL_API_URL) -> str:
+    return f"{base_url}/companyfacts/CIK{cik:010d}.json"
+
+
+def get_company_concept_url(
+    cik: int, taxonomy: str, tag: str, base_url: str = XBRL_API_URL
+) -> str:
+    return f"{base_url}/companyconcept/CIK{cik:010d}/{taxonomy}/{tag}.json"
+
+
+def get_frame_url(
+    taxonomy: str, tag: str, unit: str, period: str, base_url: str = XBRL_API_URL
+) -> str:
+    return f"{base_url}/frames/{taxonomy}/{tag}/{unit}/{period}.json"
+
+
+def read_facts_header(
+    data: bytes | memoryview,
+) -> tuple[FactsTableHeader, memoryview] | None:
+    """Header and body of an encoded table, None if it is not one"""
+    if len(data) < _PREAMBLE_SIZE or bytes(data[: len(MAGIC)]) != MAGIC:
+        return None
+
+    length = cast(int, _HEADER_LENGTH.unpack_from(data, len(MAGIC))[0])
+    try:
+        header = cast(
+            FactsTableHeader,
+            json.loads(bytes(data[_PREAMBLE_SIZE : _PREAMBLE_SIZE + length])),
+        )
+    except ValueError:
+        return None
+    if header["byteorder"] != sys.byteorder:
+        return None
+
+    return header, memoryview(data)[_PREAMBLE_SIZE + length :]
+
+
+class FactsTable:
+    _strings: list[str]
+    _codes: dict[str, int] | None = None
+    # Every column but `val`
+    _columns: dict[str, array[int]]
+    _val: array[float]
+
+    def __init__(
+        self,
+        strings: list[str] | None = None,
+        columns: dict[str, array[int]] | None = None,
+        val: array[float] | None = None,
+    ):
+        self._strings = [""] if strings is None else strings
+        if columns is None:
+            columns = {
+                name: array[int](code)
+                for name, code in COLUMNS.items()
+                if name != "val"
+            }
+        self._columns = columns
+        self._val = array("d") if val is None else val
+
+    @classmethod
+    def from_company_facts(cls, data: CompanyFactsJSON) -> "FactsTable":
+        table = cls()
+        table.extend_company_facts(data)
+        return table
+
+    @classmethod
+    def from_company_concept(cls, data: CompanyConceptJSON) -> "FactsTable":
+        table = cls()
+        concept = get_concept(data["taxonomy"], data["tag"])
+        for unit, facts in data["units"].items():
+            table._extend(data["cik"], concept, unit, facts)
+        return table
+
+    @classmethod
+    def from_frame(cls, data: FrameJSON) -> "FactsTable":
+        table = cls()
+        facts = data["data"]
+        count = len(facts)
+        encode = table._encode
+        columns = table._columns
+        columns["cik"].extend(fact["cik"] for fact in facts)
+        columns["concept"].extend(
+            repeat(encode(get_concept(data["taxonomy"], data["tag"])), count)
+        )
+        columns["unit"].extend(repeat(encode(data["uom"]), count))
+        columns["frame"].extend(repeat(encode(data["ccp"]), count))
+        columns["start"].extend(_to_day(fact.get("start", "")) for fact in facts)
+        columns["end"].extend(_to_day(fact["end"]) for fact in facts)
+        table._val.extend(fact["val"] for fact in facts)
+        columns["accn"].extend(encode(fact["accn"]) for fact in facts)
+        for name in ("fy", "fp", "form"):
+            columns[name].extend(repeat(0, count))
+        columns["filed"].extend(repeat(EMPTY_DAY, count))
+        return table
+
+    @classmethod
+    def from_sections(
+        cls,
+        header: FactsTableHeader,
+        body: memoryview,
+        start: int = 0,
+        end: int | None = None,
+    ) -> "FactsTable":
+        """Rows `start` to `end` of an encoded table, see `read_facts_header`"""
+        end = header["rows"] if end is None else end
+        table = cls(header["strings"])
+        for name in COLUMNS:
+            column = table._get_column(name)
+            offset = header["sections"][name][0]
+            column.frombytes(
+                body[offset + start * column.itemsize : offset + end * column.itemsize]
+            )
+        return table
+
+    @classmethod
+    def decode(cls, data: bytes | memoryview) -> "FactsTable | None":
+        """The table encoded in `data`, None if it is not one this can read"""
+        parsed = read_facts_header(data)
+        return None if parsed is None else cls.from_sections(*parsed)
+
+    @classmethod
+    def concat(cls, tables: Iterable["FactsTable"]) -> "FactsTable":
+        """One table with the rows of each, strings re-encoded"""
+        result = cls()
+        encode = result._encode
+        for table in tables:
+            recode = partial(recode_string, table._strings, {}, encode)
+            for name, column in table._columns.items():
+                if name in STRING_COLUMNS:
+                    result._columns[name].extend(map(recode, column))
+                else:
+                    result._columns[name].extend(column)
+            result._val.extend(table._val)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._val)
+
+    def __getitem__(self, i: int) -> Fact:
+        columns, strings = self._columns, self._strings
+        return {
+            "cik": columns["cik"][i],
+            "concept": strings[columns["concept"][i]],
+            "unit": strings[columns["unit"][i]],
+            "frame": strings[columns["frame"][i]] or None,
+            "start": day_to_date(columns["start"][i]),
+            "end": day_to_date(columns["end"][i]) or "",
+            "val": self._val[i],
+            "accn": strings[columns["accn"][i]],
+            "fy": columns["fy"][i] or None,
+            "fp": strings[columns["fp"][i]] or None,
+            "form": strings[columns["form"][i]] or None,
+            "filed": day_to_date(columns["filed"][i]),
+        }
+
+    def __iter__(self) -> Iterator[Fact]:
+        return map(self.__getitem__, range(len(self)))
+
+    @property
+    def concepts(self) -> list[str]:
+        """Distinct concepts, in order of first appearance"""
+        strings = self._strings
+        return [strings[code] for code in dict.fromkeys(self._columns["concept"])]
+
+    def column(self, name: str) -> Column:
+        """
+        The column's array, codes into `strings` for string columns and day
+        ordinals (`date.toordinal`) for dates. Do not modify it.
+        """
+        return self._get_column(name)
+
+    @property
+    def strings(self) -> list[str]:
+        return self._strings
+
+    def extend_company_facts(self, data: CompanyFactsJSON):
+        for taxonomy, concepts in data["facts"].items():
+            for tag, concept in concepts.items():
+                name = get_concept(taxonomy, tag)
+                for unit, facts in concept["units"].items():
+                    self._extend(data["cik"], name, unit, facts)
+
+    def select(
+        self,
+        *,
+        concept: str | None = None,
+        unit: str | None = None,
+        frame: str | None = None,
+        cik: int | None = None,
+        form: str | None = None,
+    ) -> list[int]:
+        """Indexes of the rows matching every given filter, in table order"""
+        rows: Sequence[int] = range(len(self))
+        codes = self._get_codes()
+        for name, value in (
+            ("concept", concept),
+            ("unit", unit),
+            ("frame", frame),
+            ("form", form),
+        ):
+            if value is not None:
+                code = codes.get(value)
+                if code is None:
+                    return []
+                column = self._columns[name]
+                rows = [i for i in rows if column[i] == code]
+        if cik is not None:
+            column = self._columns["cik"]
+            rows = [i for i in rows if column[i] == cik]
+        return list(rows)
+
+    def filter(
+        self,
+        *,
+        concept: str | None = None,
+        unit: str | None = None,
+        frame: str | None = None,
+        cik: int | None = None,
+        form: str | None = None,
+    ) -> "FactsTable":
+        return self.take(
+            self.select(concept=concept, unit=unit, frame=frame, cik=cik, form=form)
+        )
+
+    def take(self, rows: Sequence[int]) -> "FactsTable":
+        """A table of the given rows, sharing this table's strings"""
+        return FactsTable(
+            self._strings,
+            {
+                name: array(column.typecode, map(column.__getitem__, rows))
+                for name, column in self._columns.items()
+            },
+            array("d", map(self._val.__getitem__, rows)),
+        )
+
+    def sort(self) -> "FactsTable":
+        """The rows ordered by concept, unit then frame, companies in order"""
+        if len(self._strings) > MAX_SORTED_STRINGS:
+            raise ValueError(f"Too many strings to sort: {len(self._strings)}")
+        keys = self._get_keys()
+        return self.take(sorted(range(len(self)), key=keys.__getitem__))
+
+    def find(
+        self, concept: str, unit: str | None = None, frame: str | None = None
+    ) -> tuple[int, int]:
+        """Row range of a concept, in a unit and frame, in a sorted table"""
+        return find_key_range(self._get_codes(), self._get_keys(), concept, unit, frame)
+
+    def to_numpy(self) -> dict[str, NumpyArray]:
+        """
+        Columns as NumPy arrays: numbers without a copy, dates as
+        `datetime64[D]` (NaT for none), strings as object arrays
+        """
+        if numpy is None:
+            raise RuntimeError("FactsTable.to_numpy requires `numpy`")
+
+        new_array = cast(Callable[..., NumpyArray], numpy.array)
+        from_buffer = cast(Callable[..., NumpyArray], numpy.frombuffer)
+        equal = cast(Callable[[NumpyArray, int], NumpyArray], numpy.equal)
+        not_a_time = cast(Callable[[str, str], object], numpy.datetime64)("NaT", "D")
+
+        strings = new_array([None, *self._strings[1:]], dtype=object)
+        arrays: dict[str, NumpyArray] = {}
+        for name in COLUMNS:
+            column = self._get_column(name)
+            values = from_buffer(column, dtype=column.typecode)
+            if name in STRING_COLUMNS:
+                values = strings[values]
+            elif name in DATE_COLUMNS:
+                days = values.astype("int64") - _UNIX_EPOCH_DAY
+                values = days.astype("datetime64[D]")
+                values[equal(days, EMPTY_DAY - _UNIX_EPOCH_DAY)] = not_a_time
+            arrays[name] = values
+        return arrays
+
+    def encode(self) -> bytes:
+        sections: dict[str, bytes] = {
+            name: self._get_column(name).tobytes() for name in COLUMNS
+        }
+        if len(self._strings) <= MAX_SORTED_STRINGS:
+            sections["key"] = self._get_keys().tobytes()
+
+        bounds: dict[str, tuple[int, int]] = {}
+        start = 0
+        for name, data in sections.items():
+            bounds[name] = (start, start + len(data))
+            start += len(data)
+
+        header: FactsTableHeader = {
+            "byteorder": sys.byteorder,
+            "rows": len(self),
+            "strings": self._strings,
+            "sections": bounds,
+        }
+        data = json.dumps(header, separators=(",", ":")).encode()
+        return b"".join(
+            [MAGIC, _HEADER_LENGTH.pack(len(data)), data, *sections.values()]
+        )
+
+    def _extend(self, cik: int, concept: str, unit: str, facts: list[XbrlFact]):
+        count = len(facts)
+        encode = self._encode
+        columns = self._columns
+        columns["cik"].extend(repeat(cik, count))
+        columns["concept"].extend(repeat(encode(concept), count))
+        columns["unit"].extend(repeat(encode(unit), count))
+        columns["frame"].extend(encode(fact.get("frame", "")) for fact in facts)
+        columns["start"].extend(_to_day(fact.get("start", "")) for fact in facts)
+        columns["end"].extend(_to_day(fact["end"]) for fact in facts)
+        self._val.extend(fact["val"] for fact in facts)
+        columns["accn"].extend(encode(fact["accn"]) for fact in facts)
+        columns["fy"].extend(fact["fy"] or 0 for fact in facts)
+        columns["fp"].extend(encode(fact["fp"] or "") for fact in facts)
+        columns["form"].extend(encode(fact["form"]) for fact in facts)
+        columns["filed"].extend(_to_day(fact["filed"]) for fact in facts)
+
+    def _encode(self, value: str) -> int:
+        codes = self._get_codes()
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def _get_codes(self) -> dict[str, int]:
+        # Tables decoded for a query never need them, so they are built lazily
+        if self._codes is None or len(self._codes) != len(self._strings):
+            self._codes = {value: i for i, value in enumerate(self._strings)}
+        return self._codes
+
+    def _get_column(self, name: str) -> Column:
+        return self._val if name == "val" else self._columns[name]
+
+    def _get_keys(self) -> array[int]:
+        columns = self._columns
+        return array(
+            "Q",
+            map(pack_key, columns["concept"], columns["unit"], columns["frame"]),
+        )
+
+
+def recode_string(
+    strings: list[str],
+    codes: dict[int, int],
+    encode: Callable[[str], int],
+    code: int,
+) -> int:
+    """`code` into `strings` as a code of another table, encoded by `encode`"""
+    new = codes.get(code)
+    if new is None:
+        new = codes[code] = encode(strings[code])
+    return new
+
+
+def find_key_range(
+    codes: dict[str, int],
+    keys: Sequence[int],
+    concept: str,
+    unit: str | None = None,
+    frame: str | None = None,
+) -> tuple[int, int]:
+    """
+    Row range of a concept, and of a unit and frame within it, given the sort
+    keys of a sorted table. Without `unit`, `frame` is not used.
+    """
+    concept_code = codes.get(concept)
+    if concept_code is None:
+        return 0, 0
+    low, high = pack_key(concept_code), pack_key(concept_code + 1)
+
+    if unit is not None:
+        unit_code = codes.get(unit)
+        if unit_code is None:
+            return 0, 0
+        low, high = (
+            pack_key(concept_code, unit_code),
+            pack_key(concept_code, unit_code + 1),
+        )
+
+        if frame is not None:
+            frame_code = codes.get(frame)
+            if frame_code is None:
+                return 0, 0
+            low = pack_key(concept_code, unit_code, frame_code)
+            high = low + 1
+
+    return bisect_left(keys, low), bisect_left(keys, high)
+
+
+def parse_company_facts(content: str) -> FactsTable:
+    return FactsTable.from_company_facts(CompanyFactsDecoder(content))
+
+
+def parse_company_concept(content: str) -> FactsTable:
+    return FactsTable.from_company_concept(CompanyConceptDecoder(content))
+
+
+def parse_frame(content: str) -> FactsTable:
+    return FactsTable.from_frame(FrameDecoder(content))
+
+
+class XbrlClient:
+    """
+    The `api/xbrl` endpoints, through a downloader: its cache, rate limit and
+    shared parsing apply, and each response is parsed once into a `FactsTable`
+    """
+
+    _downloader: IDownloader
+    _base_url: str
+
+    def __init__(self, downloader: IDownloader, base_url: str = XBRL_API_URL):
+        self._downloader = downloader
+        self._base_url = base_url
+
+    async def get_company_facts_async(self, cik: int) -> FactsTable:
+        """Every fact the company reported, all concepts and units"""
+        return await self._downloader.get_parsed_async(
+            get_company_facts_url(cik, self._base_url), parse_company_facts
+        )
+
+    async def get_company_concept_async(
+        self, cik: int, taxonomy: str, tag: str
+    ) -> FactsTable:
+        """The company's facts of one concept, in every unit"""
+        return await self._downloader.get_parsed_async(
+            get_company_concept_url(cik, taxonomy, tag, self._base_url),
+            parse_company_concept,
+        )
+
+    async def get_frame_async(
+        self, taxonomy: str, tag: str, unit: str, period: str
+    ) -> FactsTable:
+        """
+        One fact per company for the concept in the calendar period, e.g.
+        `CY2024Q1` for a quarter's duration or `CY2024Q1I` for an instant
+        """
+        return await self._downloader.get_parsed_async(
+            get_frame_url(taxonomy, tag, unit, period, self._base_url), parse_frame
+        )